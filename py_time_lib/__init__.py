@@ -7,9 +7,10 @@ from .constants import NOMINAL_SECS_PER_HOUR, NOMINAL_SECS_PER_DAY, NOMINAL_SECS
 from .constants import APPROX_SECS_PER_MONTH, APPROX_SECS_PER_YEAR, NOMINAL_MICROSECS_PER_DAY, NOMINAL_MINS_PER_DAY
 from .lib_funcs import binary_search, binary_search_float, binary_search_array_split, almost_linear_func_inverse
 from .lib_funcs import fancy_format
-from .lib_funcs import file_relative_path_to_abs, file_at_path_exists, get_file_at_path, set_file_at_path, get_file_from_online
+from .lib_funcs import file_relative_path_to_abs, file_at_path_exists, get_file_at_path, set_file_at_path, get_file_from_online, get_file_from_online_conditional, get_file_validators
 from .exceptions import TimeUnmappableError
 from .fixed_prec import FixedPrec
+from .piecewise_chebyshev import PiecewiseChebyshev
 from .calendars.date_delta import DateDelta
 from .calendars.date_base import DateBase
 from .calendars.date_base_extras import YearlyCalendarBase, ThreeTupleBase
@@ -23,11 +24,12 @@ from .time_classes.lib import TimeStorageType
 from .time_classes.time_delta import TimeDelta
 from .time_classes.time_instant.time_inst import TimeInstant
 from .time_classes.time_instant.time_inst_smear import LeapBasis, SmearType
+from .time_classes.time_instant.time_inst_tz import TZResolvePolicy, TZResolveResult, LocalTimeUnit
 from .time_classes.time_instant.time_inst_smear import LeapSmearSingle, LeapSmearOverrideEntry, TAIToUTCSmearEntry, UTCSmearToTAIEntry, LeapSmearPlan
-from .time_classes.time_zone import TimeZone
+from .time_classes.time_zone import TimeZone, TimeZoneInitialOffset, TimeZoneLaterOffset, TimeZoneTransition, TimeZoneOffsetInterval
 from .named_tuples import MonthWeekDate
 from .named_tuples import LeapSecEntry, SecsSinceEpochUTC, SecsSinceEpochTZ, SecsSinceEpochSmearTZ, DateTupleBasic, DateTupleTZ, UnixTimestampUTC
-from .update_dbs import TIMEZONES, update_leap_seconds, update_timezone_data, update_time_databases, update_time_databases_loop
+from .update_dbs import TIMEZONES, update_leap_seconds, update_timezone_data, update_timezone_data_from_tzif, update_time_databases, update_time_databases_async, update_time_databases_loop
 
 from .calendars.date_base import _init_module_vars as _DateBase_init_module_vars
 from .time_classes.time_instant.time_inst_smear import _init_module_vars as _TimeInstSmear_init_module_vars
@@ -7,7 +7,6 @@ from typing import Self
 
 from ..lib_funcs import binary_search
 from ..named_tuples import MonthWeekDate
-from .date_delta import DateDelta
 from .date_base import DateBase
 from .date_base_extras import ThreeTupleBase
 
@@ -92,6 +91,53 @@ class JulGregBaseDate(ThreeTupleBase):
     first_week_of_next_month = cls.from_month_week_day(next_month.year, next_month.month, 1, day_of_week)
     return (first_week_of_next_month.days_since_epoch - first_week_of_month.days_since_epoch) // cls.DAYS_IN_WEEK
   
+  @classmethod
+  def month_week_day_to_days_since_epoch(cls, year: Integral, month: Integral, week: Integral, day_of_week: Integral, from_month_end: bool = False) -> Integral:
+    'Returns the days since epoch of the nth (or nth last if from_month_end) given day of week in a month, without creating date objects.'
+    
+    if not (1 <= month <= cls.MONTHS_IN_YEAR):
+      raise ValueError(f'month {month} out of range, must be between 1 and {cls.MONTHS_IN_YEAR}')
+    
+    month_start = cls.date_to_days_since_epoch(year, month, 1)
+    next_month_start = cls.date_to_days_since_epoch(year, month + 1, 1)
+    
+    if not from_month_end:
+      first_day_of_week = (month_start + cls.DAY_OF_WEEK_OFFSET) % cls.DAYS_IN_WEEK
+      days_since_epoch = month_start + (day_of_week - first_day_of_week) % cls.DAYS_IN_WEEK + (week - 1) * cls.DAYS_IN_WEEK
+    else:
+      month_end = next_month_start - 1
+      last_day_of_week = (month_end + cls.DAY_OF_WEEK_OFFSET) % cls.DAYS_IN_WEEK
+      days_since_epoch = month_end - (last_day_of_week - day_of_week) % cls.DAYS_IN_WEEK - (week - 1) * cls.DAYS_IN_WEEK
+    
+    if not (month_start <= days_since_epoch < next_month_start):
+      raise ValueError(f'week {week} of day of week {day_of_week} is outside of {year}-{month}')
+    
+    return days_since_epoch
+  
+  @classmethod
+  def month_day_of_week_comp_day_to_days_since_epoch(cls, year: Integral, month: Integral, day: Integral, day_of_week: Integral, greater_than_equals: bool, out_of_month_bounds_allowed: bool = True) -> Integral:
+    'Returns the days since epoch of from_month_day_of_week_comp_day, without creating date objects.'
+    
+    if not (1 <= month <= cls.MONTHS_IN_YEAR):
+      raise ValueError(f'month {month} out of range, must be between 1 and {cls.MONTHS_IN_YEAR}')
+    
+    if not (1 <= day <= cls.days_in_month(year, month)):
+      raise ValueError(f'day {year}-{month}-{day} out of range, must be between 1 and {cls.days_in_month(year, month)}')
+    
+    base_days_since_epoch = cls.date_to_days_since_epoch(year, month, day)
+    base_day_of_week = (base_days_since_epoch + cls.DAY_OF_WEEK_OFFSET) % cls.DAYS_IN_WEEK
+    
+    if greater_than_equals:
+      days_since_epoch = base_days_since_epoch + (day_of_week - base_day_of_week) % cls.DAYS_IN_WEEK
+    else:
+      days_since_epoch = base_days_since_epoch - (base_day_of_week - day_of_week) % cls.DAYS_IN_WEEK
+    
+    if not out_of_month_bounds_allowed:
+      if not (base_days_since_epoch - day + 1 <= days_since_epoch < cls.date_to_days_since_epoch(year, month + 1, 1)):
+        raise ValueError('Calculating date of given day of week goes outside of month bounds')
+    
+    return days_since_epoch
+  
   @classmethod
   def _init_class_vars(cls) -> None:
     cls.months_start_day = [0]
@@ -170,15 +216,7 @@ class JulGregBaseDate(ThreeTupleBase):
   
   @classmethod
   def from_month_week_day(cls, year: Integral, month: Integral, week: Integral, day_of_week: Integral, from_month_end: bool = False) -> Self:
-    if not from_month_end:
-      first_day_of_week = cls(year, month, 1).day_of_week()
-      if day_of_week >= first_day_of_week:
-        return cls(year, month, (week - 1) * cls.DAYS_IN_WEEK + (day_of_week - first_day_of_week) + 1)
-      else:
-        return cls(year, month, week * cls.DAYS_IN_WEEK + (day_of_week - first_day_of_week) + 1)
-    else:
-      week_flipped = cls.num_weeks_on_day(year, month, day_of_week) - week + 1
-      return cls.from_month_week_day(year, month, week_flipped, day_of_week)
+    return cls(cls.month_week_day_to_days_since_epoch(year, month, week, day_of_week, from_month_end = from_month_end))
   
   @classmethod
   def from_month_day_of_week_comp_day(cls, year: Integral, month: Integral, day: Integral, day_of_week: Integral, greater_than_equals: bool, out_of_month_bounds_allowed: bool = True) -> Self:
@@ -189,21 +227,11 @@ class JulGregBaseDate(ThreeTupleBase):
     is less than or equal to the 25th of the month is apr 21.
     '''
     
-    base_date = cls(year, month, day)
-    base_day_of_week = base_date.day_of_week()
-    
-    if greater_than_equals:
-      day_increment = (day_of_week - base_day_of_week) % cls.DAYS_IN_WEEK
-      result = base_date + DateDelta(day_increment)
-    else:
-      day_decrement = (base_day_of_week - day_of_week) % cls.DAYS_IN_WEEK
-      result = base_date - DateDelta(day_decrement)
-    
-    if not out_of_month_bounds_allowed:
-      if result.month != base_date.month or result.year != base_date.year:
-        raise ValueError('Calculating date of given day of week goes outside of month bounds')
-    
-    return result
+    return cls(cls.month_day_of_week_comp_day_to_days_since_epoch(
+      year, month, day, day_of_week,
+      greater_than_equals = greater_than_equals,
+      out_of_month_bounds_allowed = out_of_month_bounds_allowed
+    ))
   
   @property
   def year(self) -> Integral:
@@ -238,7 +266,7 @@ class JulGregBaseDate(ThreeTupleBase):
     if not from_month_end:
       # 1 = first 7 days of month, 2 = second 7 days of month, etc.
       week_num = (self.day - 1) // self.DAYS_IN_WEEK + 1
-
+      
       return MonthWeekDate(self.year, self.month, week_num, self.day_of_week())
     else:
       year, month, week_num, day_of_week = self.to_month_week_day()
@@ -1,9 +1,12 @@
+from hashlib import sha256
+from json import dumps as json_dumps, loads as json_loads
 from pathlib import PurePath
 from numbers import Integral, Real
 from os import makedirs
 from os.path import exists
 from typing import Callable, Sequence
-from urllib.request import urlopen
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
 
 MAX_BINARY_SEARCH_STEPS = 500
 MAX_LINEAR_INVERSE_STEPS = 500
@@ -216,3 +219,68 @@ def get_file_from_online(url: str) -> bytes:
     raise RuntimeError('Leap second request failed')
   
   return response.read()
+
+def get_contents_hash(contents: bytes) -> str:
+  return sha256(contents).hexdigest()
+
+def get_validators_file_path(data_file_path: str) -> str:
+  return f'{data_file_path}.validators.json'
+
+def get_file_validators(data_file_path: str) -> dict[str, str | None] | None:
+  'Returns the http validators and content hash stored next to a downloaded file, or None if there are none or the file itself is missing.'
+  if not file_at_path_exists(data_file_path):
+    return None
+  
+  validators_str = get_file_at_path(get_validators_file_path(data_file_path))
+  
+  if validators_str == None:
+    return None
+  else:
+    return json_loads(validators_str)
+
+def get_file_from_online_conditional(url: str, data_file_path: str) -> tuple[bytes, bool]:
+  '''
+  Downloads url into data_file_path, sending the ETag and Last-Modified validators stored next to it so that an unchanged
+  file is not sent again. Returns the file contents and whether they differ from the previously stored file.
+  '''
+  
+  validators = get_file_validators(data_file_path)
+  
+  headers = {}
+  if validators != None:
+    if validators['etag'] != None:
+      headers['If-None-Match'] = validators['etag']
+    if validators['last_modified'] != None:
+      headers['If-Modified-Since'] = validators['last_modified']
+  
+  try:
+    response = urlopen(Request(url, headers = headers))
+  except HTTPError as e:
+    if e.code == 304 and validators != None:
+      return get_file_at_path(data_file_path), False
+    else:
+      raise
+  
+  if response.status != 200:
+    raise RuntimeError(f'Request for {url} failed')
+  
+  contents = response.read()
+  contents_hash = get_contents_hash(contents)
+  
+  if validators != None:
+    changed = contents_hash != validators['sha256']
+  else:
+    stored_contents = get_file_at_path(data_file_path)
+    changed = stored_contents == None or contents_hash != get_contents_hash(stored_contents)
+  
+  if changed:
+    set_file_at_path(data_file_path, contents)
+  
+  # written after the file itself, so validators never describe a file that was not stored
+  set_file_at_path(get_validators_file_path(data_file_path), json_dumps({
+    'etag': response.headers['ETag'],
+    'last_modified': response.headers['Last-Modified'],
+    'sha256': contents_hash,
+  }).encode())
+  
+  return contents, changed
@@ -0,0 +1,135 @@
+from math import cos, pi
+from numbers import Real
+from typing import Callable, Self
+
+from .fixed_prec import FixedPrec
+
+class PiecewiseChebyshev:
+  '''
+  Approximation of a smooth function over [start, end), split into equal segments that each hold a chebyshev series.
+  Fitting samples the function once per node; evaluation is a few float multiply-adds.
+  '''
+  
+  # static stuff
+  
+  DEFAULT_SEGMENTS = 16
+  DEFAULT_DEGREE = 12
+  
+  @classmethod
+  def _get_segment_coefficients(cls, func: Callable[[FixedPrec], Real], segment_start: FixedPrec, segment_length: FixedPrec, degree: int) -> tuple[float, ...]:
+    node_count = degree + 1
+    # chebyshev nodes of the first kind, in [-1, 1]
+    node_angles = [pi * (k + 0.5) / node_count for k in range(node_count)]
+    node_values = [
+      float(func(segment_start + segment_length * FixedPrec.from_basic((cos(node_angle) + 1) / 2)))
+      for node_angle in node_angles
+    ]
+    
+    coefficients = [
+      2 / node_count * sum(node_value * cos(j * node_angle) for node_value, node_angle in zip(node_values, node_angles))
+      for j in range(node_count)
+    ]
+    coefficients[0] /= 2
+    
+    return tuple(coefficients)
+  
+  @classmethod
+  def _get_derivative_coefficients(cls, coefficients: tuple[float, ...], segment_length: float) -> tuple[float, ...]:
+    # https://en.wikipedia.org/wiki/Chebyshev_polynomials#Differentiation_and_integration
+    degree = len(coefficients) - 1
+    derivative_coefficients = [0.0] * (degree + 2)
+    
+    for j in range(degree, 0, -1):
+      derivative_coefficients[j - 1] = derivative_coefficients[j + 1] + 2 * j * coefficients[j]
+    
+    derivative_coefficients[0] /= 2
+    
+    # d/dx = d/du * 2 / segment_length
+    return tuple(coefficient * 2 / segment_length for coefficient in derivative_coefficients[:max(degree, 1)])
+  
+  # instance stuff
+  
+  __slots__ = 'start', 'end', 'segment_count', 'segment_length', 'coefficients', 'max_error', '_start_float', '_segments_per_unit'
+  start: FixedPrec
+  end: FixedPrec
+  segment_count: int
+  segment_length: FixedPrec
+  coefficients: tuple[tuple[float, ...], ...]
+  max_error: float | None
+  
+  def __init__(self, func: Callable[[FixedPrec], Real] | None, start: Real, end: Real, segments: int = DEFAULT_SEGMENTS, degree: int = DEFAULT_DEGREE, coefficients: tuple[tuple[float, ...], ...] | None = None):
+    '''
+    Fits func (called with FixedPrec values) with a degree "degree" polynomial on each of "segments" segments.
+    max_error is the largest difference from func at the extrema of each segment's chebyshev error term (where the
+    error of a smooth function peaks, except the end of the range). It is an estimate of the error, not a bound: the
+    error can be larger between those points, especially for a function that is not smooth enough for the degree.
+    Pass coefficients instead of func to build a table directly (max_error is then None).
+    '''
+    
+    self.start = FixedPrec.from_basic(start)
+    self.end = FixedPrec.from_basic(end)
+    self.segment_count = segments
+    self.segment_length = (self.end - self.start) / segments
+    self._start_float = float(self.start)
+    self._segments_per_unit = segments / float(self.end - self.start)
+    
+    if coefficients != None:
+      self.coefficients = coefficients
+      self.max_error = None
+    else:
+      self.coefficients = tuple(
+        self._get_segment_coefficients(func, self.start + self.segment_length * i, self.segment_length, degree)
+        for i in range(segments)
+      )
+      
+      max_error = 0.0
+      
+      for i in range(segments):
+        segment_start = self.start + self.segment_length * i
+        for k in range(degree + 2):
+          x = segment_start + self.segment_length * FixedPrec.from_basic((cos(pi * k / (degree + 1)) + 1) / 2)
+          if x < self.end:
+            max_error = max(max_error, abs(self(x) - float(func(x))))
+      
+      self.max_error = max_error
+  
+  def __repr__(self) -> str:
+    return f'{self.__class__.__name__}(start = {self.start!r}, end = {self.end!r}, segments = {self.segment_count!r}, degree = {len(self.coefficients[0]) - 1!r}, max_error = {self.max_error!r})'
+  
+  def __call__(self, x: Real) -> float | None:
+    'Returns the approximate function value at x, or None if x is outside [start, end).'
+    
+    x_exact = x
+    x = float(x) - self._start_float
+    segment_index = int(x * self._segments_per_unit)
+    
+    if x < 0 or segment_index >= self.segment_count:
+      # float rounding can put a value just inside the range on or past its ends, so the range is checked on the exact value
+      if not (self.start <= x_exact < self.end):
+        return None
+      segment_index = min(max(segment_index, 0), self.segment_count - 1)
+    
+    # position in segment, in [-1, 1]
+    u = 2 * (x * self._segments_per_unit - segment_index) - 1
+    
+    # clenshaw's recurrence
+    coefficients = self.coefficients[segment_index]
+    b1 = 0.0
+    b2 = 0.0
+    for coefficient in coefficients[:0:-1]:
+      b1, b2 = 2 * u * b1 - b2 + coefficient, b1
+    
+    return u * b1 - b2 + coefficients[0]
+  
+  def derivative(self) -> Self:
+    'Returns the table of the derivative of the function (with respect to x).'
+    
+    segment_length = float(self.segment_length)
+    
+    return self.__class__(
+      None,
+      self.start,
+      self.end,
+      self.segment_count,
+      coefficients = tuple(self._get_derivative_coefficients(coefficients, segment_length) for coefficients in self.coefficients)
+    )
@@ -204,3 +204,28 @@ class TestCalendarGregorian(TestCase):
     self.assertEqual(cls.from_month_day_of_week_comp_day(2024, 4, 30, 1, False, out_of_month_bounds_allowed = False), cls(2024, 4, 29))
     with self.assertRaises(ValueError):
       cls.from_month_day_of_week_comp_day(2024, 4, 30, 1, True, out_of_month_bounds_allowed = False)
+  
+  def test_month_week_day_days_since_epoch(self):
+    # covers every weekday for jan 1, in leap and non leap years
+    for year in range(2020, 2029):
+      for month in range(1, 13):
+        month_days = [cls(year, month, day) for day in range(1, cls.days_in_month(year, month) + 1)]
+        for day_of_week in range(7):
+          matching_days = [date.days_since_epoch for date in month_days if date.day_of_week() == day_of_week]
+          for week in range(1, 6):
+            if week <= len(matching_days):
+              self.assertEqual(cls.month_week_day_to_days_since_epoch(year, month, week, day_of_week), matching_days[week - 1])
+              self.assertEqual(cls.month_week_day_to_days_since_epoch(year, month, week, day_of_week, from_month_end = True), matching_days[-week])
+            else:
+              with self.assertRaises(ValueError):
+                cls.month_week_day_to_days_since_epoch(year, month, week, day_of_week)
+              with self.assertRaises(ValueError):
+                cls.month_week_day_to_days_since_epoch(year, month, week, day_of_week, from_month_end = True)
+          for date in month_days:
+            ge_days = min(days for days in range(date.days_since_epoch, date.days_since_epoch + 7) if cls(days).day_of_week() == day_of_week)
+            le_days = max(days for days in range(date.days_since_epoch - 6, date.days_since_epoch + 1) if cls(days).day_of_week() == day_of_week)
+            self.assertEqual(cls.month_day_of_week_comp_day_to_days_since_epoch(year, month, date.day, day_of_week, True), ge_days)
+            self.assertEqual(cls.month_day_of_week_comp_day_to_days_since_epoch(year, month, date.day, day_of_week, False), le_days)
+    
+    with self.assertRaises(ValueError):
+      cls.month_day_of_week_comp_day_to_days_since_epoch(2023, 2, 29, 0, True)
@@ -1,6 +1,32 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from os.path import join as path_join
+from tempfile import TemporaryDirectory
+from threading import Thread
 from unittest import TestCase
 
-from .. import binary_search, binary_search_array_split, binary_search_float, FixedPrec
+from .. import binary_search, binary_search_array_split, binary_search_float, FixedPrec, get_file_from_online_conditional, get_file_validators
+
+class _ConditionalRequestHandler(BaseHTTPRequestHandler):
+  # set on the server: contents, etag, use_validators, full_responses
+  
+  def do_GET(self):
+    server = self.server
+    
+    if server.use_validators and server.etag != None and self.headers['If-None-Match'] == server.etag:
+      self.send_response(304)
+      self.end_headers()
+    else:
+      server.full_responses += 1
+      self.send_response(200)
+      if server.use_validators:
+        self.send_header('ETag', server.etag)
+        self.send_header('Last-Modified', 'Tue, 01 Oct 2024 00:00:00 GMT')
+      self.send_header('Content-Length', str(len(server.contents)))
+      self.end_headers()
+      self.wfile.write(server.contents)
+  
+  def log_message(self, format, *args):
+    pass
 
 class TestLibFuncs(TestCase):
   def test_binary_search(self):
@@ -20,3 +46,39 @@ class TestLibFuncs(TestCase):
   def test_binary_search_float(self):
     self.assertEqual(binary_search_float(lambda x: x <= 3.14159, 3, 4), 3.14159)
     self.assertEqual(binary_search_float(lambda x: x <= FixedPrec('18237645172386537123.141591236471'), FixedPrec(0), 10 ** 30), FixedPrec('18237645172386537123.141591236471'))
+  
+  def test_get_file_from_online_conditional(self):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _ConditionalRequestHandler)
+    server.contents = b'version 1'
+    server.etag = '"1"'
+    server.use_validators = True
+    server.full_responses = 0
+    Thread(target = server.serve_forever, daemon = True).start()
+    url = f'http://127.0.0.1:{server.server_address[1]}/file.txt'
+    
+    try:
+      with TemporaryDirectory() as temp_dir:
+        file_path = path_join(temp_dir, 'file.txt')
+        
+        self.assertEqual(get_file_validators(file_path), None)
+        self.assertEqual(get_file_from_online_conditional(url, file_path), (b'version 1', True))
+        self.assertEqual(get_file_validators(file_path)['etag'], '"1"')
+        
+        # unchanged, server answers 304 and the stored file is used
+        self.assertEqual(get_file_from_online_conditional(url, file_path), (b'version 1', False))
+        self.assertEqual(server.full_responses, 1)
+        
+        server.contents = b'version 2'
+        server.etag = '"2"'
+        self.assertEqual(get_file_from_online_conditional(url, file_path), (b'version 2', True))
+        with open(file_path, 'rb') as f:
+          self.assertEqual(f.read(), b'version 2')
+        
+        # without validators from the server, unchanged contents are detected by hash
+        server.use_validators = False
+        self.assertEqual(get_file_from_online_conditional(url, file_path), (b'version 2', False))
+        self.assertEqual(get_file_validators(file_path)['etag'], None)
+        self.assertEqual(server.full_responses, 3)
+    finally:
+      server.shutdown()
+      server.server_close()
@@ -0,0 +1,38 @@
+from math import sin, cos
+from unittest import TestCase
+
+from .. import FixedPrec, PiecewiseChebyshev
+
+class TestPiecewiseChebyshev(TestCase):
+  def test_polynomial(self):
+    # a polynomial of at most the table degree is reproduced up to float rounding
+    table = PiecewiseChebyshev(lambda x: 3 * x ** 3 - 2 * x + 1, -2, 2, segments = 3, degree = 3)
+    self.assertLess(table.max_error, 1e-9)
+    for x in (FixedPrec('-2'), FixedPrec('-0.5'), FixedPrec('0.25'), FixedPrec('1.999')):
+      self.assertAlmostEqual(table(x), float(3 * x ** 3 - 2 * x + 1), 9)
+  
+  def test_sin(self):
+    table = PiecewiseChebyshev(lambda x: sin(float(x)), 0, 10, segments = 8, degree = 10)
+    self.assertLess(table.max_error, 1e-10)
+    for i in range(100):
+      self.assertAlmostEqual(table(i / 10), sin(i / 10), 10)
+    
+    derivative = table.derivative()
+    for i in range(100):
+      self.assertAlmostEqual(derivative(i / 10), cos(i / 10), 8)
+  
+  def test_out_of_range(self):
+    table = PiecewiseChebyshev(lambda x: x, 10, 20, segments = 2, degree = 1)
+    self.assertEqual(table(FixedPrec('9.999')), None)
+    self.assertEqual(table(20), None)
+    self.assertAlmostEqual(table(10), 10, 9)
+    self.assertAlmostEqual(table(FixedPrec('19.999')), 19.999, 9)
+    
+    # values one ulp inside the range that round to its ends as floats
+    table = PiecewiseChebyshev(lambda x: x, 0, 1_000_000, segments = 4, degree = 1)
+    self.assertAlmostEqual(table(FixedPrec('999999.999999999999')), 1_000_000, 6)
+    self.assertEqual(table(FixedPrec('1000000.000000000001')), None)
+    self.assertEqual(table(FixedPrec('-0.000000000001')), None)
+    table = PiecewiseChebyshev(lambda x: x, FixedPrec('0.000000000001'), 1, segments = 4, degree = 1)
+    self.assertAlmostEqual(table(FixedPrec('0.000000000001')), 0, 9)
+    self.assertEqual(table(0), None)
@@ -0,0 +1,335 @@
+from asyncio import run as asyncio_run
+from io import BytesIO
+from os.path import isfile, join as path_join
+from re import sub as re_sub
+from struct import pack
+from tarfile import open as tarfile_open, TarInfo
+from tempfile import TemporaryDirectory
+from unittest import TestCase, skipUnless
+
+from .. import FixedPrec, TimeZone, TimeInstant, TIMEZONES, update_time_databases_async, update_timezone_data
+from ..update_timezone_db import parse_tzdb, get_cached_tzdb_data_key, get_tzdb_stored_file_cache_key
+from ..update_ut1 import parse_ut1_offsets, parse_ut1_offsets_cached, parse_recent_files, get_ut1_offsets_cache_key, get_cached_ut1_offsets, set_cached_ut1_offsets, ut1_offsets_to_cache_bytes, ut1_offsets_from_cache_bytes
+from ..update_timezone_tzif import parse_tzif, parse_posix_tz_string, tzif_to_time_zone, get_tzif_data
+
+def _make_tzif_block(time_format_char: str, transitions: list[tuple[int, int]], types: list[tuple[int, bool, str]]) -> tuple[bytes, bytes]:
+  abbr_chars = b''
+  ttinfos = b''
+  for utc_offset, is_dst, abbr in types:
+    ttinfos += pack('>lBB', utc_offset, is_dst, len(abbr_chars))
+    abbr_chars += abbr.encode() + b'\0'
+  
+  counts = pack('>6l', 0, 0, 0, len(transitions), len(types), len(abbr_chars))
+  
+  data = b''.join(pack(f'>{time_format_char}', time) for time, _ in transitions)
+  data += bytes(type_index for _, type_index in transitions)
+  data += ttinfos + abbr_chars
+  
+  return counts, data
+
+def _make_tzif(version: bytes, transitions: list[tuple[int, int]], types: list[tuple[int, bool, str]], footer: str = '') -> bytes:
+  counts_v1, data_v1 = _make_tzif_block('l', transitions, types)
+  result = b'TZif' + version + bytes(15) + counts_v1 + data_v1
+  
+  if version != b'\0':
+    counts_v2, data_v2 = _make_tzif_block('q', transitions, types)
+    result += b'TZif' + version + bytes(15) + counts_v2 + data_v2
+    result += b'\n' + footer.encode() + b'\n'
+  
+  return result
+
+_tzdb_test_files = {
+  'version': '2024a\n',
+  'northamerica': '''
+# Rule	NAME	FROM	TO	-	IN	ON	AT	SAVE	LETTER
+Rule	US	1967	2006	-	Oct	lastSun	2:00	0	S
+Rule	US	2007	max	-	Mar	Sun>=8	2:00	1:00	D
+Rule	US	2007	max	-	Nov	Sun>=1	2:00	0	S
+
+# Zone	NAME		STDOFF	RULES	FORMAT	[UNTIL]
+Zone America/Chicago	-5:50:36 -	LMT	1883 Nov 18 12:09:24
+			-6:00	US	C%sT
+Zone America/New_York	-4:56:02 -	LMT	1883 Nov 18 12:03:58
+			-5:00	US	E%sT
+''',
+  'europe': '''
+Rule	EU	1981	max	-	Mar	lastSun	 1:00u	1:00	S
+Rule	EU	1996	max	-	Oct	lastSun	 1:00u	0	-
+
+Zone	Europe/Berlin	0:53:28 -	LMT	1893 Apr
+			1:00	EU	CE%sT
+Link	Europe/Berlin	Europe/Busingen
+''',
+  'antarctica': '''
+# uses a rule from another file
+Zone Antarctica/Test	0	-	-00	1957 Jan 1
+			-6:00	US	C%sT
+''',
+}
+
+def _make_tzdb_tgz() -> bytes:
+  tgz_bytes = BytesIO()
+  with tarfile_open(fileobj = tgz_bytes, mode = 'w:gz') as tgz_file:
+    for name, contents in _tzdb_test_files.items():
+      contents_bytes = contents.encode()
+      tar_info = TarInfo(name)
+      tar_info.size = len(contents_bytes)
+      tgz_file.addfile(tar_info, BytesIO(contents_bytes))
+  return tgz_bytes.getvalue()
+
+_eop_test_files = {
+  'historic': '  59000.000   0.100000   0.300000  -0.2000000   0.000000   0.000000   0.000000   0.000000   0.0000100\n',
+  'recent': (
+    '200601 59001.00 I  0.100000 0.000010  0.300000 0.000010  I-0.2000000 0.0000100\n'
+    '200602 59002.00 I  0.100000 0.000010  0.300000 0.000010  I-0.2100000 0.0000100\n'
+  ),
+  'daily': '200602 59002.00 I  0.100000 0.000010  0.300000 0.000010  I-0.2200000 0.0000100\n',
+}
+
+class TestUpdateTimezone(TestCase):
+  def __init__(self, *args):
+    super().__init__(*args)
+    self.maxDiff = None
+  
+  def test_parse_tzif(self):
+    types = [(-21_600, False, 'CST'), (-18_000, True, 'CDT')]
+    transitions = [(1_699_167_600, 0), (1_710_057_600, 1)]
+    
+    for version in (b'2', b'3', b'4'):
+      tzif_dict = parse_tzif(_make_tzif(version, transitions, types, 'CST6CDT,M3.2.0,M11.1.0'))
+      self.assertEqual(tzif_dict['version'], int(version))
+      self.assertEqual(tzif_dict['transition_times'], (1_699_167_600, 1_710_057_600))
+      self.assertEqual(tzif_dict['transition_types'], (0, 1))
+      self.assertEqual(tzif_dict['local_time_types'], (
+        {'utc_offset': -21_600, 'is_dst': False, 'abbreviation': 'CST'},
+        {'utc_offset': -18_000, 'is_dst': True, 'abbreviation': 'CDT'},
+      ))
+      self.assertEqual(tzif_dict['footer'], 'CST6CDT,M3.2.0,M11.1.0')
+    
+    tzif_dict = parse_tzif(_make_tzif(b'\0', transitions, types))
+    self.assertEqual(tzif_dict['version'], 1)
+    self.assertEqual(tzif_dict['footer'], None)
+    
+    tz = tzif_to_time_zone(tzif_dict)
+    self.assertEqual(tz.initial_offset['utc_offset'], FixedPrec(-18_000))
+    self.assertEqual(tz.initial_offset['abbreviation'], 'CDT')
+    self.assertEqual(tz.later_offsets, ())
+    
+    with self.assertRaises(ValueError):
+      parse_tzif(b'Not a TZif file, but long enough to contain a header.')
+  
+  def test_parse_posix_tz_string(self):
+    def test(tz: TimeZone, tz_tuple, utc_tuple, offset, abbr):
+      instant = TimeInstant.from_date_tuple_utc(*utc_tuple, 0)
+      self.assertEqual(instant.to_date_tuple_tz(tz), (*tz_tuple, 0, False))
+      self.assertEqual(instant.get_current_tz_offset(tz), (FixedPrec(offset), abbr))
+    
+    chicago = parse_posix_tz_string('CST6CDT,M3.2.0,M11.1.0')
+    self.assertEqual(chicago.base_utc_offset, FixedPrec(-21_600))
+    test(chicago, (2024, 3, 10, 1, 59, 59), (2024, 3, 10, 7, 59, 59), -21_600, 'CST')
+    test(chicago, (2024, 3, 10, 3, 0, 0), (2024, 3, 10, 8, 0, 0), -18_000, 'CDT')
+    test(chicago, (2024, 11, 3, 2, 0, 0), (2024, 11, 3, 8, 0, 0), -21_600, 'CST')
+    
+    # southern hemisphere, starts the year in dst
+    sydney = parse_posix_tz_string('AEST-10AEDT,M10.1.0,M4.1.0/3')
+    self.assertEqual(sydney.base_utc_offset, FixedPrec(36_000))
+    test(sydney, (2024, 1, 1, 11, 0, 0), (2024, 1, 1, 0, 0, 0), 39_600, 'AEDT')
+    test(sydney, (2024, 4, 7, 3, 0, 0), (2024, 4, 6, 17, 0, 0), 36_000, 'AEST')
+    test(sydney, (2024, 10, 6, 3, 0, 0), (2024, 10, 5, 16, 0, 0), 39_600, 'AEDT')
+    
+    # last week of month, quoted names and minute offsets
+    test(parse_posix_tz_string('<+0330>-3:30'), (2024, 6, 1, 3, 30, 0), (2024, 6, 1, 0, 0, 0), 12_600, '+0330')
+    london = parse_posix_tz_string('GMT0BST,M3.5.0/1,M10.5.0')
+    test(london, (2024, 3, 31, 2, 0, 0), (2024, 3, 31, 1, 0, 0), 3_600, 'BST')
+    test(london, (2024, 10, 27, 2, 0, 0), (2024, 10, 27, 2, 0, 0), 0, 'GMT')
+    
+    # julian day rules never count february 29
+    julian = parse_posix_tz_string('XST-1XDT,J60/0,J300/0')
+    test(julian, (2024, 2, 29, 1, 0, 0), (2024, 2, 29, 0, 0, 0), 3_600, 'XST')
+    test(julian, (2024, 3, 1, 2, 0, 0), (2024, 3, 1, 0, 0, 0), 7_200, 'XDT')
+    
+    with self.assertRaises(ValueError):
+      parse_posix_tz_string('not a tz string')
+  
+  @skipUnless(isfile('/usr/share/zoneinfo/America/Chicago'), 'system zoneinfo not available')
+  def test_get_tzif_data(self):
+    tz_data = get_tzif_data('/usr/share/zoneinfo')
+    chicago = tz_data['proleptic_variable']['America/Chicago']
+    
+    instant = TimeInstant.from_date_tuple_utc(2024, 7, 1, 12, 0, 0, 0)
+    self.assertEqual(instant.to_date_tuple_tz(chicago), (2024, 7, 1, 7, 0, 0, 0, False))
+    self.assertEqual(instant.get_current_tz_offset(chicago), (FixedPrec(-18_000), 'CDT'))
+    self.assertIn('CST', tz_data['proleptic_fixed'])
+    self.assertNotIn('right/America/Chicago', tz_data['proleptic_variable'])
+  
+  def test_parse_tzdb(self):
+    with tarfile_open(fileobj = BytesIO(_make_tzdb_tgz())) as tgz_file:
+      tz_data = parse_tzdb(tgz_file)
+    
+    self.assertEqual(sorted(tz_data['proleptic_variable']), ['America/Chicago', 'America/New_York', 'Antarctica/Test', 'Europe/Berlin'])
+    self.assertEqual(sorted(tz_data['proleptic_fixed']), ['CDT', 'CEST', 'CET', 'CST', 'EDT', 'EST'])
+    
+    instant = TimeInstant.from_date_tuple_utc(2024, 7, 1, 12, 0, 0, 0)
+    self.assertEqual(instant.get_current_tz_offset(tz_data['proleptic_variable']['America/Chicago']), (FixedPrec(-18_000), 'CDT'))
+    self.assertEqual(instant.get_current_tz_offset(tz_data['proleptic_variable']['Antarctica/Test']), (FixedPrec(-18_000), 'CDT'))
+    self.assertEqual(instant.get_current_tz_offset(tz_data['proleptic_variable']['Europe/Berlin']), (FixedPrec(7_200), 'CEST'))
+    
+    # identical current rules are interned to one object
+    self.assertIs(tz_data['proleptic_variable']['America/Chicago'], tz_data['proleptic_variable']['Antarctica/Test'])
+    self.assertIsNot(tz_data['proleptic_variable']['America/Chicago'], tz_data['proleptic_variable']['America/New_York'])
+  
+  def test_parse_tzdb_parallel(self):
+    with tarfile_open(fileobj = BytesIO(_make_tzdb_tgz())) as tgz_file:
+      tz_data_serial = parse_tzdb(tgz_file, max_workers = 1)
+      tz_data_parallel = parse_tzdb(tgz_file, max_workers = 2)
+    
+    for dict_name in tz_data_serial:
+      self.assertEqual(
+        {name: repr(tz) for name, tz in tz_data_serial[dict_name].items()},
+        {name: repr(tz) for name, tz in tz_data_parallel[dict_name].items()}
+      )
+  
+  def test_parse_tzdb_selected_zones(self):
+    with tarfile_open(fileobj = BytesIO(_make_tzdb_tgz())) as tgz_file:
+      tz_data_full = parse_tzdb(tgz_file)
+      tz_data = parse_tzdb(tgz_file, zones = ['Antarctica/Test', 'Europe/Berlin'])
+      tz_data_parallel = parse_tzdb(tgz_file, max_workers = 2, zones = ['Antarctica/Test'])
+    
+    self.assertEqual(sorted(tz_data['proleptic_variable']), ['Antarctica/Test', 'Europe/Berlin'])
+    self.assertEqual(sorted(tz_data['proleptic_fixed']), ['CDT', 'CEST', 'CET', 'CST'])
+    self.assertEqual(sorted(tz_data_parallel['proleptic_variable']), ['Antarctica/Test'])
+    
+    for zone_name in tz_data['proleptic_variable']:
+      self.assertEqual(repr(tz_data['proleptic_variable'][zone_name]), repr(tz_data_full['proleptic_variable'][zone_name]))
+    self.assertEqual(repr(tz_data_parallel['proleptic_variable']['Antarctica/Test']), repr(tz_data_full['proleptic_variable']['Antarctica/Test']))
+    
+    # names with no Zone line are errors instead of being dropped
+    with tarfile_open(fileobj = BytesIO(_make_tzdb_tgz())) as tgz_file:
+      with self.assertRaisesRegex(ValueError, r'^Zones not found in timezone database: Europe/Busingen \(link to Europe/Berlin\), Nope/Zone$'):
+        parse_tzdb(tgz_file, zones = ['Europe/Berlin', 'Europe/Busingen', 'Nope/Zone'])
+  
+  def test_update_timezone_data_missing_zones(self):
+    timezones_before = {key: dict(zones) for key, zones in TIMEZONES.items()}
+    
+    with TemporaryDirectory() as temp_dir:
+      db_file_path = path_join(temp_dir, 'tzdata.tar.gz')
+      with open(db_file_path, 'wb') as f:
+        f.write(_make_tzdb_tgz())
+      downloaded_time_file_path = path_join(temp_dir, 'tzdb-downloaded-time.txt')
+      with open(downloaded_time_file_path, 'wb') as f:
+        f.write(str(TimeInstant.now().time).encode())
+      
+      with self.assertRaises(ValueError):
+        update_timezone_data(
+          log_downloads = False,
+          update_check_time = None,
+          db_file_path = db_file_path,
+          downloaded_time_file_path = downloaded_time_file_path,
+          zones = ['Nope/Zone']
+        )
+    
+    self.assertEqual({key: dict(zones) for key, zones in TIMEZONES.items()}, timezones_before)
+  
+  @skipUnless(isfile('/usr/share/zoneinfo/leap-seconds.list'), 'system leap second list not available')
+  def test_update_time_databases_async(self):
+    with open('/usr/share/zoneinfo/leap-seconds.list') as f:
+      # push the expiry far out so the stored file is used instead of downloading
+      leap_file_str = re_sub(r'(?m)^#@\s+\d+$', '#@\t99999999999', f.read())
+    
+    timezones_before = {key: dict(zones) for key, zones in TIMEZONES.items()}
+    ut1_offsets_before = TimeInstant.UT1_TAI_OFFSETS[:]
+    
+    with TemporaryDirectory() as temp_dir:
+      def write_file(name: str, contents: bytes) -> str:
+        file_path = path_join(temp_dir, name)
+        with open(file_path, 'wb') as f:
+          f.write(contents)
+        return file_path
+      
+      downloaded_time = str(TimeInstant.now().time).encode()
+      
+      try:
+        with TimeInstant._auto_reset_class_vars():
+          update_kwargs = dict(
+            log_downloads = False,
+            leapsec_file_path = write_file('leap-seconds.list', leap_file_str.encode()),
+            tzdb_update_check_time = None,
+            tzdb_file_path = write_file('tzdata.tar.gz', _make_tzdb_tgz()),
+            tzdb_downloaded_time_file_path = write_file('tzdb-downloaded-time.txt', downloaded_time),
+            ut1_historic_min_redownload_age = None,
+            ut1_historic_downloaded_time_file_path = write_file('historic-downloaded-time.txt', downloaded_time),
+            ut1_historic_data_file_path = write_file('historic.txt', _eop_test_files['historic'].encode()),
+            ut1_recent_min_redownload_age = None,
+            ut1_recent_downloaded_time_file_path = write_file('recent-downloaded-time.txt', downloaded_time),
+            ut1_recent_data_file_path = write_file('recent.txt', _eop_test_files['recent'].encode()),
+            ut1_daily_min_redownload_age = None,
+            ut1_daily_downloaded_time_file_path = write_file('daily-downloaded-time.txt', downloaded_time),
+            ut1_daily_data_file_path = write_file('daily.txt', _eop_test_files['daily'].encode()),
+            ut1_cache_file_path = path_join(temp_dir, 'ut1-offsets-cache.bin')
+          )
+          
+          asyncio_run(update_time_databases_async(**update_kwargs))
+          
+          self.assertEqual(sorted(TIMEZONES['proleptic_variable']), ['America/Chicago', 'America/New_York', 'Antarctica/Test', 'Europe/Berlin'])
+          self.assertIs(TIMEZONES['proleptic_variable']['America/Chicago'], TIMEZONES['proleptic_variable']['Antarctica/Test'])
+          
+          ut1_offsets = parse_ut1_offsets(_eop_test_files['historic'], _eop_test_files['recent'], _eop_test_files['daily'])
+          self.assertEqual(TimeInstant.UT1_TAI_OFFSETS, ut1_offsets)
+          self.assertEqual(TimeInstant.UT1_TAI_OFFSETS[-1].ut1_minus_tai, FixedPrec('-37.22'))
+          self.assertEqual(TimeInstant.TAI_UT1_OFFSETS[-1].tai_minus_ut1, FixedPrec('37.22'))
+          
+          # unchanged files are not parsed again, the cached results are swapped in
+          self.assertEqual(get_cached_tzdb_data_key(), get_tzdb_stored_file_cache_key(update_kwargs['tzdb_file_path']))
+          self.assertNotEqual(get_cached_ut1_offsets(get_ut1_offsets_cache_key(_eop_test_files['historic'], _eop_test_files['recent'], _eop_test_files['daily'])), None)
+          self.assertTrue(isfile(update_kwargs['ut1_cache_file_path']))
+          chicago = TIMEZONES['proleptic_variable']['America/Chicago']
+          asyncio_run(update_time_databases_async(**update_kwargs))
+          self.assertIs(TIMEZONES['proleptic_variable']['America/Chicago'], chicago)
+          self.assertEqual(TimeInstant.UT1_TAI_OFFSETS, ut1_offsets)
+      finally:
+        TIMEZONES.update(timezones_before)
+        TimeInstant.UT1_TAI_OFFSETS[:] = ut1_offsets_before
+        TimeInstant._init_ut1_vars()
+  
+  def test_parse_recent_files(self):
+    # years 2001 to 2009 start with a space, and the last lines of a file have no ut1 value yet
+    ut1_offsets = parse_recent_files(
+      ' 1 1 1 51910.00 I  0.100000 0.000010  0.300000 0.000010  I 0.3000000 0.0000100\n'
+      ' 1 1 2 51911.00 I  0.100000 0.000010  0.300000 0.000010  I-0.2500000 0.0000100\n'
+      ' 1 1 3 51912.00 P  0.100000 0.000010  0.300000 0.000010\n'
+      '\n'
+    )
+    self.assertEqual(
+      ut1_offsets,
+      [
+        (TimeInstant.from_modified_julian_date_utc(FixedPrec(51910)).time, FixedPrec('-31.7')),
+        (TimeInstant.from_modified_julian_date_utc(FixedPrec(51911)).time, FixedPrec('-32.25')),
+      ]
+    )
+    
+    with self.assertRaises(ValueError):
+      parse_recent_files('not a line of the recent file\n')
+  
+  def test_ut1_offsets_cache_file(self):
+    key = get_ut1_offsets_cache_key(_eop_test_files['historic'], _eop_test_files['recent'], _eop_test_files['daily'])
+    ut1_offsets = parse_ut1_offsets(_eop_test_files['historic'], _eop_test_files['recent'], _eop_test_files['daily'])
+    
+    with TemporaryDirectory() as temp_dir:
+      cache_file_path = path_join(temp_dir, 'ut1-offsets-cache.bin')
+      set_cached_ut1_offsets((), [])
+      self.assertEqual(parse_ut1_offsets_cached(_eop_test_files['historic'], _eop_test_files['recent'], _eop_test_files['daily'], cache_file_path), ut1_offsets)
+      
+      with open(cache_file_path, 'rb') as f:
+        cache_bytes = f.read()
+      
+      self.assertEqual(ut1_offsets_from_cache_bytes(key, cache_bytes), ut1_offsets)
+      self.assertEqual([repr(entry) for entry in ut1_offsets_from_cache_bytes(key, cache_bytes)], [repr(entry) for entry in ut1_offsets])
+      self.assertEqual(ut1_offsets_from_cache_bytes(key + ('other',), cache_bytes), None)
+      self.assertEqual(ut1_offsets_from_cache_bytes(key, cache_bytes[:-1]), None)
+      
+      # the file is used instead of parsing when the offsets are not in memory
+      with open(cache_file_path, 'wb') as f:
+        f.write(ut1_offsets_to_cache_bytes(key, ut1_offsets[:1]))
+      set_cached_ut1_offsets((), [])
+      self.assertEqual(parse_ut1_offsets_cached(_eop_test_files['historic'], _eop_test_files['recent'], _eop_test_files['daily'], cache_file_path), ut1_offsets[:1])
+      self.assertEqual(get_cached_ut1_offsets(key), ut1_offsets[:1])
@@ -1,11 +1,38 @@
 from datetime import datetime, timedelta, timezone, UTC
 from math import trunc
+from pickle import dumps as pickle_dumps, loads as pickle_loads
 from time import time_ns, struct_time
 from unittest import TestCase
 
 from ... import FixedPrec, GregorianDate, TimeDelta, TimeZone, TimeInstant, TimeUnmappableError, LeapSmearPlan, LeapSmearSingle, LeapBasis, SmearType
+from ... import TZResolvePolicy, LocalTimeUnit, TimeZoneInitialOffset, TimeZoneLaterOffset
 from ...data_py.leap_seconds import NOMINAL_SECS_PER_DAY
+from ...named_tuples import UT1TAIOffsetEntry
 from ... import TIMEZONES
+from ...time_classes.time_zone import _OffsetMapping
+
+# US central time with the current dst rules (second sunday of march to first sunday of november)
+_central_time_later_offsets = (
+  {
+    'offset_day_mode': TimeZone.OffsetDayMode.MONTH_WEEKDAY_DAY_GE,
+    'month': 3,
+    'day_in_week': 0,
+    'day': 8,
+    'start_time_in_day': FixedPrec(7_200),
+    'utc_offset': FixedPrec(-18_000),
+    'abbreviation': 'CDT',
+  },
+  {
+    'offset_day_mode': TimeZone.OffsetDayMode.MONTH_WEEKDAY_DAY_GE,
+    'month': 11,
+    'day_in_week': 0,
+    'day': 1,
+    'start_time_in_day': FixedPrec(7_200),
+    'utc_offset': FixedPrec(-21_600),
+    'abbreviation': 'CST',
+  },
+)
+_central_time_zone = TimeZone(-21_600, {'utc_offset': -21_600, 'abbreviation': 'CST'}, _central_time_later_offsets)
 
 class TestTimeClasses(TestCase):
   def __init__(self, *args):
@@ -409,6 +436,37 @@ class TestTimeClasses(TestCase):
         instant_before_neg_leap + TimeDelta(FixedPrec('0.2'))
       )
   
+  def test_from_utc_many(self):
+    with TimeInstant._temp_add_leap_sec(27, ('2017-12-31', FixedPrec(NOMINAL_SECS_PER_DAY), FixedPrec(1))):
+      pos_leap_sec_start = TimeInstant.TAI_TO_UTC_OFFSET_TABLE[52]['start_instant']
+      neg_leap_sec_start = TimeInstant.TAI_TO_UTC_OFFSET_TABLE[54]['start_instant']
+      
+      utc_list = [
+        TimeInstant(time).to_secs_since_epoch_utc()[0]
+        for time in (
+          -10 ** 12,
+          0,
+          *(pos_leap_sec_start + FixedPrec(offset) / 10 for offset in range(-5, 25)),
+          *(neg_leap_sec_start + FixedPrec(offset) / 10 for offset in range(-5, 5)),
+          # going backwards
+          pos_leap_sec_start,
+          10 ** 12,
+        )
+      ]
+      utc_list.insert(-2, utc_list[-3] + FixedPrec('0.5'))
+      
+      for second_fold in (False, True):
+        self.assertEqual(
+          TimeInstant.from_secs_since_epoch_utc_many(utc_list, second_fold = second_fold),
+          [TimeInstant.from_secs_since_epoch_utc(utc, second_fold = second_fold) for utc in utc_list]
+        )
+      
+      mjds = [FixedPrec(mjd) / 2 for mjd in range(2 * 57000, 2 * 58200, 7)]
+      self.assertEqual(
+        TimeInstant.from_modified_julian_date_utc_many(mjds, second_fold = True),
+        [TimeInstant.from_modified_julian_date_utc(mjd, second_fold = True) for mjd in mjds]
+      )
+  
   def test_tai_utc_tuple_leap_secs(self):
     with TimeInstant._temp_add_leap_secs(27, [
         ('2017-12-31', FixedPrec(NOMINAL_SECS_PER_DAY), FixedPrec(1)),
@@ -770,7 +828,7 @@ class TestTimeClasses(TestCase):
       TimeInstant(datetime(2024, 4, 19, 13, 1, 1, 500_000, UTC)).to_date_tuple_utc(),
       (2024, 4, 19, 13, 1, 1, FixedPrec('0.5'))
     )
-
+    
     utc_plus_1 = timezone(timedelta(hours = 1))
     
     self.assertEqual(
@@ -827,6 +885,85 @@ class TestTimeClasses(TestCase):
     self.assertEqual(instant.to_date_tuple_tz(tz), (2024, 4, 22, 0, 1, 2, FixedPrec('0.3'), False))
     self.assertEqual(instant, instant_copy)
   
+  def test_timezone_equality(self):
+    def make_tz(abbr):
+      return TimeZone(
+        1 * 3_600,
+        initial_offset = {
+          'utc_offset': 1 * 3_600,
+          'abbreviation': abbr,
+        },
+        later_offsets = (
+          {
+            'offset_day_mode': TimeZone.OffsetDayMode.MONTH_AND_DAY,
+            'month': 4,
+            'day': 15,
+            'start_time_in_day': 5 * 3_600,
+            'utc_offset': 2 * 3_600,
+            'abbreviation': 'Test2',
+          },
+        )
+      )
+    
+    tz1 = make_tz('Test1')
+    tz2 = make_tz('Test1')
+    tz3 = make_tz('Other')
+    
+    self.assertEqual(tz1, tz2)
+    self.assertEqual(hash(tz1), hash(tz2))
+    self.assertNotEqual(tz1, tz3)
+    self.assertNotEqual(tz1, TimeZone(1 * 3_600))
+    self.assertNotEqual(tz1, None)
+    self.assertEqual(TimeZone(3_600), TimeZone(FixedPrec(3_600)))
+    self.assertEqual(pickle_loads(pickle_dumps(tz1)), tz1)
+    
+    # the hash is recomputed when unpickling, as a hash from another process would not match
+    self.assertNotIn('_hash', tz1.__getstate__())
+    tz1_copy = TimeZone.__new__(TimeZone)
+    tz1_copy.__setstate__(tz1.__getstate__())
+    self.assertEqual(hash(tz1_copy), hash(tz1.to_hashable_tuple()))
+    self.assertEqual(hash(pickle_loads(pickle_dumps(tz1))), hash(tz1))
+    self.assertEqual(len({pickle_loads(pickle_dumps(tz1)), tz2}), 1)
+    
+    self.assertIs(TimeZone.intern(tz1), tz1)
+    self.assertIs(TimeZone.intern(tz2), tz1)
+    self.assertIs(TimeZone.intern(tz3), tz3)
+  
+  def test_timezone_offset_rules(self):
+    offset_dicts = tuple({**offset_dict, 'name': None} for offset_dict in _central_time_later_offsets)
+    tz = _central_time_zone
+    
+    self.assertIsInstance(tz.initial_offset, TimeZoneInitialOffset)
+    self.assertEqual(tz.initial_offset.utc_offset, FixedPrec(-21_600))
+    self.assertEqual(tz.initial_offset, {'utc_offset': FixedPrec(-21_600), 'abbreviation': 'CST', 'name': None})
+    
+    for offset_entry, offset_dict in zip(tz.later_offsets, offset_dicts):
+      self.assertIsInstance(offset_entry, TimeZoneLaterOffset)
+      self.assertEqual(offset_entry, offset_dict)
+      self.assertEqual(offset_entry.to_dict(), offset_dict)
+      self.assertEqual(list(offset_entry), list(offset_dict))
+      self.assertEqual(offset_entry.get('week'), offset_dict.get('week'))
+      with self.assertRaises(KeyError):
+        offset_entry['not_a_key']
+      with self.assertRaises(AttributeError):
+        offset_entry.month = 1
+      for year in range(2020, 2030):
+        self.assertEqual(offset_entry.realize(year), TimeZone.realize_offset_entry(year, offset_dict))
+    
+    self.assertEqual(TimeZone(-21_600, tz.initial_offset, tz.later_offsets), tz)
+    self.assertEqual(tz.later_offsets[0].realize(2024), GregorianDate(2024, 3, 10))
+    self.assertEqual(tz.later_offsets[1].realize(2024), GregorianDate(2024, 11, 3))
+    
+    # the dict view needs the keys of a rule class
+    with self.assertRaises(TypeError):
+      _OffsetMapping()
+    
+    offset_days = tz.get_offset_days_for_years(1900, 2200)
+    self.assertEqual(len(offset_days), 300)
+    for year, year_offset_days in zip(range(1900, 2200), offset_days):
+      self.assertEqual(year_offset_days, tuple(TimeZone.realize_offset_entry(year, offset_dict).days_since_epoch for offset_dict in offset_dicts))
+    self.assertEqual(TimeZone(0).get_offset_days_for_years(2000, 2002), [(), ()])
+  
   def test_timezone_variable(self):
     tz = TimeZone(
       1 * 3_600,
@@ -1044,6 +1181,245 @@ class TestTimeClasses(TestCase):
       test('1.1', (2018, 1,  1,  0,  0,  1,  '0'  ), (2018, 1, 1, 1, 0,  1,  '0'  , False), '3600', 'Test1')
       test('1.2', (2018, 1,  1,  0,  0,  1,  '0.1'), (2018, 1, 1, 1, 0,  1,  '0.1', False), '3600', 'Test1')
   
+  def test_timezone_many(self):
+    tz = _central_time_zone
+    
+    # every 20 minutes across both dst transitions and a year boundary
+    start_instant = TimeInstant.from_date_tuple_utc(2023, 10, 1, 0, 0, 0, 0)
+    instants = [start_instant + TimeDelta(FixedPrec(i * 1_200)) for i in range(0, 40_000, 13)]
+    instants_unsorted = instants[::-3] + instants[1::3] + instants[2::3]
+    
+    for instant_list in (instants, instants_unsorted):
+      self.assertEqual(TimeInstant.to_secs_since_epoch_tz_many(instant_list, tz), [instant.to_secs_since_epoch_tz(tz) for instant in instant_list])
+      date_tuples = TimeInstant.to_date_tuple_tz_many(instant_list, tz)
+      self.assertEqual(date_tuples, [instant.to_date_tuple_tz(tz) for instant in instant_list])
+      self.assertEqual(TimeInstant.from_date_tuple_tz_many(tz, date_tuples), instant_list)
+    
+    # runs across the leap second at the end of 2016, and a negative one
+    leap_instant = TimeInstant.from_date_tuple_utc(2016, 12, 31, 23, 59, 58, 0)
+    leap_instants = [leap_instant + TimeDelta(FixedPrec(i) / 4) for i in range(20)]
+    self.assertEqual(TimeInstant.to_secs_since_epoch_tz_many(leap_instants, tz), [instant.to_secs_since_epoch_tz(tz) for instant in leap_instants])
+    with TimeInstant._temp_add_leap_sec(27, ('2017-12-31', FixedPrec(NOMINAL_SECS_PER_DAY - 1), FixedPrec(1))):
+      leap_instant = TimeInstant.from_date_tuple_utc(2017, 12, 31, 23, 59, 57, 0)
+      leap_instants = [leap_instant + TimeDelta(FixedPrec(i) / 4) for i in range(20)]
+      self.assertEqual(TimeInstant.to_secs_since_epoch_tz_many(leap_instants, tz), [instant.to_secs_since_epoch_tz(tz) for instant in leap_instants])
+    
+    gap_tuples = [(2024, 3, 10, 2, 30, 0, 0), (2024, 3, 10, 3, 30, 0, 0), (2024, 11, 3, 1, 30, 0, 0)]
+    for dst_second_fold in (False, True):
+      self.assertEqual(
+        TimeInstant.from_date_tuple_tz_many(tz, gap_tuples, dst_second_fold = dst_second_fold),
+        [TimeInstant.from_date_tuple_tz(tz, *date_tuple, dst_second_fold = dst_second_fold) for date_tuple in gap_tuples]
+      )
+    
+    with self.assertRaises(TimeUnmappableError):
+      TimeInstant.from_date_tuple_tz_many(tz, gap_tuples, round_invalid_dst_time_upwards = False)
+    
+    # 2024-03-10 02:30 is in a gap, 2024-11-03 01:30 is in a fold
+    tz_secs = [TimeInstant.date_tuple_to_epoch_instant(*date_tuple) for date_tuple in gap_tuples]
+    
+    def utc(*date_tuple):
+      return TimeInstant.from_date_tuple_utc(*date_tuple, 0)
+    
+    # EARLIEST and LATEST give the earlier or later instant in both the gap and the fold, the OFFSET_ policies use the offset
+    # before (02:30 CST, 01:30 CDT) or after (02:30 CDT, 01:30 CST) the transition like fold=0 and fold=1 in PEP 495
+    for policy, gap_instant, fold_instant in (
+      (TZResolvePolicy.EARLIEST, utc(2024, 3, 10, 7, 30, 0), utc(2024, 11, 3, 6, 30, 0)),
+      (TZResolvePolicy.LATEST, utc(2024, 3, 10, 8, 30, 0), utc(2024, 11, 3, 7, 30, 0)),
+      (TZResolvePolicy.OFFSET_BEFORE, utc(2024, 3, 10, 8, 30, 0), utc(2024, 11, 3, 6, 30, 0)),
+      (TZResolvePolicy.OFFSET_AFTER, utc(2024, 3, 10, 7, 30, 0), utc(2024, 11, 3, 7, 30, 0)),
+    ):
+      result = TimeInstant.from_secs_since_epoch_tz_many(tz, tz_secs, ambiguous_policy = policy, nonexistent_policy = policy)
+      self.assertEqual(result.instants, [gap_instant, utc(2024, 3, 10, 8, 30, 0), fold_instant])
+      self.assertEqual(result.ambiguous, [False, False, True])
+      self.assertEqual(result.nonexistent, [True, False, False])
+    
+    self.assertEqual(TimeInstant.from_secs_since_epoch_tz_many(tz, tz_secs).instants, [utc(2024, 3, 10, 7, 30, 0), utc(2024, 3, 10, 8, 30, 0), utc(2024, 11, 3, 6, 30, 0)])
+    self.assertEqual(utc(2024, 3, 10, 7, 30, 0).to_date_tuple_tz(tz)[:6], (2024, 3, 10, 1, 30, 0))
+    self.assertEqual(utc(2024, 3, 10, 8, 30, 0).to_date_tuple_tz(tz)[:6], (2024, 3, 10, 3, 30, 0))
+    
+    result = TimeInstant.from_secs_since_epoch_tz_many(tz, tz_secs, ambiguous_policy = TZResolvePolicy.NONE, nonexistent_policy = TZResolvePolicy.NONE)
+    self.assertEqual(result.instants, [None, utc(2024, 3, 10, 8, 30, 0), None])
+    
+    with self.assertRaises(TimeUnmappableError):
+      TimeInstant.from_secs_since_epoch_tz_many(tz, tz_secs, nonexistent_policy = TZResolvePolicy.RAISE)
+    with self.assertRaises(TimeUnmappableError):
+      TimeInstant.from_secs_since_epoch_tz_many(tz, tz_secs, ambiguous_policy = TZResolvePolicy.RAISE)
+    
+    tz_secs = [instant.to_secs_since_epoch_tz(tz)[0] for instant in instants]
+    self.assertEqual(
+      TimeInstant.from_secs_since_epoch_tz_many(tz, tz_secs).instants,
+      [TimeInstant.from_secs_since_epoch_tz(tz, secs) for secs in tz_secs]
+    )
+  
+  def test_timezone_transitions(self):
+    tz = TimeZone(
+      10 * 3_600,
+      initial_offset = {
+        'utc_offset': 11 * 3_600,
+        'abbreviation': 'AEDT',
+      },
+      later_offsets = (
+        {
+          'offset_day_mode': TimeZone.OffsetDayMode.MONTH_WEEK_DAY,
+          'month': 4,
+          'week': 1,
+          'day_in_week': 0,
+          'from_month_end': False,
+          'start_time_in_day': 3 * 3_600,
+          'utc_offset': 10 * 3_600,
+          'abbreviation': 'AEST',
+        },
+        {
+          'offset_day_mode': TimeZone.OffsetDayMode.MONTH_WEEK_DAY,
+          'month': 10,
+          'week': 1,
+          'day_in_week': 0,
+          'from_month_end': False,
+          'start_time_in_day': 2 * 3_600,
+          'utc_offset': 11 * 3_600,
+          'abbreviation': 'AEDT',
+        },
+      )
+    )
+    
+    def utc(*date_tuple):
+      return TimeInstant.from_date_tuple_utc(*date_tuple, 0)
+    
+    self.assertEqual(
+      list(tz.transitions(utc(2024, 1, 1, 0, 0, 0), utc(2025, 4, 5, 16, 0, 0))),
+      [
+        (utc(2024, 4, 6, 16, 0, 0), FixedPrec(36_000), 'AEST', False),
+        (utc(2024, 10, 5, 16, 0, 0), FixedPrec(39_600), 'AEDT', True),
+      ]
+    )
+    
+    # start is inclusive, end is exclusive, and with no end it keeps going
+    transitions = tz.transitions(utc(2024, 4, 6, 16, 0, 0))
+    self.assertEqual(next(transitions).instant, utc(2024, 4, 6, 16, 0, 0))
+    self.assertEqual(next(transitions).instant, utc(2024, 10, 5, 16, 0, 0))
+    self.assertEqual(next(transitions).instant, utc(2025, 4, 5, 16, 0, 0))
+    self.assertEqual(list(TimeZone(3_600).transitions(utc(2024, 1, 1, 0, 0, 0))), [])
+    
+    start = utc(2020, 2, 1, 0, 0, 0)
+    end = utc(2030, 2, 1, 0, 0, 0)
+    intervals = list(tz.offset_intervals(start, end))
+    self.assertEqual(len(intervals), 21)
+    self.assertEqual(intervals[0].start, start)
+    self.assertEqual(intervals[-1].end, end)
+    for interval, next_interval in zip(intervals, intervals[1:]):
+      self.assertEqual(interval.end, next_interval.start)
+    for interval in intervals:
+      self.assertEqual(interval.start.get_current_tz_offset(tz), (interval.utc_offset, interval.abbreviation))
+      self.assertEqual((interval.end - TimeDelta(1)).get_current_tz_offset(tz), (interval.utc_offset, interval.abbreviation))
+      self.assertEqual(interval.is_dst, interval.abbreviation == 'AEDT')
+    
+    self.assertEqual(list(TimeZone(3_600).offset_intervals(start, end)), [(start, end, FixedPrec(3_600), None, False)])
+  
+  def test_timezone_local_arithmetic(self):
+    tz = _central_time_zone
+    
+    def utc(*date_tuple):
+      return TimeInstant.from_date_tuple_utc(*date_tuple, 0)
+    
+    # calendar units keep the local time of day, other units are elapsed time
+    self.assertEqual(utc(2024, 3, 9, 18, 0, 0).add_local(tz, days = 1), utc(2024, 3, 10, 17, 0, 0))
+    self.assertEqual(utc(2024, 3, 9, 18, 0, 0).add_local(tz, hours = 24), utc(2024, 3, 10, 18, 0, 0))
+    self.assertEqual(utc(2024, 3, 9, 18, 0, 0).add_local(tz, days = 1, hours = 1, minutes = 1, seconds = 1), utc(2024, 3, 10, 18, 1, 1))
+    self.assertEqual(utc(2024, 1, 31, 18, 0, 0).add_local(tz, months = 1), utc(2024, 2, 29, 18, 0, 0))
+    self.assertEqual(utc(2024, 2, 29, 18, 0, 0).add_local(tz, years = 1), utc(2025, 2, 28, 18, 0, 0))
+    self.assertEqual(utc(2024, 11, 30, 18, 0, 0).add_local(tz, months = -8), utc(2024, 3, 30, 17, 0, 0))
+    self.assertEqual(utc(2024, 11, 30, 18, 0, 0).add_local(tz, months = 14), utc(2026, 1, 30, 18, 0, 0))
+    
+    # 2024-03-10 02:30 is in a gap, 2024-11-03 01:30 is in a fold
+    self.assertEqual(utc(2024, 3, 9, 8, 30, 0).add_local(tz, days = 1), utc(2024, 3, 10, 7, 30, 0))
+    self.assertEqual(utc(2024, 3, 9, 8, 30, 0).add_local(tz, days = 1, nonexistent_policy = TZResolvePolicy.LATEST), utc(2024, 3, 10, 8, 30, 0))
+    self.assertEqual(utc(2024, 3, 9, 8, 30, 0).add_local(tz, days = 1, nonexistent_policy = TZResolvePolicy.OFFSET_BEFORE), utc(2024, 3, 10, 8, 30, 0))
+    self.assertEqual(utc(2024, 3, 9, 8, 30, 0).add_local(tz, days = 1, nonexistent_policy = TZResolvePolicy.OFFSET_AFTER), utc(2024, 3, 10, 7, 30, 0))
+    self.assertEqual(utc(2024, 3, 9, 8, 30, 0).add_local(tz, days = 1, nonexistent_policy = TZResolvePolicy.NONE), None)
+    with self.assertRaises(TimeUnmappableError):
+      utc(2024, 3, 9, 8, 30, 0).add_local(tz, days = 1, nonexistent_policy = TZResolvePolicy.RAISE)
+    self.assertEqual(utc(2024, 11, 2, 6, 30, 0).add_local(tz, days = 1), utc(2024, 11, 3, 6, 30, 0))
+    self.assertEqual(utc(2024, 11, 2, 6, 30, 0).add_local(tz, days = 1, ambiguous_policy = TZResolvePolicy.LATEST), utc(2024, 11, 3, 7, 30, 0))
+    self.assertEqual(utc(2024, 11, 2, 6, 30, 0).add_local(tz, days = 1, ambiguous_policy = TZResolvePolicy.NONE), None)
+    
+    # local 2024-03-13 12:00 CDT, a wednesday
+    instant = utc(2024, 3, 13, 17, 0, 0)
+    self.assertEqual(instant.floor_local(tz, LocalTimeUnit.YEAR), utc(2024, 1, 1, 6, 0, 0))
+    self.assertEqual(instant.ceil_local(tz, LocalTimeUnit.YEAR), utc(2025, 1, 1, 6, 0, 0))
+    self.assertEqual(instant.floor_local(tz, LocalTimeUnit.MONTH), utc(2024, 3, 1, 6, 0, 0))
+    self.assertEqual(instant.ceil_local(tz, LocalTimeUnit.MONTH), utc(2024, 4, 1, 5, 0, 0))
+    self.assertEqual(instant.floor_local(tz, LocalTimeUnit.WEEK), utc(2024, 3, 10, 6, 0, 0))
+    self.assertEqual(instant.floor_local(tz, LocalTimeUnit.WEEK, week_start_day = 1), utc(2024, 3, 11, 5, 0, 0))
+    self.assertEqual(instant.ceil_local(tz, LocalTimeUnit.WEEK), utc(2024, 3, 17, 5, 0, 0))
+    self.assertEqual(instant.floor_local(tz, LocalTimeUnit.DAY), utc(2024, 3, 13, 5, 0, 0))
+    self.assertEqual(instant.ceil_local(tz, LocalTimeUnit.DAY), utc(2024, 3, 14, 5, 0, 0))
+    self.assertEqual(instant.floor_local(tz, LocalTimeUnit.HOUR), instant)
+    self.assertEqual(instant.ceil_local(tz, LocalTimeUnit.HOUR), instant)
+    
+    instant = TimeInstant.from_date_tuple_utc(2024, 3, 13, 17, 1, 2, FixedPrec('0.5'))
+    self.assertEqual(instant.floor_local(tz, LocalTimeUnit.MINUTE), utc(2024, 3, 13, 17, 1, 0))
+    self.assertEqual(instant.ceil_local(tz, LocalTimeUnit.MINUTE), utc(2024, 3, 13, 17, 2, 0))
+    self.assertEqual(instant.floor_local(tz, LocalTimeUnit.SECOND), utc(2024, 3, 13, 17, 1, 2))
+    self.assertEqual(instant.ceil_local(tz, LocalTimeUnit.SECOND), utc(2024, 3, 13, 17, 1, 3))
+    
+    # the local day of the spring forward is 23 hours long, the rounded times stay on the same pass through a fold
+    self.assertEqual(utc(2024, 3, 10, 17, 0, 0).floor_local(tz, LocalTimeUnit.DAY), utc(2024, 3, 10, 6, 0, 0))
+    self.assertEqual(utc(2024, 3, 10, 17, 0, 0).ceil_local(tz, LocalTimeUnit.DAY), utc(2024, 3, 11, 5, 0, 0))
+    self.assertEqual(utc(2024, 11, 3, 6, 30, 0).floor_local(tz, LocalTimeUnit.HOUR), utc(2024, 11, 3, 6, 0, 0))
+    self.assertEqual(utc(2024, 11, 3, 7, 30, 0).floor_local(tz, LocalTimeUnit.HOUR), utc(2024, 11, 3, 7, 0, 0))
+    self.assertEqual(utc(2024, 11, 3, 7, 30, 0).ceil_local(tz, LocalTimeUnit.HOUR), utc(2024, 11, 3, 8, 0, 0))
+    
+    instants = [utc(2024, 1, 1, 0, 0, 0) + TimeDelta(FixedPrec(i * 11_111)) for i in range(0, 4_000, 31)]
+    for unit in LocalTimeUnit:
+      floors = TimeInstant.floor_local_many(instants, tz, unit)
+      ceils = TimeInstant.ceil_local_many(instants, tz, unit)
+      self.assertEqual(floors, [instant.floor_local(tz, unit) for instant in instants])
+      self.assertEqual(ceils, [instant.ceil_local(tz, unit) for instant in instants])
+      for instant, floor_instant, ceil_instant in zip(instants, floors, ceils):
+        self.assertTrue(floor_instant <= instant <= ceil_instant)
+    self.assertEqual(
+      TimeInstant.add_local_many(instants, tz, months = 1, hours = 1),
+      [instant.add_local(tz, months = 1, hours = 1) for instant in instants]
+    )
+  
+  def test_timezone_local_arithmetic_leap_second(self):
+    def utc(*date_tuple):
+      return TimeInstant.from_date_tuple_utc(*date_tuple, 0)
+    
+    tz = TimeZone(0)
+    # 2016-12-31 23:59:60.5
+    instant = TimeInstant.from_date_tuple_utc(2016, 12, 31, 23, 59, 60, FixedPrec('0.5'))
+    leap_start = utc(2016, 12, 31, 23, 59, 60)
+    next_day = utc(2017, 1, 1, 0, 0, 0)
+    
+    self.assertEqual(instant.floor_local(tz, LocalTimeUnit.YEAR), utc(2016, 1, 1, 0, 0, 0))
+    self.assertEqual(instant.floor_local(tz, LocalTimeUnit.MONTH), utc(2016, 12, 1, 0, 0, 0))
+    self.assertEqual(instant.floor_local(tz, LocalTimeUnit.DAY), utc(2016, 12, 31, 0, 0, 0))
+    self.assertEqual(instant.floor_local(tz, LocalTimeUnit.HOUR), utc(2016, 12, 31, 23, 0, 0))
+    self.assertEqual(instant.floor_local(tz, LocalTimeUnit.MINUTE), utc(2016, 12, 31, 23, 59, 0))
+    self.assertEqual(instant.floor_local(tz, LocalTimeUnit.SECOND), leap_start)
+    self.assertEqual(leap_start.floor_local(tz, LocalTimeUnit.SECOND), leap_start)
+    self.assertEqual(TimeInstant.from_date_tuple_utc(2017, 1, 1, 0, 0, 0, FixedPrec('0.5')).floor_local(tz, LocalTimeUnit.DAY), next_day)
+    for unit in LocalTimeUnit:
+      self.assertEqual(instant.ceil_local(tz, unit), next_day)
+    
+    # the leap second is clamped to the second before it, and a wall clock result is never the leap second
+    self.assertEqual(instant.add_local(tz, days = 1), TimeInstant.from_date_tuple_utc(2017, 1, 1, 23, 59, 59, FixedPrec('0.5')))
+    self.assertEqual(instant.add_local(tz, months = -1), TimeInstant.from_date_tuple_utc(2016, 11, 30, 23, 59, 59, FixedPrec('0.5')))
+    self.assertEqual(utc(2016, 12, 30, 0, 0, 0).add_local(tz, days = 2), next_day)
+    
+    # the leap second is at 00:59:60 local
+    tz = TimeZone(3_600)
+    self.assertEqual(instant.floor_local(tz, LocalTimeUnit.DAY), utc(2016, 12, 31, 23, 0, 0))
+    self.assertEqual(instant.floor_local(tz, LocalTimeUnit.HOUR), utc(2016, 12, 31, 23, 0, 0))
+    self.assertEqual(instant.ceil_local(tz, LocalTimeUnit.DAY), utc(2017, 1, 1, 23, 0, 0))
+    self.assertEqual(instant.ceil_local(tz, LocalTimeUnit.MINUTE), next_day)
+    self.assertEqual(instant.add_local(tz, days = 1), TimeInstant.from_date_tuple_utc(2017, 1, 1, 23, 59, 59, FixedPrec('0.5')))
+    self.assertEqual(
+      TimeInstant.floor_local_many([instant, next_day], tz, LocalTimeUnit.MINUTE),
+      [utc(2016, 12, 31, 23, 59, 0), next_day]
+    )
+  
   def test_struct_time(self):
     def struct_time_equals(struct1, struct2):
       self.assertEqual(struct1, struct2)
@@ -1268,6 +1644,86 @@ class TestTimeClasses(TestCase):
       (1977, 1, 1, 0, 0, 33, FixedPrec('0.186'))
     )
   
+  def test_monotonic_time_scale_tdb_cycle(self):
+    for time_scale in (TimeInstant.TIME_SCALES.TDB, TimeInstant.TIME_SCALES.TCB):
+      for year in range(1800, 2200, 37):
+        instant = TimeInstant.from_date_tuple_tai(year, 3, 4, 5, 6, 7, FixedPrec('0.125'))
+        from_mono_secs = TimeInstant.from_secs_since_epoch_mono(time_scale, instant.to_secs_since_epoch_mono(time_scale))
+        self.assertAlmostEqual(instant.time, from_mono_secs.time, 11)
+    
+    for time_scale in (TimeInstant.TIME_SCALES.GALACTIC_COORDINATE_TIME, TimeInstant.TIME_SCALES.UNIVERSE_COORDINATE_TIME):
+      for instant in (TimeInstant(FixedPrec(10 ** 20, max_prec = 19)), TimeInstant(FixedPrec(-10 ** 20, max_prec = 19))):
+        from_mono_secs = TimeInstant.from_secs_since_epoch_mono(time_scale, instant.to_secs_since_epoch_mono(time_scale))
+        self.assertAlmostEqual(instant.time, from_mono_secs.time, delta = abs(instant.time) / 10 ** 18)
+  
+  def test_tdb_rate(self):
+    for year in (1900, 1977, 2000, 2024, 2100):
+      time = TimeInstant.from_date_tuple_tai(year, 7, 1, 0, 0, 0, 0).time
+      step = 10 ** 6
+      numerical_rate = (
+        TimeInstant(time + step).to_secs_since_epoch_mono(TimeInstant.TIME_SCALES.TDB) -
+        TimeInstant(time - step).to_secs_since_epoch_mono(TimeInstant.TIME_SCALES.TDB)
+      ) / (2 * step)
+      self.assertAlmostEqual(TimeInstant._get_tdb_rate(TimeInstant._get_tdb_g(time)), numerical_rate, 11)
+  
+  def test_convert_secs(self):
+    time_scales = list(TimeInstant.TIME_SCALES)
+    
+    for tai_tuple in ((1800, 1, 1, 0, 0, 0, 0), (1977, 1, 1, 0, 0, 0, 0), (2024, 5, 6, 7, 8, 9, FixedPrec('0.5'))):
+      instant = TimeInstant.from_date_tuple_tai(*tai_tuple)
+      for from_scale in time_scales:
+        from_secs = instant.to_secs_since_epoch_mono(from_scale)
+        for to_scale in time_scales:
+          self.assertAlmostEqual(
+            TimeInstant.convert_secs(from_scale, to_scale, from_secs),
+            instant.to_secs_since_epoch_mono(to_scale),
+            8,
+            f'{from_scale} {to_scale}'
+          )
+    
+    self.assertEqual(TimeInstant.convert_secs(TimeInstant.TIME_SCALES.TT, TimeInstant.TIME_SCALES.TAI, FixedPrec('100.184')), 68)
+    self.assertEqual(TimeInstant.convert_secs(TimeInstant.TIME_SCALES.TAI, TimeInstant.TIME_SCALES.TCG, TimeInstant.TT_EPOCH), TimeInstant.TT_EPOCH + TimeInstant.TT_OFFSET_FROM_TAI)
+    
+    secs_list = [TimeInstant.from_date_tuple_tai(2024, 1, day, 0, 0, 0, 0).time for day in range(1, 6)]
+    for from_scale, to_scale in (
+        (TimeInstant.TIME_SCALES.TT, TimeInstant.TIME_SCALES.TCG),
+        (TimeInstant.TIME_SCALES.GALACTIC_COORDINATE_TIME, TimeInstant.TIME_SCALES.UNIVERSE_COORDINATE_TIME),
+        (TimeInstant.TIME_SCALES.TDB, TimeInstant.TIME_SCALES.TT),
+      ):
+      self.assertEqual(
+        TimeInstant.convert_secs_many(from_scale, to_scale, secs_list),
+        [TimeInstant.convert_secs(from_scale, to_scale, secs) for secs in secs_list]
+      )
+  
+  def test_periodic_term_tables(self):
+    instants = [TimeInstant.from_date_tuple_tai(year, month, 9, 10, 11, 12, 0) for year in (1850, 1977, 2000, 2024, 2150) for month in (1, 4, 7, 10)]
+    exact = [
+      (instant.to_secs_since_epoch_mono(TimeInstant.TIME_SCALES.TDB), instant.to_secs_since_epoch_mono(TimeInstant.TIME_SCALES.TCB), instant.to_secs_since_epoch_solar(30, True))
+      for instant in instants
+    ]
+    
+    try:
+      TimeInstant.use_tdb_table()
+      TimeInstant.use_equation_of_time_table()
+      self.assertLess(TimeInstant.TDB_MINUS_TT_TABLE.max_error, 1e-11)
+      self.assertLess(TimeInstant.EQUATION_OF_TIME_TABLE.max_error, 1e-8)
+      
+      for instant, (tdb, tcb, true_solar) in zip(instants, exact):
+        self.assertAlmostEqual(instant.to_secs_since_epoch_mono(TimeInstant.TIME_SCALES.TDB), tdb, 11)
+        self.assertAlmostEqual(instant.to_secs_since_epoch_mono(TimeInstant.TIME_SCALES.TCB), tcb, 11)
+        self.assertAlmostEqual(instant.to_secs_since_epoch_solar(30, True), true_solar, 8)
+        self.assertAlmostEqual(TimeInstant.from_secs_since_epoch_mono(TimeInstant.TIME_SCALES.TDB, tdb).time, instant.time, 11)
+        self.assertAlmostEqual(TimeInstant.from_secs_since_epoch_solar(30, True, true_solar).time, instant.time, 8)
+      
+      # just before the end of the table range, where the time as a float rounds to the end
+      instant = TimeInstant.from_secs_since_epoch_mono(TimeInstant.TIME_SCALES.UT1, 2000 * TimeInstant.UT1_SECS_PER_TROPICAL_YEAR - FixedPrec('0.000000001'))
+      self.assertAlmostEqual(instant.to_secs_since_epoch_solar(0, True), instant.to_secs_since_epoch_solar(0, False) + TimeInstant._get_equation_of_time_exact(TimeInstant.UT1_SECS_PER_TROPICAL_YEAR), 8)
+    finally:
+      TimeInstant.use_tdb_table(False)
+      TimeInstant.use_equation_of_time_table(False)
+    
+    self.assertEqual(instants[0].to_secs_since_epoch_mono(TimeInstant.TIME_SCALES.TDB), exact[0][0])
+  
   def test_monotonic_time_scale_gal_and_uni(self):
     def test_approx(time_scale, tai_tuple, ts_tuple_start, ts_tuple_end):
       tcg_start = TimeInstant.from_date_tuple_mono(TimeInstant.TIME_SCALES.TCG, *ts_tuple_start).to_secs_since_epoch_mono(TimeInstant.TIME_SCALES.TCG)
@@ -1322,6 +1778,45 @@ class TestTimeClasses(TestCase):
     future = TimeInstant.now().time + 2 * 365 * 86400
     test(future, future + TimeInstant.UT1_TAI_OFFSETS[-1].ut1_minus_tai)
   
+  def test_monotonic_time_scale_ut1_many(self):
+    future = TimeInstant.now().time + 2 * 365 * 86400
+    
+    # starts mid-table, jumps far forward, steps, goes backwards, and leaves the table at both ends
+    tai_list = [63643060836, 63643060837, 63643104036, future, 63643017636, 63643017636 + 86400, 0, 63643060836]
+    self.assertEqual(
+      TimeInstant.to_secs_since_epoch_mono_many([TimeInstant(tai) for tai in tai_list], TimeInstant.TIME_SCALES.UT1),
+      [TimeInstant(tai).to_secs_since_epoch_mono(TimeInstant.TIME_SCALES.UT1) for tai in tai_list]
+    )
+  
+  def test_monotonic_time_scale_ut1_table(self):
+    ut1_offsets_before = TimeInstant.UT1_TAI_OFFSETS[:]
+    
+    try:
+      TimeInstant.UT1_TAI_OFFSETS[:] = [
+        UT1TAIOffsetEntry(FixedPrec(1000), FixedPrec('-10.5')),
+        UT1TAIOffsetEntry(FixedPrec(2000), FixedPrec('-10.6')),
+        UT1TAIOffsetEntry(FixedPrec(5000), FixedPrec('-10.3')),
+      ]
+      TimeInstant._init_ut1_vars()
+      
+      tai_list = [0, 1000, 1500, FixedPrec('1999.5'), 2000, 3000, 5000, 9000, 1200]
+      ut1_list = [FixedPrec('-10.5'), FixedPrec('989.5'), FixedPrec('1489.45'), FixedPrec('1988.90005'), FixedPrec('1989.4'), FixedPrec('2989.5'), FixedPrec('4989.7'), FixedPrec('8989.7'), FixedPrec('1189.48')]
+      
+      self.assertEqual([TimeInstant(tai).to_secs_since_epoch_mono(TimeInstant.TIME_SCALES.UT1) for tai in tai_list], ut1_list)
+      self.assertEqual(TimeInstant.to_secs_since_epoch_mono_many([TimeInstant(tai) for tai in tai_list], TimeInstant.TIME_SCALES.UT1), ut1_list)
+      self.assertEqual([TimeInstant.from_secs_since_epoch_mono(TimeInstant.TIME_SCALES.UT1, ut1).time for ut1 in ut1_list], tai_list)
+      self.assertEqual([instant.time for instant in TimeInstant.from_secs_since_epoch_mono_many(TimeInstant.TIME_SCALES.UT1, ut1_list)], tai_list)
+      
+      TimeInstant.UT1_TAI_OFFSETS[:] = []
+      TimeInstant._init_ut1_vars()
+      with self.assertRaises(ValueError):
+        TimeInstant(0).to_secs_since_epoch_mono(TimeInstant.TIME_SCALES.UT1)
+      with self.assertRaises(ValueError):
+        TimeInstant.from_secs_since_epoch_mono_many(TimeInstant.TIME_SCALES.UT1, [0])
+    finally:
+      TimeInstant.UT1_TAI_OFFSETS[:] = ut1_offsets_before
+      TimeInstant._init_ut1_vars()
+  
   def test_solar_time_scales(self):
     longitude = 15
     
@@ -1333,6 +1828,32 @@ class TestTimeClasses(TestCase):
     D = FixedPrec('6.24004077')
     test(0, 3600 + (FixedPrec('-7.659') * D.sin() + FixedPrec('9.863') * (2 * D + FixedPrec('3.5932')).sin()) * 60, True)
   
+  def test_solar_time_scales_many(self):
+    instants = [TimeInstant.from_date_tuple_utc(2000 + i, i % 12 + 1, 5, 3, 4, 5, FixedPrec('0.25')) for i in range(0, 24, 6)]
+    longitudes = [0, 30, FixedPrec('-73.5'), 180]
+    
+    for true_solar in (False, True):
+      solar_secs = TimeInstant.to_secs_since_epoch_solar_many(instants, 30, true_solar)
+      self.assertEqual(solar_secs, [instant.to_secs_since_epoch_solar(30, true_solar) for instant in instants])
+      self.assertEqual(
+        TimeInstant.to_secs_since_epoch_solar_many(instants, longitudes, true_solar),
+        [instant.to_secs_since_epoch_solar(longitude, true_solar) for instant, longitude in zip(instants, longitudes)]
+      )
+      self.assertEqual(
+        instants[0].to_secs_since_epoch_solar_longitudes(longitudes, true_solar),
+        [instants[0].to_secs_since_epoch_solar(longitude, true_solar) for longitude in longitudes]
+      )
+      
+      self.assertEqual(
+        TimeInstant.from_secs_since_epoch_solar_many(30, true_solar, solar_secs),
+        [TimeInstant.from_secs_since_epoch_solar(30, true_solar, secs) for secs in solar_secs]
+      )
+      for instant, round_trip in zip(instants, TimeInstant.from_secs_since_epoch_solar_many(30, true_solar, solar_secs)):
+        self.assertAlmostEqual(round_trip.time, instant.time, 11)
+    
+    with self.assertRaises(ValueError):
+      TimeInstant.to_secs_since_epoch_solar_many(instants, longitudes[:2], False)
+  
   def test_fixedprec_offset_to_str(self):
     def test(offset, offset_no_colon, offset_colon, offset_prec_min, offset_prec_min_colon, offset_prec_0, offset_prec_1, offset_prec_2):
       offset = FixedPrec(offset)
@@ -1435,6 +1956,35 @@ class TestTimeClasses(TestCase):
       'U:15 W:16'
     )
   
+  def test_to_format_string_tz_many(self):
+    tz = _central_time_zone
+    format_str = '%a %d %b %Y %j %U %W %G-W%V-%u %H:%M:%S.%.3f %z %Z'
+    
+    # across both dst transitions, midnights and a positive leap second
+    instants = []
+    for start_instant in (
+        TimeInstant.from_date_tuple_utc(2024, 3, 9, 0, 0, 0, 0),
+        TimeInstant.from_date_tuple_utc(2024, 11, 2, 0, 0, 0, 0),
+      ):
+      instants += [start_instant + TimeDelta(FixedPrec(i * 1_789)) for i in range(150)]
+    leap_start = TimeInstant.from_date_tuple_utc(2016, 12, 31, 23, 59, 58, 0)
+    instants += [leap_start + TimeDelta(FixedPrec(i) / 4) for i in range(16)]
+    
+    for instant_list in (instants, instants[::-1]):
+      self.assertEqual(
+        TimeInstant.to_format_string_tz_many(instant_list, tz, format_str),
+        [instant.to_format_string_tz(tz, format_str) for instant in instant_list]
+      )
+    
+    self.assertEqual(
+      TimeInstant.to_format_string_tz_many(instants[-16:-12], TimeZone(0), '%H:%M:%S.%.2f'),
+      ['23:59:58.00', '23:59:58.25', '23:59:58.50', '23:59:58.75']
+    )
+    self.assertEqual(
+      TimeInstant.to_format_string_tz_many(instants[-12:-4:2], TimeZone(0), '%H:%M:%S.%.2f'),
+      ['23:59:59.00', '23:59:59.50', '23:59:60.00', '23:59:60.50']
+    )
+  
   def test_to_format_string_mono(self):
     ts = TimeInstant.TIME_SCALES.TT
     
@@ -1449,6 +1999,21 @@ class TestTimeClasses(TestCase):
       'U:15 W:16'
     )
   
+  def test_format_string_compiled(self):
+    program = TimeInstant._compile_format_string('%Y-%m-%d %X.%f', GregorianDate)
+    self.assertIs(TimeInstant._compile_format_string('%Y-%m-%d %X.%f', GregorianDate), program)
+    self.assertFalse(program.uses_day_info)
+    self.assertTrue(TimeInstant._compile_format_string('%c', GregorianDate).uses_day_info)
+    # literals next to each other are joined, including those of %X
+    self.assertEqual([part for part in program.parts if isinstance(part, str)], ['-', '-', ' ', ':', ':', '.'])
+    
+    # info without precomputed week numbers
+    info = {'year': 2024, 'ordinal_day': 106, 'frac_second': FixedPrec('0.0500001')}
+    self.assertEqual(TimeInstant.format_string_from_info(info, '%U %W %f %.3f %.f'), '15 16 050000 050 0500001')
+    
+    with self.assertRaises(ValueError):
+      TimeInstant._compile_format_string('%Y %Q', GregorianDate)
+  
   def test_to_format_string_solar(self):
     longitude = 15
     true_solar = False
@@ -1541,6 +2106,46 @@ class TestTimeClasses(TestCase):
       TimeInstant.from_date_tuple_tz(tz, 2024, 7, 3, 2, 4, 5, FixedPrec('0.000122'))
     )
   
+  def test_info_from_format_string_compiled(self):
+    parser = TimeInstant._compile_format_string_parser('%Y-%m-%d %X.%.3f', GregorianDate, True, True)
+    self.assertIs(TimeInstant._compile_format_string_parser('%Y-%m-%d %X.%.3f', GregorianDate, True, True), parser)
+    self.assertIsNone(TimeInstant._compile_format_string_parser('%Y %Z', GregorianDate, True, True))
+    
+    for format_str, time_str in (
+      ('%c %z', 'Wed Jul 03 02:04:05 2024 +01:00:30.5'),
+      ('%A %B %d %y %I:%M:%S %p %:z', 'Wednesday July 03 24 02:04:05 PM -05:30'),
+      ('%Y %j %H%M%S.%.f%.mz', '2024 185 020405.000122Z'),
+      ('%G-W%V-%u %x %X %%', '2024-W27-3 07/03/24 02:04:05 %'),
+      ('%Y-%m-%d', '2024-07-0x'),
+      ('%Y-%m-%d', '2024-07-03 02:04'),
+    ):
+      try:
+        expected = TimeInstant._info_from_format_string_general(format_str, time_str)
+      except ValueError as exc:
+        with self.assertRaises(ValueError) as ctx:
+          TimeInstant.info_from_format_string(format_str, time_str)
+        self.assertEqual(str(ctx.exception), str(exc))
+      else:
+        self.assertEqual(TimeInstant.info_from_format_string(format_str, time_str), expected)
+    
+    self.assertEqual(TimeInstant.info_from_format_string('%b %B %y', 'Jul March 24'), ({'month': 3, 'year_mod_100': 24}, 12))
+    self.assertEqual(TimeInstant.info_from_format_string('%d', '03 extra', error_if_time_str_too_long = False), ({'day': 3}, 2))
+    self.assertEqual(TimeInstant.info_from_format_string('%d/%m', '03-07', error_if_invalid_base_char = False), ({'day': 3, 'month': 7}, 5))
+  
+  def test_from_format_string_many(self):
+    time_strs = ['2024-07-03 02:04:05.000122 Z', '2024-07-03 02:04:05.000122 +0100', '2024-12-31 23:59:60.500000 Z']
+    self.assertEqual(
+      TimeInstant.from_format_string_many('%Y-%m-%d %H:%M:%S.%f %z', time_strs),
+      [TimeInstant.from_format_string('%Y-%m-%d %H:%M:%S.%f %z', time_str) for time_str in time_strs]
+    )
+    
+    tz = _central_time_zone
+    time_strs = ['2024-03-10 01:30:00', '2024-03-10 03:30:00', '2024-11-03 01:30:00', '2024-11-03 02:30:00']
+    self.assertEqual(
+      TimeInstant.from_format_string_tz_many(tz, '%Y-%m-%d %H:%M:%S', time_strs, default_info = {'frac_second': 0}),
+      [TimeInstant.from_format_string_tz(tz, '%Y-%m-%d %H:%M:%S', time_str, default_info = {'frac_second': 0}) for time_str in time_strs]
+    )
+  
   def test_from_format_string_mono(self):
     ts = TimeInstant.TIME_SCALES.TT
     self.assertEqual(
@@ -1614,6 +2219,135 @@ class TestTimeClasses(TestCase):
     test(sydney,  (2024, 10, 5,  15, 59, 59, 0), (2024, 10, 6,  1, 59, 59, 0, False), 10 * 3600, 0)
     test(sydney,  (2024, 10, 5,  16, 0,  0,  0), (2024, 10, 6,  3, 0,  0,  0, False), 11 * 3600, 1)
   
+  def test_leap_smear_inverse(self):
+    smear_length = FixedPrec(86400)
+    
+    for smear_type in (SmearType.COSINE, SmearType.BUMP):
+      for leap_extra_secs in (FixedPrec(1), FixedPrec(-1)):
+        for smear_time in (FixedPrec('0.5'), FixedPrec('8640.123456789'), FixedPrec('43200'), FixedPrec('77760.987654321')):
+          tai_time = TimeInstant.from_smear(smear_type, smear_length, leap_extra_secs, smear_time)
+          self.assertAlmostEqual(TimeInstant.to_smear(smear_type, smear_length, leap_extra_secs, tai_time), smear_time, 11)
+          
+          delta = FixedPrec('0.001')
+          numeric_rate = (TimeInstant.from_smear(smear_type, smear_length, leap_extra_secs, smear_time + delta) - tai_time) / delta
+          self.assertAlmostEqual(TimeInstant.from_smear_rate(smear_type, smear_length, leap_extra_secs, smear_time), numeric_rate, 8)
+  
+  def test_leap_smear_tables(self):
+    with TimeInstant._temp_add_leap_sec(27, ('2017-12-31', FixedPrec(NOMINAL_SECS_PER_DAY), FixedPrec(1))):
+      for smear_type in (SmearType.COSINE, SmearType.BUMP):
+        smear_plan = LeapSmearPlan(
+          LeapSmearSingle(
+            start_basis = LeapBasis.START,
+            secs_before_start_basis = 43_200,
+            end_basis = LeapBasis.END,
+            secs_after_end_basis = 43_200,
+            type = smear_type
+          ),
+          {}
+        )
+        
+        start_instant = TimeInstant.from_date_tuple_utc(2016, 12, 31, 12, 0, 0, 0)
+        instants = [start_instant + TimeDelta(FixedPrec(i * 1_800) + FixedPrec('0.000123')) for i in range(48)]
+        exact = [instant.to_secs_since_epoch_smear_utc(smear_plan) for instant in instants]
+        # just before the end of the smear, where the time in the smear as a float rounds to the end of the table
+        smear_end = TimeInstant.from_date_tuple_utc(2017, 1, 1, 12, 0, 0, 0) - TimeDelta(FixedPrec('0.000000000001'))
+        smear_end_secs = smear_end.to_secs_since_epoch_smear_utc(smear_plan)
+        
+        # small tables, since fitting evaluates the exact smear a few hundred times per segment
+        smear_plan.use_smear_tables(segments = 4, degree = 8)
+        smear_tables = TimeInstant.get_smear_tables(smear_type, FixedPrec(86_400), FixedPrec(1), 4, 8)
+        self.assertIn(smear_tables, [entry.data.get('smear_tables') for entry in smear_plan.tai_to_utc_smear_table])
+        # max_error is only an estimate, so allow twice it
+        to_smear_error = 2 * smear_tables.to_smear_delta.max_error + 1e-11
+        from_smear_error = 2 * smear_tables.from_smear_delta.max_error + 1e-11
+        self.assertLess(to_smear_error, 1e-4)
+        
+        for instant, smear_secs in zip(instants, exact):
+          self.assertAlmostEqual(instant.to_secs_since_epoch_smear_utc(smear_plan), smear_secs, delta = to_smear_error)
+          self.assertAlmostEqual(TimeInstant.from_secs_since_epoch_smear_utc(smear_plan, smear_secs).time, instant.time, delta = from_smear_error)
+        self.assertAlmostEqual(smear_end.to_secs_since_epoch_smear_utc(smear_plan), smear_end_secs, delta = to_smear_error)
+        self.assertAlmostEqual(TimeInstant.from_secs_since_epoch_smear_utc(smear_plan, smear_end_secs).time, smear_end.time, delta = from_smear_error)
+        
+        smear_plan.use_smear_tables(False)
+        self.assertEqual([instant.to_secs_since_epoch_smear_utc(smear_plan) for instant in instants], exact)
+  
+  def test_leap_smear_plan_update_tables(self):
+    smear_plan = LeapSmearPlan(
+      LeapSmearSingle(
+        start_basis = LeapBasis.START,
+        secs_before_start_basis = 5,
+        end_basis = LeapBasis.END,
+        secs_after_end_basis = 5,
+        type = SmearType.LINEAR
+      ),
+      {}
+    )
+    first_entry = smear_plan.tai_to_utc_smear_table[0]
+    entry_count = len(smear_plan.tai_to_utc_smear_table)
+    
+    with TimeInstant._temp_add_leap_sec(len(TimeInstant.LEAP_SECONDS), ('2040-12-31', FixedPrec(NOMINAL_SECS_PER_DAY), FixedPrec(-1))):
+      smear_plan._update_tables()
+      
+      # only the new leap second was added
+      self.assertIs(smear_plan.tai_to_utc_smear_table[0], first_entry)
+      self.assertEqual(len(smear_plan.tai_to_utc_smear_table), entry_count + 2)
+      
+      new_smear_plan = LeapSmearPlan(smear_plan.default_smear, {})
+      self.assertEqual(smear_plan.tai_to_utc_smear_table, new_smear_plan.tai_to_utc_smear_table)
+      self.assertEqual(smear_plan.utc_smear_to_tai_table, new_smear_plan.utc_smear_to_tai_table)
+      self.assertEqual(smear_plan._table_columns, new_smear_plan._table_columns)
+      
+      instant = TimeInstant.from_date_tuple_utc(2041, 1, 1, 1, 0, 0, 0)
+      self.assertEqual(instant.to_secs_since_epoch_smear_utc(smear_plan), instant.to_secs_since_epoch_utc().secs_since_epoch)
+    
+    # leap second removed, so the tables are generated again
+    smear_plan._update_tables()
+    self.assertEqual(len(smear_plan.tai_to_utc_smear_table), entry_count)
+  
+  def test_leap_smear_fixed_offset_windows(self):
+    smear_plan = LeapSmearPlan(
+      LeapSmearSingle(
+        start_basis = LeapBasis.START,
+        secs_before_start_basis = 5,
+        end_basis = LeapBasis.END,
+        secs_after_end_basis = 5,
+        type = SmearType.LINEAR
+      ),
+      {}
+    )
+    
+    leap_instant = TimeInstant.from_date_tuple_utc(2016, 12, 31, 23, 59, 60, 0)
+    instants = [
+      TimeInstant.from_date_tuple_utc(1960, 1, 1, 0, 0, 0, 0),
+      TimeInstant.from_date_tuple_utc(2010, 1, 1, 0, 0, 0, 0),
+      *(leap_instant + TimeDelta(FixedPrec(i) / 2) for i in range(-14, 16)),
+      TimeInstant.from_date_tuple_utc(2030, 1, 1, 0, 0, 0, 0),
+    ]
+    
+    def uncached(func):
+      smear_plan._last_fixed_offset_window = None
+      return func()
+    
+    smear_secs = [uncached(lambda: instant.to_secs_since_epoch_smear_utc(smear_plan)) for instant in instants]
+    # repeated and in order, so the last window is reused
+    for _ in range(2):
+      self.assertEqual([instant.to_secs_since_epoch_smear_utc(smear_plan) for instant in instants], smear_secs)
+      self.assertEqual(
+        [TimeInstant.from_secs_since_epoch_smear_utc(smear_plan, secs).time for secs in smear_secs],
+        [uncached(lambda: TimeInstant.from_secs_since_epoch_smear_utc(smear_plan, secs).time) for secs in smear_secs]
+      )
+    
+    self.assertEqual(instants[-1].to_secs_since_epoch_smear_utc(smear_plan), instants[-1].to_secs_since_epoch_utc().secs_since_epoch)
+    
+    # windows are reset when leap seconds change
+    future_instant = TimeInstant.from_date_tuple_utc(2040, 12, 31, 23, 59, 58, 0)
+    future_smear_secs = future_instant.to_secs_since_epoch_smear_utc(smear_plan)
+    with TimeInstant._temp_add_leap_sec(len(TimeInstant.LEAP_SECONDS), ('2040-12-31', FixedPrec(NOMINAL_SECS_PER_DAY), FixedPrec(-1))):
+      smear_plan._update_tables()
+      self.assertNotEqual(future_instant.to_secs_since_epoch_smear_utc(smear_plan), future_smear_secs)
+    smear_plan._update_tables()
+    self.assertEqual(future_instant.to_secs_since_epoch_smear_utc(smear_plan), future_smear_secs)
+  
   def test_leap_smear_utc(self):
     with TimeInstant._temp_add_leap_sec(27, ('2017-12-31', FixedPrec(NOMINAL_SECS_PER_DAY), FixedPrec(1))):
       smear_plan = LeapSmearPlan(
@@ -41,6 +41,20 @@ class TimeInstantDateTuple(TimeInstantLeapSec):
     days_since_epoch, hour = divmod(hrs_since_epoch, cls.NOMINAL_HOURS_PER_DAY)
     return days_since_epoch, hour, minute
   
+  @classmethod
+  def _get_leap_second_fold(cls, utc_date_mins: Integral, second: Integral, frac_second: TimeStorageType) -> bool:
+    'Returns whether a utc time (as minutes since epoch, seconds, fractional seconds) is the first pass through a positive leap second.'
+    
+    if utc_date_mins in cls.LEAP_SECONDS_DICT:
+      leap_entries = cls.LEAP_SECONDS_DICT[utc_date_mins]
+      leap_delta = leap_entries[-1]['utc_delta']
+      if leap_delta < 0:
+        # positive leap second
+        if second + frac_second < -leap_delta:
+          return True
+    
+    return False
+  
   # instance stuff
   
   __slots__ = ()
@@ -61,19 +75,7 @@ class TimeInstantDateTuple(TimeInstantLeapSec):
     time += second
     time += frac_second
     
-    if date_mins in cls.LEAP_SECONDS_DICT:
-      leap_entries = cls.LEAP_SECONDS_DICT[date_mins]
-      leap_delta = leap_entries[-1]['utc_delta']
-      if leap_delta < 0:
-        # positive leap second
-        if second + frac_second < -leap_delta:
-          leap_fold = True
-        else:
-          leap_fold = False
-      else:
-        leap_fold = False
-    else:
-      leap_fold = False
+    leap_fold = cls._get_leap_second_fold(date_mins, second, frac_second)
     
     return cls.from_secs_since_epoch_utc(time, second_fold = leap_fold, round_invalid_time_upwards = round_invalid_time_upwards)
   
@@ -1,7 +1,8 @@
 from enum import Enum
+from functools import lru_cache
 from numbers import Integral
-from re import compile as re_compile
-from typing import Self
+from re import DOTALL, Pattern, compile as re_compile, escape
+from typing import Callable, Iterable, NamedTuple, Self
 
 from ...fixed_prec import FixedPrec
 from ...constants import NOMINAL_MICROSECS_PER_SEC_LOG_FIXEDPREC_RADIX, YEARS_IN_CENTURY, NOMINAL_DAYS_PER_WEEK
@@ -14,6 +15,32 @@ from .time_inst_solar import TimeInstantSolar
 from .time_inst_smear import LeapSmearPlan, TimeInstantLeapSmear
 from ...named_tuples import DateTupleBasic, DateTupleFormatString
 
+class _FormatStringDayInfo(NamedTuple):
+  year: Integral
+  month: Integral
+  day: Integral
+  day_of_week: Integral
+  ordinal_day: Integral
+  iso_week_date_year: Integral
+  iso_week_date_week: Integral
+  iso_week_date_day: Integral
+  week_num_sunday_start: Integral
+  week_num_monday_start: Integral
+
+class _FormatStringProgram(NamedTuple):
+  # format:
+  # parts are text, or functions from the format string info dict to text, to be joined in order
+  parts: tuple[str | Callable[[dict], str], ...]
+  # whether the parts read fields of _FormatStringDayInfo beyond year, month and day
+  uses_day_info: bool
+
+class _FormatStringParser(NamedTuple):
+  # format:
+  # regex matching the whole parsed part of the time string
+  regex: Pattern
+  # tuples of (regex group name, format string info key, function from group text to info value), in order
+  converters: tuple[tuple[str, str, Callable[[str], object]], ...]
+
 class TimeInstantFormatString(TimeInstantSolar, TimeInstantLeapSmear):
   # static stuff
   
@@ -23,6 +50,11 @@ class TimeInstantFormatString(TimeInstantSolar, TimeInstantLeapSmear):
   
   _str_offset_to_fixedprec_minute = re_compile(r'^([+-])(\d{2})(\d{2})')
   _str_offset_to_fixedprec_any = re_compile(r'^([+-])(\d{2}):(\d{2})(?::(\d{2})(?:\.(\d+))?)?')
+  # same text as str_offset_to_fixedprec with allow_text_beyond_end
+  _FORMAT_STRING_PARSE_OFFSET_REGEX = r'(?>Z|[+-]\d{4}|[+-]\d{2}:\d{2}(?::\d{2}(?:\.\d++)?)?)'
+  # C89 format strings made of other format strings, shared by formatting and parsing
+  _FORMAT_STRING_SUB_FORMATS = {'c': '%a %b %d %H:%M:%S %Y', 'x': '%m/%d/%y', 'X': '%H:%M:%S'}
+  _format_string_parse_frac_size = re_compile(r'(m|[0-9]*)(:?)')
   
   @classmethod
   def fixedprec_offset_to_str(cls, offset_secs: TimeStorageType, minute_colon: bool = False, precision: Integral | None = None) -> str:
@@ -151,10 +183,103 @@ class TimeInstantFormatString(TimeInstantSolar, TimeInstantLeapSmear):
     'FRAC_HIGH_PREC',
   ))
   
+  # fields of _FormatStringDayInfo that are not part of a date tuple
+  _FORMAT_STRING_DAY_INFO_CHARS = frozenset('aAjUwWGuVc')
+  
   @classmethod
-  def format_string_from_info(cls, info: dict, format_str: str, date_cls: type[JulGregBaseDate] = GregorianDate) -> str:
+  def _get_week_num(cls, info: dict, week_start_day: Integral, date_cls: type[JulGregBaseDate]) -> Integral:
+    'Returns the %U (week_start_day 0) or %W (week_start_day 1) week number; week 1 starts on the first such day of the year.'
+    week_1_start_ordinal = date_cls.from_month_week_day(info['year'], 1, 1, week_start_day).ordinal_date()
+    return (info['ordinal_day'] - week_1_start_ordinal) // date_cls.DAYS_IN_WEEK + 1
+  
+  @classmethod
+  @lru_cache(maxsize = 64)
+  def _fixedprec_offset_to_str_cached(cls, offset_secs: TimeStorageType, minute_colon: bool, precision: Integral | None) -> str:
+    'fixedprec_offset_to_str for format strings; the same few offsets are formatted over and over.'
+    return cls.fixedprec_offset_to_str(offset_secs, minute_colon = minute_colon, precision = precision)
+  
+  @staticmethod
+  def _frac_second_to_digits(frac_second: TimeStorageType, digits: Integral) -> str:
+    'Returns the first digits digits of frac_second, zero padded.'
+    if isinstance(frac_second, FixedPrec) and frac_second.place >= 0 and frac_second.value >= 0:
+      # integer shift instead of FixedPrec multiplication
+      truncated = frac_second.value * FixedPrec.RADIX ** digits // FixedPrec.RADIX ** frac_second.place
+    else:
+      truncated = int(frac_second * FixedPrec.RADIX ** digits)
+    return f'{truncated:0>{digits}}'
+  
+  @classmethod
+  def _get_format_string_emitter(cls, char: str, date_cls: type[JulGregBaseDate]) -> str | Callable[[dict], str]:
+    'Returns the text or function (from the info dict to text) for the format string sequence %<char>.'
+    match char:
+      # C89 format strings
+      case '%':
+        return '%'
+      case 'a':
+        return lambda info: date_cls.WEEK_NAMES_SHORT[info['day_of_week']]
+      case 'A':
+        return lambda info: date_cls.WEEK_NAMES_LONG[info['day_of_week']]
+      case 'b':
+        return lambda info: date_cls.MONTH_NAMES_SHORT[info['month'] - 1]
+      case 'B':
+        return lambda info: date_cls.MONTH_NAMES_LONG[info['month'] - 1]
+      case 'd':
+        return lambda info: f'{info['day']:0>2}'
+      case 'f':
+        return lambda info: cls._frac_second_to_digits(info['frac_second'], NOMINAL_MICROSECS_PER_SEC_LOG_FIXEDPREC_RADIX)
+      case 'H':
+        return lambda info: f'{info['hour']:0>2}'
+      case 'I':
+        return lambda info: f'{(info['hour'] - 1) % 12 + 1:0>2}'
+      case 'j':
+        return lambda info: f'{info['ordinal_day']:0>3}'
+      case 'm':
+        return lambda info: f'{info['month']:0>2}'
+      case 'M':
+        return lambda info: f'{info['minute']:0>2}'
+      case 'p':
+        return lambda info: 'PM' if info['hour'] >= 12 else 'AM'
+      case 'S':
+        return lambda info: f'{info['second']:0>2}'
+      case 'U':
+        return lambda info: f'{info['week_num_sunday_start'] if 'week_num_sunday_start' in info else cls._get_week_num(info, 0, date_cls):0>2}'
+      case 'w':
+        return lambda info: str(info['day_of_week'])
+      case 'W':
+        return lambda info: f'{info['week_num_monday_start'] if 'week_num_monday_start' in info else cls._get_week_num(info, 1, date_cls):0>2}'
+      case 'y':
+        return lambda info: f'{info['year'] % 100:0>2}'
+      case 'Y':
+        return lambda info: f'-{-info['year']:0>3}' if info['year'] < 0 else f'{info['year']:0>4}'
+      case 'z':
+        return lambda info: cls._fixedprec_offset_to_str_cached(info['tz_offset'], False, None)
+      case 'Z':
+        return lambda info: info['tz_name'] if info['tz_name'] != None else cls.DEFAULT_TIMEZONE_NAME
+      # datetime format strings
+      case 'G':
+        return lambda info: f'{info['iso_week_date_year']:0>4}'
+      case 'u':
+        return lambda info: str(info['iso_week_date_day'])
+      case 'V':
+        return lambda info: f'{info['iso_week_date_week']:0>2}'
+      # invalid format specifier
+      case _:
+        raise ValueError(f'Invalid format string sequence %{char}')
+  
+  @classmethod
+  @lru_cache(maxsize = 256)
+  def _compile_format_string(cls, format_str: str, date_cls: type[JulGregBaseDate]) -> _FormatStringProgram:
+    'Compiles a strftime style format string into text and field functions. Cached since the same few formats are usually reused.'
+    
     state = cls._format_string_state.START
-    result = ''
+    parts = []
+    uses_day_info = False
+    
+    def add_part(part):
+      if isinstance(part, str) and len(parts) > 0 and isinstance(parts[-1], str):
+        parts[-1] += part
+      else:
+        parts.append(part)
     
     for char in format_str:
       match state:
@@ -162,72 +287,13 @@ class TimeInstantFormatString(TimeInstantSolar, TimeInstantLeapSmear):
           if char == '%':
             state = cls._format_string_state.PERCENT_START
           else:
-            result += char
+            add_part(char)
         
         case cls._format_string_state.PERCENT_START:
-          # C89 format strings
-          if char == '%':
-            result += '%'
-          elif char == 'a':
-            result += date_cls.WEEK_NAMES_SHORT[info['day_of_week']]
-          elif char == 'A':
-            result += date_cls.WEEK_NAMES_LONG[info['day_of_week']]
-          elif char == 'b':
-            result += date_cls.MONTH_NAMES_SHORT[info['month'] - 1]
-          elif char == 'B':
-            result += date_cls.MONTH_NAMES_LONG[info['month'] - 1]
-          elif char == 'c':
-            result += cls.format_string_from_info(info, '%a %b %d %H:%M:%S %Y', date_cls = date_cls)
-          elif char == 'd':
-            result += f'{info['day']:0>2}'
-          elif char == 'f':
-            result += f'{int(info['frac_second'] * cls.NOMINAL_MICROSECS_PER_SEC):0>6}'
-          elif char == 'H':
-            result += f'{info['hour']:0>2}'
-          elif char == 'I':
-            result += f'{(info['hour'] - 1) % 12 + 1:0>2}'
-          elif char == 'j':
-            result += f'{info['ordinal_day']:0>3}'
-          elif char == 'm':
-            result += f'{info['month']:0>2}'
-          elif char == 'M':
-            result += f'{info['minute']:0>2}'
-          elif char == 'p':
-            result += 'PM' if info['hour'] >= 12 else 'AM'
-          elif char == 'S':
-            result += f'{info['second']:0>2}'
-          elif char == 'U':
-            week_1_sunday_start_ordinal = date_cls.from_month_week_day(info['year'], 1, 1, 0).ordinal_date()
-            week_num = (info['ordinal_day'] - week_1_sunday_start_ordinal) // date_cls.DAYS_IN_WEEK + 1
-            result += f'{week_num:0>2}'
-          elif char == 'w':
-            result += str(info['day_of_week'])
-          elif char == 'W':
-            week_1_monday_start_ordinal = date_cls.from_month_week_day(info['year'], 1, 1, 1).ordinal_date()
-            week_num = (info['ordinal_day'] - week_1_monday_start_ordinal) // date_cls.DAYS_IN_WEEK + 1
-            result += f'{week_num:0>2}'
-          elif char == 'x':
-            result += cls.format_string_from_info(info, '%m/%d/%y', date_cls = date_cls)
-          elif char == 'X':
-            result += cls.format_string_from_info(info, '%H:%M:%S', date_cls = date_cls)
-          elif char == 'y':
-            result += f'{info['year'] % 100:0>2}'
-          elif char == 'Y':
-            if info['year'] < 0:
-              result += f'-{-info['year']:0>3}'
-            else:
-              result += f'{info['year']:0>4}'
-          elif char == 'z':
-            result += cls.fixedprec_offset_to_str(info['tz_offset'])
-          elif char == 'Z':
-            result += info['tz_name'] if info['tz_name'] != None else cls.DEFAULT_TIMEZONE_NAME
-          # datetime format strings
-          elif char == 'G':
-            result += f'{info['iso_week_date_year']:0>4}'
-          elif char == 'u':
-            result += str(info['iso_week_date_day'])
-          elif char == 'V':
-            result += f'{info['iso_week_date_week']:0>2}'
+          if char in cls._FORMAT_STRING_SUB_FORMATS:
+            sub_program = cls._compile_format_string(cls._FORMAT_STRING_SUB_FORMATS[char], date_cls)
+            for part in sub_program.parts:
+              add_part(part)
           elif char == ':':
             state = cls._format_string_state.PERCENT_COLON
             continue
@@ -237,16 +303,18 @@ class TimeInstantFormatString(TimeInstantSolar, TimeInstantLeapSmear):
             frac_size = ''
             minute_colon = None
             continue
-          # invalid format specifier
           else:
-            raise ValueError(f'Invalid format string sequence %{char}')
+            add_part(cls._get_format_string_emitter(char, date_cls))
+          
+          if char in cls._FORMAT_STRING_DAY_INFO_CHARS:
+            uses_day_info = True
           
           state = cls._format_string_state.START
         
         case cls._format_string_state.PERCENT_COLON:
           # datetime format strings
           if char == 'z':
-            result += cls.fixedprec_offset_to_str(info['tz_offset'], minute_colon = True)
+            add_part(lambda info: cls._fixedprec_offset_to_str_cached(info['tz_offset'], True, None))
           # invalid format specifier
           else:
             raise ValueError(f'Invalid format string sequence %:{char}')
@@ -278,35 +346,41 @@ class TimeInstantFormatString(TimeInstantSolar, TimeInstantLeapSmear):
             if minute_colon == True:
               raise ValueError(f'Format specifier %.{frac_size}:f invalid')
             elif frac_size == '':
-              place = info['frac_second'].place
-              result += f'{int(info['frac_second'] * 10 ** place):0>{place}}'
+              add_part(lambda info: cls._frac_second_to_digits(info['frac_second'], info['frac_second'].place))
             elif frac_size == 'm':
               raise ValueError(f'Format string sequence %.{frac_size}f invalid')
             else:
-              frac_size = int(frac_size)
-              if frac_size > cls.FORMAT_STRING_MAX_DIGITS:
-                raise ValueError(f'Format string sequence %.{frac_size}f percision too large')
+              frac_digits = int(frac_size)
+              if frac_digits > cls.FORMAT_STRING_MAX_DIGITS:
+                raise ValueError(f'Format string sequence %.{frac_digits}f percision too large')
               else:
-                result += f'{int(info['frac_second'] * 10 ** frac_size):0>{frac_size}}'
+                add_part(lambda info, frac_digits = frac_digits: cls._frac_second_to_digits(info['frac_second'], frac_digits))
             state = cls._format_string_state.START
           elif char == 'z':
             minute_colon = True if minute_colon == True else False
             if frac_size == '':
-              result += cls.fixedprec_offset_to_str(info['tz_offset'], minute_colon = minute_colon)
+              precision = None
             elif frac_size == 'm':
-              result += cls.fixedprec_offset_to_str(info['tz_offset'], minute_colon = minute_colon, precision = -1)
+              precision = -1
             else:
-              frac_size = int(frac_size)
-              if frac_size > cls.FORMAT_STRING_MAX_DIGITS:
-                raise ValueError(f'Format string sequence %.{frac_size}z percision too large')
-              else:
-                result += cls.fixedprec_offset_to_str(info['tz_offset'], minute_colon = minute_colon, precision = frac_size)
+              precision = int(frac_size)
+              if precision > cls.FORMAT_STRING_MAX_DIGITS:
+                raise ValueError(f'Format string sequence %.{precision}z percision too large')
+            add_part(lambda info, minute_colon = minute_colon, precision = precision: cls._fixedprec_offset_to_str_cached(info['tz_offset'], minute_colon, precision))
             state = cls._format_string_state.START
           # invalid format specifier
           else:
             raise ValueError(f'Invalid format string sequence %.{frac_size}{char}')
     
-    return result
+    return _FormatStringProgram(tuple(parts), uses_day_info)
+  
+  @staticmethod
+  def _run_format_string_program(program: _FormatStringProgram, info: dict) -> str:
+    return ''.join([part if isinstance(part, str) else part(info) for part in program.parts])
+  
+  @classmethod
+  def format_string_from_info(cls, info: dict, format_str: str, date_cls: type[JulGregBaseDate] = GregorianDate) -> str:
+    return cls._run_format_string_program(cls._compile_format_string(format_str, date_cls), info)
   
   @classmethod
   def get_string_array_match(cls, format_arr: list[str], string: str) -> int | None:
@@ -317,6 +391,164 @@ class TimeInstantFormatString(TimeInstantSolar, TimeInstantLeapSmear):
     
     return None
   
+  @classmethod
+  def _get_format_string_parse_fields(cls, char: str, date_cls: type[JulGregBaseDate]) -> tuple[str, str, Callable[[str], object]] | None:
+    '''
+    Returns the regex, info key and text converter for the parse sequence %<char>, or None if it has no regex.
+    Regexes are atomic or possessive so they consume the same text as the general engine.
+    '''
+    
+    def names_fields(names: list[str], info_key: str, index_offset: int = 0) -> tuple[str, str, Callable[[str], object]]:
+      # alternatives are tried in order like get_string_array_match, so the first index of a matched name is its index
+      name_indices = {}
+      for i, name in enumerate(names):
+        name_indices.setdefault(name, i + index_offset)
+      return '(?>' + '|'.join(escape(name) for name in names) + ')', info_key, name_indices.__getitem__
+    
+    match char:
+      # C89 format strings
+      case 'a':
+        return names_fields(date_cls.WEEK_NAMES_SHORT, 'day_of_week')
+      case 'A':
+        return names_fields(date_cls.WEEK_NAMES_LONG, 'day_of_week')
+      case 'b':
+        return names_fields(date_cls.MONTH_NAMES_SHORT, 'month', 1)
+      case 'B':
+        return names_fields(date_cls.MONTH_NAMES_LONG, 'month', 1)
+      case 'd':
+        return r'\d{2}', 'day', int
+      case 'f':
+        return r'\d{6}', 'frac_second', lambda text: FixedPrec(int(text), NOMINAL_MICROSECS_PER_SEC_LOG_FIXEDPREC_RADIX)
+      case 'H':
+        return r'\d{2}', 'hour', int
+      case 'I':
+        return r'\d{2}', '12hr_hour', lambda text: int(text) % 12
+      case 'j':
+        return r'\d{3}', 'ordinal_day', int
+      case 'm':
+        return r'\d{2}', 'month', int
+      case 'M':
+        return r'\d{2}', 'minute', int
+      case 'p':
+        return names_fields(cls.HALF_DAY_VARIATIONS, '12hr_half_day')
+      case 'S':
+        return r'\d{2}', 'second', int
+      case 'U':
+        return r'\d{2}', 'week_num_sunday_start', int
+      case 'w':
+        return r'\d', 'day_of_week', int
+      case 'W':
+        return r'\d{2}', 'week_num_monday_start', int
+      case 'y':
+        return r'\d{2}', 'year_mod_100', int
+      case 'Y':
+        return r'-?\d++', 'year', int
+      case 'z':
+        return cls._FORMAT_STRING_PARSE_OFFSET_REGEX, 'tz_offset', cls.str_offset_to_fixedprec
+      # datetime format strings
+      case 'G':
+        return r'-?\d++', 'iso_week_date_year', int
+      case 'u':
+        return r'\d', 'iso_week_date_day', int
+      case 'V':
+        return r'\d{2}', 'iso_week_date_week', int
+      case _:
+        return None
+  
+  @classmethod
+  @lru_cache(maxsize = 256)
+  def _compile_format_string_parser(
+      cls,
+      format_str: str,
+      date_cls: type[JulGregBaseDate],
+      error_if_invalid_base_char: bool,
+      error_if_time_str_too_long: bool
+    ) -> _FormatStringParser | None:
+    '''
+    Compiles a strptime style format string into one anchored regex and the converters of its groups, or returns None if
+    the format string has a sequence without a regex (the general engine parses those, and raises for invalid ones).
+    '''
+    
+    regex_parts = []
+    converters = []
+    
+    def add_field(regex: str, info_key: str, converter: Callable[[str], object]) -> None:
+      group_name = f'g{len(converters)}'
+      regex_parts.append(f'(?P<{group_name}>{regex})')
+      converters.append((group_name, info_key, converter))
+    
+    def add_format(format_str: str) -> bool:
+      state = cls._format_string_state.START
+      
+      for char in format_str:
+        match state:
+          case cls._format_string_state.START:
+            if char == '%':
+              state = cls._format_string_state.PERCENT_START
+            else:
+              regex_parts.append(escape(char) if error_if_invalid_base_char else '.')
+          
+          case cls._format_string_state.PERCENT_START:
+            if char == '%':
+              regex_parts.append('%' if error_if_invalid_base_char else '.')
+            elif char in cls._FORMAT_STRING_SUB_FORMATS:
+              if not add_format(cls._FORMAT_STRING_SUB_FORMATS[char]):
+                return False
+            elif char == ':':
+              state = cls._format_string_state.PERCENT_COLON
+              continue
+            elif char == '.':
+              state = cls._format_string_state.FRAC_HIGH_PREC
+              frac_size = ''
+              continue
+            elif (fields := cls._get_format_string_parse_fields(char, date_cls)) != None:
+              add_field(*fields)
+            else:
+              return False
+            
+            state = cls._format_string_state.START
+          
+          case cls._format_string_state.PERCENT_COLON:
+            if char == 'z':
+              add_field(cls._FORMAT_STRING_PARSE_OFFSET_REGEX, 'tz_offset', cls.str_offset_to_fixedprec)
+            else:
+              return False
+            
+            state = cls._format_string_state.START
+          
+          case cls._format_string_state.FRAC_HIGH_PREC:
+            if char in 'fz':
+              frac_size_match = cls._format_string_parse_frac_size.fullmatch(frac_size)
+              if frac_size_match == None:
+                return False
+              
+              digits, minute_colon = frac_size_match.groups()
+              if digits.isdigit() and int(digits) > cls.FORMAT_STRING_MAX_DIGITS:
+                return False
+              
+              if char == 'f':
+                if digits == 'm' or minute_colon != '':
+                  return False
+                
+                add_field(r'\d++' if digits == '' else rf'\d{{{digits}}}', 'frac_second', lambda text: FixedPrec(f'0.{text}'))
+              else:
+                # the offset is parsed the same whatever the precision
+                add_field(cls._FORMAT_STRING_PARSE_OFFSET_REGEX, 'tz_offset', cls.str_offset_to_fixedprec)
+              
+              state = cls._format_string_state.START
+            else:
+              frac_size += char
+      
+      return state == cls._format_string_state.START
+    
+    if not add_format(format_str):
+      return None
+    
+    if error_if_time_str_too_long:
+      regex_parts.append(r'\Z')
+    
+    return _FormatStringParser(re_compile(''.join(regex_parts), DOTALL), tuple(converters))
+  
   @classmethod
   def info_from_format_string(
       cls,
@@ -328,6 +560,34 @@ class TimeInstantFormatString(TimeInstantSolar, TimeInstantLeapSmear):
     ) -> tuple[dict, int]:
     'Return argument is format string info dict, then int of length of format string copied.'
     
+    parser = cls._compile_format_string_parser(format_str, date_cls, error_if_invalid_base_char, error_if_time_str_too_long)
+    
+    if parser != None and (match := parser.regex.match(time_str)):
+      info = {}
+      for group_name, info_key, converter in parser.converters:
+        info[info_key] = converter(match[group_name])
+      return info, match.end()
+    
+    # format strings without a regex, and time strings that do not match (so the error is the general engine's)
+    return cls._info_from_format_string_general(
+      format_str,
+      time_str,
+      error_if_invalid_base_char = error_if_invalid_base_char,
+      error_if_time_str_too_long = error_if_time_str_too_long,
+      date_cls = date_cls
+    )
+  
+  @classmethod
+  def _info_from_format_string_general(
+      cls,
+      format_str: str,
+      time_str: str,
+      error_if_invalid_base_char: bool = True,
+      error_if_time_str_too_long: bool = True,
+      date_cls: type[JulGregBaseDate] = GregorianDate
+    ) -> tuple[dict, int]:
+    'Parses the time string one format string character at a time.'
+    
     state = cls._format_string_state.START
     index = 0
     info = {}
@@ -375,20 +635,20 @@ class TimeInstantFormatString(TimeInstantSolar, TimeInstantLeapSmear):
             if month_of_year == None:
               raise ValueError(f'Month of year invalid: {time_str[index:]}')
             else:
-              info['day_of_week'] = month_of_year + 1
+              info['month'] = month_of_year + 1
             
-            index += len(date_cls.MONTH_NAMES_SHORT[day_of_week])
+            index += len(date_cls.MONTH_NAMES_SHORT[month_of_year])
           elif char == 'B':
             month_of_year = cls.get_string_array_match(date_cls.MONTH_NAMES_LONG, time_str[index:])
             if month_of_year == None:
               raise ValueError(f'Month of year invalid: {time_str[index:]}')
             else:
-              info['day_of_week'] = month_of_year + 1
+              info['month'] = month_of_year + 1
             
-            index += len(date_cls.MONTH_NAMES_LONG[day_of_week])
+            index += len(date_cls.MONTH_NAMES_LONG[month_of_year])
           elif char == 'c':
             new_info, length = cls.info_from_format_string(
-              format_str = '%a %b %d %H:%M:%S %Y',
+              format_str = cls._FORMAT_STRING_SUB_FORMATS['c'],
               time_str = time_str[index:],
               error_if_invalid_base_char = error_if_invalid_base_char,
               error_if_time_str_too_long = False,
@@ -437,7 +697,7 @@ class TimeInstantFormatString(TimeInstantSolar, TimeInstantLeapSmear):
             index += 2
           elif char == 'x':
             new_info, length = cls.info_from_format_string(
-              format_str = '%m/%d/%y',
+              format_str = cls._FORMAT_STRING_SUB_FORMATS['x'],
               time_str = time_str[index:],
               error_if_invalid_base_char = error_if_invalid_base_char,
               error_if_time_str_too_long = False,
@@ -449,7 +709,7 @@ class TimeInstantFormatString(TimeInstantSolar, TimeInstantLeapSmear):
             index += length
           elif char == 'X':
             new_info, length = cls.info_from_format_string(
-              format_str = '%H:%M:%S',
+              format_str = cls._FORMAT_STRING_SUB_FORMATS['X'],
               time_str = time_str[index:],
               error_if_invalid_base_char = error_if_invalid_base_char,
               error_if_time_str_too_long = False,
@@ -460,7 +720,7 @@ class TimeInstantFormatString(TimeInstantSolar, TimeInstantLeapSmear):
             
             index += length
           elif char == 'y':
-            info['year_mod_100'] = int(time_str[index:index + 2]) % 12
+            info['year_mod_100'] = int(time_str[index:index + 2])
             index += 2
           elif char == 'Y':
             if time_str[index] == '-':
@@ -506,6 +766,7 @@ class TimeInstantFormatString(TimeInstantSolar, TimeInstantLeapSmear):
           elif char == '.':
             state = cls._format_string_state.FRAC_HIGH_PREC
             frac_size = ''
+            minute_colon = None
             continue
           # invalid format specifier
           else:
@@ -685,6 +946,30 @@ class TimeInstantFormatString(TimeInstantSolar, TimeInstantLeapSmear):
     
     return DateTupleFormatString(date.year, date.month, date.day, hour, minute, second, frac_second, tz_offset, None)
   
+  @classmethod
+  def format_string_to_date_tuple_many(
+    cls,
+    format_str: str,
+    date_cls: type[JulGregBaseDate],
+    time_strs: Iterable[str],
+    default_info: dict = {},
+    error_if_invalid_base_char: bool = True,
+    error_if_time_str_too_long: bool = True,
+  ) -> list[DateTupleFormatString]:
+    'Returns format_string_to_date_tuple for many time strings with one format string.'
+    
+    return [
+      cls.format_string_to_date_tuple(
+        format_str = format_str,
+        date_cls = date_cls,
+        time_str = time_str,
+        default_info = default_info,
+        error_if_invalid_base_char = error_if_invalid_base_char,
+        error_if_time_str_too_long = error_if_time_str_too_long
+      )
+      for time_str in time_strs
+    ]
+  
   @classmethod
   def from_format_string(
     cls,
@@ -863,6 +1148,74 @@ class TimeInstantFormatString(TimeInstantSolar, TimeInstantLeapSmear):
       date_cls = date_cls
     )
   
+  @classmethod
+  def from_format_string_many(
+    cls,
+    format_str: str,
+    time_strs: Iterable[str],
+    default_info: dict = {},
+    date_cls: type[JulGregBaseDate] = GregorianDate,
+    error_if_invalid_base_char: bool = True,
+    error_if_time_str_too_long: bool = True
+  ) -> list[Self]:
+    'Returns from_format_string for many time strings with one format string. Time strings are converted in one batch per offset.'
+    
+    date_tups_by_offset = {}
+    
+    for i, date_tup in enumerate(cls.format_string_to_date_tuple_many(
+      format_str = format_str,
+      date_cls = date_cls,
+      time_strs = time_strs,
+      default_info = default_info,
+      error_if_invalid_base_char = error_if_invalid_base_char,
+      error_if_time_str_too_long = error_if_time_str_too_long
+    )):
+      date_tups_by_offset.setdefault(date_tup.tz_offset, []).append((i, date_tup[:7]))
+    
+    results = [None] * sum(len(date_tups) for date_tups in date_tups_by_offset.values())
+    
+    for tz_offset, date_tups in date_tups_by_offset.items():
+      instants = cls.from_date_tuple_tz_many(
+        TimeZone(tz_offset),
+        (date_tup for _, date_tup in date_tups),
+        dst_second_fold = False,
+        date_cls = date_cls
+      )
+      
+      for (i, _), instant in zip(date_tups, instants):
+        results[i] = instant
+    
+    return results
+  
+  @classmethod
+  def from_format_string_tz_many(
+    cls,
+    time_zone: TimeZone,
+    format_str: str,
+    time_strs: Iterable[str],
+    default_info: dict = {},
+    date_cls: type[JulGregBaseDate] = GregorianDate,
+    error_if_invalid_base_char: bool = True,
+    error_if_time_str_too_long: bool = True
+  ) -> list[Self]:
+    'Returns from_format_string_tz for many time strings with one format string, using from_date_tuple_tz_many.'
+    
+    return cls.from_date_tuple_tz_many(
+      time_zone,
+      (
+        date_tup[:7]
+        for date_tup in cls.format_string_to_date_tuple_many(
+          format_str = format_str,
+          date_cls = date_cls,
+          time_strs = time_strs,
+          default_info = default_info,
+          error_if_invalid_base_char = error_if_invalid_base_char,
+          error_if_time_str_too_long = error_if_time_str_too_long
+        )
+      ),
+      date_cls = date_cls
+    )
+  
   @classmethod
   def from_format_string_mono(
     cls,
@@ -1024,29 +1377,67 @@ class TimeInstantFormatString(TimeInstantSolar, TimeInstantLeapSmear):
       )
   
   @classmethod
-  def date_tuple_to_format_string(cls, format_str: str, date_cls: type[JulGregBaseDate], date_tup: DateTupleFormatString) -> str:
-    year, month, day, hour, minute, second, frac_second, tz_offset, tz_name = date_tup
+  @lru_cache(maxsize = 256)
+  def _get_format_string_day_info(cls, year: Integral, month: Integral, day: Integral, date_cls: type[JulGregBaseDate]) -> _FormatStringDayInfo:
+    'Returns the date fields used by format strings. Cached since formatting many times usually revisits the same few days.'
     date = date_cls(year, month, day)
-    day_of_week = date.day_of_week()
-    ordinal_day = date.ordinal_date()
     iso_date = IsoWeekDate(date)
+    info = {'year': year, 'ordinal_day': date.ordinal_date()}
     
-    return cls.format_string_from_info({
-      'year': year,
-      'month': month,
-      'day': day,
+    return _FormatStringDayInfo(
+      year = year,
+      month = month,
+      day = day,
+      day_of_week = date.day_of_week(),
+      ordinal_day = info['ordinal_day'],
+      iso_week_date_year = iso_date.year,
+      iso_week_date_week = iso_date.week,
+      iso_week_date_day = iso_date.day,
+      week_num_sunday_start = cls._get_week_num(info, 0, date_cls),
+      week_num_monday_start = cls._get_week_num(info, 1, date_cls),
+    )
+  
+  @classmethod
+  def _day_info_to_format_string(
+      cls,
+      format_str: str,
+      date_cls: type[JulGregBaseDate],
+      day_info: _FormatStringDayInfo,
+      hour: Integral,
+      minute: Integral,
+      second: Integral,
+      frac_second: TimeStorageType,
+      tz_offset: TimeStorageType,
+      tz_name: str | None
+    ) -> str:
+    return cls._run_format_string_program(cls._compile_format_string(format_str, date_cls), {
+      **day_info._asdict(),
       'hour': hour,
       'minute': minute,
       'second': second,
       'frac_second': frac_second,
-      'day_of_week': day_of_week,
-      'ordinal_day': ordinal_day,
       'tz_offset': tz_offset,
       'tz_name': tz_name,
-      'iso_week_date_year': iso_date.year,
-      'iso_week_date_week': iso_date.week,
-      'iso_week_date_day': iso_date.day,
-    }, format_str, date_cls = date_cls)
+    })
+  
+  @classmethod
+  def date_tuple_to_format_string(cls, format_str: str, date_cls: type[JulGregBaseDate], date_tup: DateTupleFormatString) -> str:
+    year, month, day, hour, minute, second, frac_second, tz_offset, tz_name = date_tup
+    program = cls._compile_format_string(format_str, date_cls)
+    
+    if program.uses_day_info:
+      info = cls._get_format_string_day_info(year, month, day, date_cls)._asdict()
+    else:
+      info = {'year': year, 'month': month, 'day': day}
+    
+    info['hour'] = hour
+    info['minute'] = minute
+    info['second'] = second
+    info['frac_second'] = frac_second
+    info['tz_offset'] = tz_offset
+    info['tz_name'] = tz_name
+    
+    return cls._run_format_string_program(program, info)
   
   def to_format_string_tai(self, format_str: str, date_cls: type[JulGregBaseDate] = GregorianDate) -> str:
     'Returns a TAI time string formatted in the strftime style.'
@@ -1089,6 +1480,47 @@ class TimeInstantFormatString(TimeInstantSolar, TimeInstantLeapSmear):
       )
     )
   
+  @classmethod
+  def to_format_string_tz_many(cls, instants: Iterable[Self], time_zone: TimeZone, format_str: str, date_cls: type[JulGregBaseDate] = GregorianDate) -> list[str]:
+    '''
+    Returns to_format_string_tz for many instants in one timezone. The offset is looked up once per constant offset run and the
+    date fields once per local day, so within a day each instant only needs an hour, minute and second split.
+    '''
+    
+    results = []
+    day_start_time = None
+    day_end_time = None
+    
+    for instant, (tz_secs_since_epoch, _, _), run_start in cls._iter_secs_since_epoch_tz_runs(instants, time_zone, date_cls):
+      if run_start:
+        tz_offset, tz_offset_abbr = instant.get_current_tz_offset(time_zone, date_cls = date_cls)
+        # local seconds since epoch do not count the 60th second, so leap seconds use the slow path
+        run_in_leap_second = instant.to_utc_info()['positive_leap_second_occurring']
+      
+      if run_in_leap_second:
+        results.append(instant.to_format_string_tz(time_zone, format_str, date_cls = date_cls))
+        continue
+      
+      if day_start_time == None or not (day_start_time <= tz_secs_since_epoch < day_end_time):
+        days_since_epoch = int(tz_secs_since_epoch // cls.NOMINAL_SECS_PER_DAY)
+        day_start_time = days_since_epoch * cls.NOMINAL_SECS_PER_DAY
+        day_end_time = day_start_time + cls.NOMINAL_SECS_PER_DAY
+        day_info = cls._get_format_string_day_info(*date_cls.from_days_since_epoch(days_since_epoch).to_date_tuple(), date_cls)
+      
+      hour, remainder = divmod(tz_secs_since_epoch - day_start_time, cls.NOMINAL_SECS_PER_HOUR)
+      minute, remainder = divmod(remainder, cls.NOMINAL_SECS_PER_MIN)
+      second, frac_second = divmod(remainder, 1)
+      
+      results.append(cls._day_info_to_format_string(
+        format_str,
+        date_cls,
+        day_info,
+        int(hour), int(minute), int(second), frac_second,
+        tz_offset, tz_offset_abbr
+      ))
+    
+    return results
+  
   def to_format_string_mono(self, time_scale: TimeInstantSolar.TIME_SCALES, format_str: str, date_cls: type[JulGregBaseDate] = GregorianDate) -> str:
     'Returns a monotonic-time-scale time string formatted in the strftime style.'
     
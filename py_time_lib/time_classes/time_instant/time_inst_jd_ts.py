@@ -1,4 +1,4 @@
-from typing import Self
+from typing import Iterable, Self
 
 from ...fixed_prec import FixedPrec
 from ...calendars.julian import JulianDate
@@ -81,6 +81,18 @@ class TimeInstantJulianDateAndUnixTimestamp(TimeInstMonotonic):
   def from_modified_julian_date_utc(cls, modified_julian_date: TimeStorageType, second_fold: bool = False, round_invalid_time_upwards: bool = True) -> Self:
     return cls.from_julian_date_utc(modified_julian_date - cls.MODIFIED_JULIAN_DATE_OFFSET_FROM_JD, second_fold, round_invalid_time_upwards = round_invalid_time_upwards)
   
+  @classmethod
+  def from_modified_julian_date_utc_many(cls, modified_julian_dates: Iterable[TimeStorageType], second_fold: bool = False, round_invalid_time_upwards: bool = True) -> list[Self]:
+    'Returns from_modified_julian_date_utc for many dates, faster for sorted dates.'
+    return cls.from_secs_since_epoch_utc_many(
+      (
+        (modified_julian_date - cls.MODIFIED_JULIAN_DATE_OFFSET_FROM_JD) * cls.NOMINAL_SECS_PER_DAY + cls.JULIAN_DATE_OFFSET
+        for modified_julian_date in modified_julian_dates
+      ),
+      second_fold,
+      round_invalid_time_upwards = round_invalid_time_upwards
+    )
+  
   def to_julian_date_utc(self) -> JulianDateUTC:
     utc_secs_since_epoch, second_fold = self.to_secs_since_epoch_utc()
     return JulianDateUTC(
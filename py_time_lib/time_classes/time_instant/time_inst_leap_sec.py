@@ -1,6 +1,6 @@
 from contextlib import contextmanager
 from numbers import Integral
-from typing import Generator, Self, SupportsIndex
+from typing import Generator, Iterable, Self, SupportsIndex
 
 from ...constants import NOMINAL_SECS_PER_DAY as _NOMINAL_SECS_PER_DAY, NOMINAL_SECS_PER_HOUR as _NOMINAL_SECS_PER_HOUR, NOMINAL_SECS_PER_MIN as _NOMINAL_SECS_PER_MIN, NOMINAL_MINS_PER_DAY as _NOMINAL_MINS_PER_DAY, NOMINAL_MINS_PER_HOUR as _NOMINAL_MINS_PER_HOUR, NOMINAL_HOURS_PER_DAY as _NOMINAL_HOURS_PER_DAY, NOMINAL_MICROSECS_PER_SEC as _NOMINAL_MICROSECS_PER_SEC
 from ...lib_funcs import binary_search
@@ -198,29 +198,63 @@ class TimeInstantLeapSec(TimeInstantOperators):
   __slots__ = ()
   
   @classmethod
-  def from_secs_since_epoch_utc(cls, utc_seconds_since_epoch: TimeStorageType, second_fold: bool = False, round_invalid_time_upwards: bool = True) -> Self:
-    if len(cls.UTC_TO_TAI_OFFSET_TABLE) == 0:
+  def _from_secs_since_epoch_utc_using_table_index(cls, utc_seconds_since_epoch: TimeStorageType, utc_table_index: int, second_fold: bool, round_invalid_time_upwards: bool) -> Self:
+    'utc_table_index is the UTC_TO_TAI_OFFSET_TABLE entry containing the time, or -1 if the time is before the first entry.'
+    if utc_table_index < 0:
       return cls(utc_seconds_since_epoch - cls.UTC_INITIAL_OFFSET_FROM_TAI)
     else:
-      if utc_seconds_since_epoch < cls.UTC_TO_TAI_OFFSET_TABLE[0]['start_instant']:
-        return cls(utc_seconds_since_epoch - cls.UTC_INITIAL_OFFSET_FROM_TAI)
+      utc_table_entry = cls.UTC_TO_TAI_OFFSET_TABLE[utc_table_index]
+      if len(utc_table_entry['utc_tai_delta']) == 0:
+        # time cannot map to tai, but can round up
+        if round_invalid_time_upwards:
+          utc_table_next_entry = cls.UTC_TO_TAI_OFFSET_TABLE[utc_table_index + 1]
+          return cls(utc_table_entry['start_instant'] - (utc_table_next_entry['utc_tai_delta'][0] - utc_table_entry['leap_utc_delta']))
+        else:
+          raise TimeUnmappableError('utc time does not map to tai')
+      elif len(utc_table_entry['utc_tai_delta']) == 1:
+        return cls(utc_seconds_since_epoch - utc_table_entry['utc_tai_delta'][0])
       else:
-        utc_table_index = binary_search(lambda x: utc_seconds_since_epoch >= cls.UTC_TO_TAI_OFFSET_TABLE[x]['start_instant'], 0, len(cls.UTC_TO_TAI_OFFSET_TABLE))
-        utc_table_entry = cls.UTC_TO_TAI_OFFSET_TABLE[utc_table_index]
-        if len(utc_table_entry['utc_tai_delta']) == 0:
-          # time cannot map to tai, but can round up
-          if round_invalid_time_upwards:
-            utc_table_next_entry = cls.UTC_TO_TAI_OFFSET_TABLE[utc_table_index + 1]
-            return cls(utc_table_entry['start_instant'] - (utc_table_next_entry['utc_tai_delta'][0] - utc_table_entry['leap_utc_delta']))
-          else:
-            raise TimeUnmappableError('utc time does not map to tai')
-        elif len(utc_table_entry['utc_tai_delta']) == 1:
-          return cls(utc_seconds_since_epoch - utc_table_entry['utc_tai_delta'][0])
+        if second_fold:
+          return cls(utc_seconds_since_epoch - utc_table_entry['utc_tai_delta'][1])
         else:
-          if second_fold:
-            return cls(utc_seconds_since_epoch - utc_table_entry['utc_tai_delta'][1])
-          else:
-            return cls(utc_seconds_since_epoch - utc_table_entry['utc_tai_delta'][0])
+          return cls(utc_seconds_since_epoch - utc_table_entry['utc_tai_delta'][0])
+  
+  @classmethod
+  def _get_utc_table_index(cls, utc_seconds_since_epoch: TimeStorageType) -> int:
+    if len(cls.UTC_TO_TAI_OFFSET_TABLE) == 0 or utc_seconds_since_epoch < cls.UTC_TO_TAI_OFFSET_TABLE[0]['start_instant']:
+      return -1
+    else:
+      return binary_search(lambda x: utc_seconds_since_epoch >= cls.UTC_TO_TAI_OFFSET_TABLE[x]['start_instant'], 0, len(cls.UTC_TO_TAI_OFFSET_TABLE))
+  
+  @classmethod
+  def from_secs_since_epoch_utc(cls, utc_seconds_since_epoch: TimeStorageType, second_fold: bool = False, round_invalid_time_upwards: bool = True) -> Self:
+    return cls._from_secs_since_epoch_utc_using_table_index(
+      utc_seconds_since_epoch,
+      cls._get_utc_table_index(utc_seconds_since_epoch),
+      second_fold,
+      round_invalid_time_upwards
+    )
+  
+  @classmethod
+  def from_secs_since_epoch_utc_many(cls, utc_seconds_since_epoch_list: Iterable[TimeStorageType], second_fold: bool = False, round_invalid_time_upwards: bool = True) -> list[Self]:
+    'Returns from_secs_since_epoch_utc for many times. Sorted times step through the leap second table instead of searching it for each time.'
+    
+    utc_table = cls.UTC_TO_TAI_OFFSET_TABLE
+    utc_table_index = -1
+    
+    results = []
+    
+    for utc_seconds_since_epoch in utc_seconds_since_epoch_list:
+      if utc_table_index >= 0 and utc_seconds_since_epoch < utc_table[utc_table_index]['start_instant']:
+        # went backwards, search again
+        utc_table_index = cls._get_utc_table_index(utc_seconds_since_epoch)
+      
+      while utc_table_index + 1 < len(utc_table) and utc_seconds_since_epoch >= utc_table[utc_table_index + 1]['start_instant']:
+        utc_table_index += 1
+      
+      results.append(cls._from_secs_since_epoch_utc_using_table_index(utc_seconds_since_epoch, utc_table_index, second_fold, round_invalid_time_upwards))
+    
+    return results
   
   def to_utc_info(self) -> dict[str, TimeStorageType | bool | None]:
     'Returns a dict of the form (utc_seconds_since_epoch, positive_leap_second_occurring, last_leap_delta, last_leap_transition_time (when last leap second started or ended)).'
@@ -1,15 +1,40 @@
+from bisect import bisect_right
 from enum import Enum
 from numbers import Integral
-from typing import Self
+from typing import Iterable, NamedTuple, Self
 
-from ...lib_funcs import binary_search, almost_linear_func_inverse_deriv
 from ...fixed_prec import FixedPrec
+from ...piecewise_chebyshev import PiecewiseChebyshev
 from ...named_tuples import UT1TAIOffsetEntry, TAIUT1OffsetEntry, DateTupleBasic
 from ...calendars.jul_greg_base import JulGregBaseDate
 from ...calendars.gregorian import GregorianDate
 from ..lib import TimeStorageType
 from .time_inst_tz import TimeInstantTimeZones
 
+class _AffineTimeScale(NamedTuple):
+  # format:
+  # secs = base_secs + rate_delta * (base_secs - TT_EPOCH) + offset
+  base_scale: Enum
+  rate_delta: FixedPrec
+  offset: FixedPrec
+
+class _AffineTimeScaleConversion(NamedTuple):
+  # format:
+  # to_secs = (from_secs - from_offset) + rate_delta * (from_secs - from_offset - TT_EPOCH) + to_offset
+  rate_delta: FixedPrec
+  from_offset: FixedPrec
+  to_offset: FixedPrec
+
+class _UT1OffsetTable(NamedTuple):
+  # format:
+  # seconds since epoch and offsets as integers in units of 10 ** -place seconds, sorted by seconds since epoch;
+  # segment i runs from secs[i] to secs[i + 1], with its offset and seconds deltas precomputed
+  place: int
+  secs: list[int]
+  offsets: list[int]
+  offset_deltas: list[int]
+  secs_deltas: list[int]
+
 class TimeInstMonotonic(TimeInstantTimeZones):
   # static stuff
   
@@ -30,6 +55,22 @@ class TimeInstMonotonic(TimeInstantTimeZones):
   TCG_TO_TT_LG: FixedPrec = FixedPrec(f'0.{'0' * 9}6969290134', max_prec = 19) # 0.6969290134e-10
   TCG_TO_TT_FACTOR: FixedPrec = 1 - TCG_TO_TT_LG # 0.9999999993030709866
   
+  # https://gssc.esa.int/navipedia/index.php/Transformations_between_Time_Systems#TDT_-_TDB,_TCB
+  # TDB = TT + TDB_AMPLITUDE * sin(g + TDB_ECCENTRICITY * sin(g)), g = (TDB_G_AT_J2000 + TDB_G_PER_CENTURY * T) degrees, T = julian centuries of TAI since J2000
+  TDB_J2000_TT_TUPLE: tuple = 2000, 1, 1, 0, 0, 0, 0
+  TDB_SECS_PER_CENTURY: int = 36525 * 86400
+  TDB_RADS_PER_DEG: FixedPrec = FixedPrec('3.141592653589') / 180
+  TDB_G_AT_J2000: FixedPrec = FixedPrec('357.528')
+  TDB_G_PER_CENTURY: FixedPrec = FixedPrec('35999.050')
+  TDB_AMPLITUDE: FixedPrec = FixedPrec('0.001658')
+  TDB_ECCENTRICITY: FixedPrec = FixedPrec('0.0167')
+  TCB_LB: FixedPrec = FixedPrec(f'0.{'0' * 7}155051976772', max_prec = 19) # 1.55051976772e-8
+  TCB_P0: FixedPrec = FixedPrec(f'0.{'0' * 4}65510') # 6.5510e-5
+  MAX_TDB_INVERSE_STEPS = 50
+  # set by use_tdb_table
+  TDB_MINUS_TT_TABLE: PiecewiseChebyshev | None = None
+  TDB_MINUS_TT_RATE_TABLE: PiecewiseChebyshev | None = None
+  
   # from https://github.com/coolguy284/html5-time-standards
   # to get universe time, stuff will be done.
   #
@@ -68,11 +109,216 @@ class TimeInstMonotonic(TimeInstantTimeZones):
   def _init_class_vars(cls):
     super()._init_class_vars()
     cls.TT_EPOCH: TimeStorageType = cls.from_date_tuple_tai(*cls.TT_EPOCH_TAI_TUPLE).time
+    cls.TDB_J2000_EPOCH: TimeStorageType = cls.from_date_tuple_mono(cls.TIME_SCALES.TT, *cls.TDB_J2000_TT_TUPLE).time
+    cls.TDB_G_RADS_PER_SEC: FixedPrec = cls.TDB_RADS_PER_DEG * cls.TDB_G_PER_CENTURY / cls.TDB_SECS_PER_CENTURY
+    cls.TDB_G_PERIOD: FixedPrec = 2 * FixedPrec(1).pi()
     cls.GALACTIC_COORDINATE_TIME_TO_TCB_FACTOR: FixedPrec = cls._time_dilation_factor(cls.SUN_SPEED_IN_MILKY_WAY) * cls._time_dilation_factor(cls.MILKY_WAY_ESCAPE_VEL)
     cls.UNIVERSE_COORDINATE_TIME_TO_TCB_FACTOR: FixedPrec = cls.GALACTIC_COORDINATE_TIME_TO_TCB_FACTOR * cls._time_dilation_factor(cls.MILKY_WAY_CMB_REL_SPEED)
-    cls.TAI_UT1_OFFSETS: TAIUT1OffsetEntry = []
-    for tai_secs_since_epoch, ut1_tai_offset in cls.UT1_TAI_OFFSETS:
-      cls.TAI_UT1_OFFSETS.append(TAIUT1OffsetEntry(tai_secs_since_epoch + ut1_tai_offset, -ut1_tai_offset))
+    cls._init_affine_time_scales()
+    cls._init_ut1_vars()
+  
+  @classmethod
+  def _init_affine_time_scales(cls):
+    'Describes every time scale as an affine map of a base scale, and composes the direct conversion between any two scales with the same base.'
+    
+    no_rate_delta = FixedPrec(0, max_prec = 19)
+    no_offset = FixedPrec(0)
+    
+    cls.AFFINE_TIME_SCALES: dict[Enum, _AffineTimeScale] = {
+      cls.TIME_SCALES.TAI: _AffineTimeScale(cls.TIME_SCALES.TAI, no_rate_delta, no_offset),
+      cls.TIME_SCALES.TT: _AffineTimeScale(cls.TIME_SCALES.TAI, no_rate_delta, cls.TT_OFFSET_FROM_TAI),
+      cls.TIME_SCALES.TCG: _AffineTimeScale(cls.TIME_SCALES.TAI, 1 / cls.TCG_TO_TT_FACTOR - 1, cls.TT_OFFSET_FROM_TAI),
+      cls.TIME_SCALES.TCB: _AffineTimeScale(cls.TIME_SCALES.TCB, no_rate_delta, no_offset),
+      cls.TIME_SCALES.GALACTIC_COORDINATE_TIME: _AffineTimeScale(cls.TIME_SCALES.TCB, 1 / cls.GALACTIC_COORDINATE_TIME_TO_TCB_FACTOR - 1, no_offset),
+      cls.TIME_SCALES.UNIVERSE_COORDINATE_TIME: _AffineTimeScale(cls.TIME_SCALES.TCB, 1 / cls.UNIVERSE_COORDINATE_TIME_TO_TCB_FACTOR - 1, no_offset),
+      cls.TIME_SCALES.TDB: _AffineTimeScale(cls.TIME_SCALES.TDB, no_rate_delta, no_offset),
+      cls.TIME_SCALES.UT1: _AffineTimeScale(cls.TIME_SCALES.UT1, no_rate_delta, no_offset),
+    }
+    
+    cls.AFFINE_TIME_SCALE_CONVERSIONS: dict[tuple[Enum, Enum], _AffineTimeScaleConversion] = {
+      (from_scale, to_scale): _AffineTimeScaleConversion(
+        (to_affine.rate_delta - from_affine.rate_delta) / (1 + from_affine.rate_delta),
+        from_affine.offset,
+        to_affine.offset
+      )
+      for from_scale, from_affine in cls.AFFINE_TIME_SCALES.items()
+      for to_scale, to_affine in cls.AFFINE_TIME_SCALES.items()
+      if from_affine.base_scale == to_affine.base_scale
+    }
+  
+  @classmethod
+  def _init_ut1_vars(cls):
+    'Rebuilds the UT1 -> TAI table and the integer tables for both directions from UT1_TAI_OFFSETS. The new tables are swapped in whole.'
+    cls.TAI_UT1_OFFSETS: list[TAIUT1OffsetEntry] = [
+      TAIUT1OffsetEntry(tai_secs_since_epoch + ut1_tai_offset, -ut1_tai_offset)
+      for tai_secs_since_epoch, ut1_tai_offset in cls.UT1_TAI_OFFSETS
+    ]
+    cls.UT1_TAI_OFFSET_TABLE: _UT1OffsetTable = cls._compile_ut1_offset_table(cls.UT1_TAI_OFFSETS)
+    cls.TAI_UT1_OFFSET_TABLE: _UT1OffsetTable = cls._compile_ut1_offset_table(cls.TAI_UT1_OFFSETS)
+  
+  @staticmethod
+  def _compile_ut1_offset_table(offset_entries: list[tuple[TimeStorageType, TimeStorageType]]) -> _UT1OffsetTable:
+    offset_entries = [(FixedPrec.from_basic(secs_since_epoch), FixedPrec.from_basic(offset)) for secs_since_epoch, offset in offset_entries]
+    # interpolated offsets are kept to at least the default precision
+    place = max([FixedPrec.DEFAULT_MAX_PREC, *(max(secs_since_epoch.place, offset.place) for secs_since_epoch, offset in offset_entries)])
+    
+    secs = [secs_since_epoch.value * FixedPrec.RADIX ** (place - secs_since_epoch.place) for secs_since_epoch, _ in offset_entries]
+    offsets = [offset.value * FixedPrec.RADIX ** (place - offset.place) for _, offset in offset_entries]
+    
+    return _UT1OffsetTable(
+      place,
+      secs,
+      offsets,
+      [next_offset - offset for offset, next_offset in zip(offsets, offsets[1:])],
+      [next_secs - secs_since_epoch for secs_since_epoch, next_secs in zip(secs, secs[1:])]
+    )
+  
+  @staticmethod
+  def _get_ut1_offset_table_key(table: _UT1OffsetTable, secs_since_epoch: TimeStorageType) -> int:
+    'Returns secs_since_epoch in units of the table, rounded down.'
+    secs_since_epoch = FixedPrec.from_basic(secs_since_epoch)
+    if secs_since_epoch.place <= table.place:
+      return secs_since_epoch.value * FixedPrec.RADIX ** (table.place - secs_since_epoch.place)
+    else:
+      return secs_since_epoch.value // FixedPrec.RADIX ** (secs_since_epoch.place - table.place)
+  
+  @staticmethod
+  def _get_ut1_offset_table_offset(table: _UT1OffsetTable, key: int, index: int) -> FixedPrec:
+    'index is the last entry at or before key (-1 if key is before the table). Offsets are constant outside the table.'
+    if index < 0:
+      offset = table.offsets[0]
+    elif index >= len(table.secs) - 1:
+      offset = table.offsets[-1]
+    else:
+      secs_delta = table.secs_deltas[index]
+      # linear interpolation, rounded to nearest
+      offset = table.offsets[index] + (2 * table.offset_deltas[index] * (key - table.secs[index]) + secs_delta) // (2 * secs_delta)
+    
+    return FixedPrec(offset, table.place)
+  
+  @classmethod
+  def _get_ut1_offset(cls, table: _UT1OffsetTable, secs_since_epoch: TimeStorageType) -> FixedPrec:
+    key = cls._get_ut1_offset_table_key(table, secs_since_epoch)
+    return cls._get_ut1_offset_table_offset(table, key, bisect_right(table.secs, key) - 1)
+  
+  @classmethod
+  def _get_ut1_offsets_many(cls, table: _UT1OffsetTable, secs_since_epoch_list: Iterable[TimeStorageType]) -> list[FixedPrec]:
+    'Same as _get_ut1_offset for many times. Sorted times step a cursor forward through the table; the first time and any backward or large forward jump search it instead.'
+    
+    table_secs = table.secs
+    table_len = len(table_secs)
+    index = None
+    
+    offsets = []
+    
+    for secs_since_epoch in secs_since_epoch_list:
+      key = cls._get_ut1_offset_table_key(table, secs_since_epoch)
+      
+      if index == None or (index >= 0 and key < table_secs[index]) or (index + 2 < table_len and key >= table_secs[index + 2]):
+        # first time, went backwards, or skipped past the next entry, search again
+        index = bisect_right(table_secs, key) - 1
+      elif index + 1 < table_len and key >= table_secs[index + 1]:
+        index += 1
+      
+      offsets.append(cls._get_ut1_offset_table_offset(table, key, index))
+    
+    return offsets
+  
+  @classmethod
+  def _get_tdb_g(cls, tai_secs_since_epoch: TimeStorageType) -> FixedPrec:
+    'Returns the mean anomaly g of the earth, in radians.'
+    T = (tai_secs_since_epoch - cls.TDB_J2000_EPOCH) / cls.TDB_SECS_PER_CENTURY
+    return cls.TDB_RADS_PER_DEG * (cls.TDB_G_AT_J2000 + cls.TDB_G_PER_CENTURY * T)
+  
+  @classmethod
+  def _get_tdb_minus_tt_exact(cls, g: FixedPrec) -> FixedPrec:
+    return cls.TDB_AMPLITUDE * (g + cls.TDB_ECCENTRICITY * g.sin()).sin()
+  
+  @classmethod
+  def _get_tdb(cls, tai_secs_since_epoch: TimeStorageType, g: FixedPrec) -> TimeStorageType:
+    if cls.TDB_MINUS_TT_TABLE != None and (table_value := cls.TDB_MINUS_TT_TABLE(g % cls.TDB_G_PERIOD)) != None:
+      tdb_minus_tt = cls._table_value_to_fixed_prec(table_value)
+    else:
+      tdb_minus_tt = cls._get_tdb_minus_tt_exact(g)
+    
+    return tai_secs_since_epoch + cls.TT_OFFSET_FROM_TAI + tdb_minus_tt
+  
+  @classmethod
+  def _get_tdb_rate(cls, g: FixedPrec) -> FixedPrec:
+    'Returns the derivative of TDB with respect to TAI.'
+    if cls.TDB_MINUS_TT_RATE_TABLE != None and (table_value := cls.TDB_MINUS_TT_RATE_TABLE(g % cls.TDB_G_PERIOD)) != None:
+      return 1 + cls._table_value_to_fixed_prec(table_value) * cls.TDB_G_RADS_PER_SEC
+    else:
+      return 1 + cls.TDB_AMPLITUDE * (g + cls.TDB_ECCENTRICITY * g.sin()).cos() * (1 + cls.TDB_ECCENTRICITY * g.cos()) * cls.TDB_G_RADS_PER_SEC
+  
+  @staticmethod
+  def _table_value_to_fixed_prec(value: float) -> FixedPrec:
+    return FixedPrec(round(value * 10 ** FixedPrec.DEFAULT_MAX_PREC), FixedPrec.DEFAULT_MAX_PREC)
+  
+  @classmethod
+  def use_tdb_table(cls, enabled: bool = True, segments: int = 8, degree: int = PiecewiseChebyshev.DEFAULT_DEGREE) -> None:
+    '''
+    Switches TDB and TCB (and the scales based on TCB) from the exact TDB - TT series to a PiecewiseChebyshev table of it.
+    The table spans one period of g, so it covers all dates; with the defaults its max_error (an error estimate, not a
+    bound) is about 1e-12 s, which is the resolution of the exact series.
+    '''
+    if enabled:
+      cls.TDB_MINUS_TT_TABLE = PiecewiseChebyshev(cls._get_tdb_minus_tt_exact, 0, cls.TDB_G_PERIOD, segments, degree)
+      cls.TDB_MINUS_TT_RATE_TABLE = cls.TDB_MINUS_TT_TABLE.derivative()
+    else:
+      cls.TDB_MINUS_TT_TABLE = None
+      cls.TDB_MINUS_TT_RATE_TABLE = None
+  
+  @classmethod
+  def _get_tcb_from_tdb(cls, tai_secs_since_epoch: TimeStorageType, tdb_secs_since_epoch: TimeStorageType) -> TimeStorageType:
+    return tdb_secs_since_epoch + cls.TCB_LB * (tai_secs_since_epoch - cls.TT_EPOCH) + cls.TCB_P0
+  
+  @classmethod
+  def _tdb_or_tcb_inverse(cls, time_scale: TIME_SCALES, mono_secs_since_epoch: FixedPrec) -> TimeStorageType:
+    '''
+    Newton's method, starting from the inverse of the linear part (within about 2 ms). The analytic derivative is only
+    taken at the start, as it changes by less than 1e-16 over that distance.
+    '''
+    
+    epsilon = mono_secs_since_epoch.smallest_representable() * 2
+    
+    if time_scale == cls.TIME_SCALES.TDB:
+      guess = mono_secs_since_epoch - cls.TT_OFFSET_FROM_TAI
+    else:
+      guess = (mono_secs_since_epoch - cls.TT_OFFSET_FROM_TAI - cls.TCB_P0 + cls.TCB_LB * cls.TT_EPOCH) / (1 + cls.TCB_LB)
+    
+    best_guess = guess
+    best_abs_delta = None
+    rate = None
+    
+    for _ in range(cls.MAX_TDB_INVERSE_STEPS):
+      g = cls._get_tdb_g(guess)
+      output = cls._get_tdb(guess, g)
+      
+      if time_scale == cls.TIME_SCALES.TCB:
+        output = cls._get_tcb_from_tdb(guess, output)
+      
+      delta = output - mono_secs_since_epoch
+      abs_delta = abs(delta)
+      
+      if best_abs_delta != None and abs_delta >= best_abs_delta:
+        # no longer converging, limited by precision
+        break
+      
+      best_guess = guess
+      best_abs_delta = abs_delta
+      
+      if abs_delta <= epsilon:
+        break
+      
+      if rate == None:
+        rate = cls._get_tdb_rate(g)
+        if time_scale == cls.TIME_SCALES.TCB:
+          rate += cls.TCB_LB
+      
+      guess -= delta / rate
+    
+    return best_guess
   
   # instance stuff
   
@@ -91,29 +337,56 @@ class TimeInstMonotonic(TimeInstantTimeZones):
       case cls.TIME_SCALES.TCG:
         return cls((mono_secs_since_epoch - cls.TT_OFFSET_FROM_TAI - cls.TT_EPOCH) * cls.TCG_TO_TT_FACTOR + cls.TT_EPOCH)
       
-      case _ if time_scale == cls.TIME_SCALES.TCB or time_scale == cls.TIME_SCALES.GALACTIC_COORDINATE_TIME or time_scale == cls.TIME_SCALES.UNIVERSE_COORDINATE_TIME or time_scale == cls.TIME_SCALES.TDB:
-        mono_secs_since_epoch = FixedPrec.from_basic(mono_secs_since_epoch)
-        test = lambda x: cls(x).to_secs_since_epoch_mono(time_scale)
-        return cls(almost_linear_func_inverse_deriv(test, mono_secs_since_epoch, epsilon = mono_secs_since_epoch.smallest_representable() * 2))
+      case _ if time_scale == cls.TIME_SCALES.TCB or time_scale == cls.TIME_SCALES.TDB:
+        return cls(cls._tdb_or_tcb_inverse(time_scale, FixedPrec.from_basic(mono_secs_since_epoch)))
+      
+      case cls.TIME_SCALES.GALACTIC_COORDINATE_TIME:
+        TCB = (mono_secs_since_epoch - cls.TT_EPOCH) * cls.GALACTIC_COORDINATE_TIME_TO_TCB_FACTOR + cls.TT_EPOCH
+        return cls(cls._tdb_or_tcb_inverse(cls.TIME_SCALES.TCB, FixedPrec.from_basic(TCB)))
+      
+      case cls.TIME_SCALES.UNIVERSE_COORDINATE_TIME:
+        TCB = (mono_secs_since_epoch - cls.TT_EPOCH) * cls.UNIVERSE_COORDINATE_TIME_TO_TCB_FACTOR + cls.TT_EPOCH
+        return cls(cls._tdb_or_tcb_inverse(cls.TIME_SCALES.TCB, FixedPrec.from_basic(TCB)))
       
       case cls.TIME_SCALES.UT1:
-        if len(cls.UT1_TAI_OFFSETS) == 0:
+        if len(cls.TAI_UT1_OFFSET_TABLE.secs) == 0:
           raise ValueError('Cannot convert UT1 to TAI as no UT1 offsets exist')
         else:
-          if mono_secs_since_epoch < cls.TAI_UT1_OFFSETS[0].secs_since_epoch:
-            return cls(mono_secs_since_epoch + cls.TAI_UT1_OFFSETS[0].tai_minus_ut1)
-          elif mono_secs_since_epoch > cls.TAI_UT1_OFFSETS[-1].secs_since_epoch:
-            return cls(mono_secs_since_epoch + cls.TAI_UT1_OFFSETS[-1].tai_minus_ut1)
-          else:
-            start_index = binary_search(lambda x: mono_secs_since_epoch >= cls.TAI_UT1_OFFSETS[x].secs_since_epoch, 0, len(cls.TAI_UT1_OFFSETS))
-            
-            if cls.TAI_UT1_OFFSETS[start_index].secs_since_epoch == mono_secs_since_epoch:
-              return cls(mono_secs_since_epoch + cls.TAI_UT1_OFFSETS[start_index].tai_minus_ut1)
-            else:
-              stop_index = start_index + 1
-              through_fraction = (mono_secs_since_epoch - cls.TAI_UT1_OFFSETS[start_index].secs_since_epoch) / (cls.TAI_UT1_OFFSETS[stop_index].secs_since_epoch - cls.TAI_UT1_OFFSETS[start_index].secs_since_epoch)
-              tai_minus_ut1 = cls.TAI_UT1_OFFSETS[start_index].tai_minus_ut1 + (cls.TAI_UT1_OFFSETS[stop_index].tai_minus_ut1 - cls.TAI_UT1_OFFSETS[start_index].tai_minus_ut1) * through_fraction
-              return cls(mono_secs_since_epoch + tai_minus_ut1)
+          return cls(mono_secs_since_epoch + cls._get_ut1_offset(cls.TAI_UT1_OFFSET_TABLE, mono_secs_since_epoch))
+  
+  @classmethod
+  def convert_secs(cls, from_scale: TIME_SCALES, to_scale: TIME_SCALES, secs_since_epoch: TimeStorageType) -> TimeStorageType:
+    '''
+    Converts seconds since epoch in one time scale to another. Scales that are affine maps of the same base scale (TAI,
+    TT and TCG; TCB, GALACTIC_COORDINATE_TIME and UNIVERSE_COORDINATE_TIME) convert in one step, others go through
+    their base scales and TAI.
+    '''
+    
+    if (conversion := cls.AFFINE_TIME_SCALE_CONVERSIONS.get((from_scale, to_scale))) != None:
+      base_secs_since_epoch = secs_since_epoch - conversion.from_offset
+      return base_secs_since_epoch + conversion.rate_delta * (base_secs_since_epoch - cls.TT_EPOCH) + conversion.to_offset
+    else:
+      from_base_scale = cls.AFFINE_TIME_SCALES[from_scale].base_scale
+      to_base_scale = cls.AFFINE_TIME_SCALES[to_scale].base_scale
+      return cls.convert_secs(
+        to_base_scale,
+        to_scale,
+        cls.from_secs_since_epoch_mono(from_base_scale, cls.convert_secs(from_scale, from_base_scale, secs_since_epoch)).to_secs_since_epoch_mono(to_base_scale)
+      )
+  
+  @classmethod
+  def convert_secs_many(cls, from_scale: TIME_SCALES, to_scale: TIME_SCALES, secs_since_epoch_list: Iterable[TimeStorageType]) -> list[TimeStorageType]:
+    'Returns convert_secs for many times; the affine conversion is looked up once.'
+    
+    if (conversion := cls.AFFINE_TIME_SCALE_CONVERSIONS.get((from_scale, to_scale))) != None:
+      from_offset, rate_delta, to_offset = conversion.from_offset, conversion.rate_delta, conversion.to_offset
+      rate_origin = cls.TT_EPOCH + from_offset
+      return [
+        secs_since_epoch - from_offset + rate_delta * (secs_since_epoch - rate_origin) + to_offset
+        for secs_since_epoch in secs_since_epoch_list
+      ]
+    else:
+      return [cls.convert_secs(from_scale, to_scale, secs_since_epoch) for secs_since_epoch in secs_since_epoch_list]
   
   @classmethod
   def from_date_tuple_mono(
@@ -140,25 +413,10 @@ class TimeInstMonotonic(TimeInstantTimeZones):
         return (self._time - self.TT_EPOCH) / self.TCG_TO_TT_FACTOR + self.TT_EPOCH + self.TT_OFFSET_FROM_TAI
       
       case self.TIME_SCALES.TDB:
-        # https://gssc.esa.int/navipedia/index.php/Transformations_between_Time_Systems#TDT_-_TDB,_TCB
-        J2000_EPOCH = self.from_date_tuple_mono(self.TIME_SCALES.TT, 2000, 1, 1, 0, 0, 0, 0).time
-        
-        T = (self._time - J2000_EPOCH) / (36525 * 86400)
-        g = (FixedPrec('3.141592653589') / 180) * (FixedPrec('357.528') + FixedPrec('35999.050') * T)
-        TDB = self._time + self.TT_OFFSET_FROM_TAI + FixedPrec('0.001658') * (g + FixedPrec('0.0167') * g.sin()).sin()
-        return TDB
+        return self._get_tdb(self._time, self._get_tdb_g(self._time))
       
       case self.TIME_SCALES.TCB:
-        # https://gssc.esa.int/navipedia/index.php/Transformations_between_Time_Systems#TDT_-_TDB,_TCB
-        J2000_EPOCH = self.from_date_tuple_mono(self.TIME_SCALES.TT, 2000, 1, 1, 0, 0, 0, 0).time
-        
-        T = (self._time - J2000_EPOCH) / (36525 * 86400)
-        g = (FixedPrec('3.141592653589') / 180) * (FixedPrec('357.528') + FixedPrec('35999.050') * T)
-        TDB = self._time + self.TT_OFFSET_FROM_TAI + FixedPrec('0.001658') * (g + FixedPrec('0.0167') * g.sin()).sin()
-        LB = FixedPrec(f'0.{'0' * 7}155051976772', max_prec = 19) # 1.55051976772e-8
-        P0 = FixedPrec(f'0.{'0' * 4}65510') # 6.5510e-5
-        TCB = TDB + LB * (self._time - self.TT_EPOCH) + P0
-        return TCB
+        return self._get_tcb_from_tdb(self._time, self._get_tdb(self._time, self._get_tdb_g(self._time)))
       
       case self.TIME_SCALES.GALACTIC_COORDINATE_TIME:
         TCB = self.to_secs_since_epoch_mono(self.TIME_SCALES.TCB)
@@ -171,23 +429,41 @@ class TimeInstMonotonic(TimeInstantTimeZones):
         return UNIVERSE_COORDINATE_TIME
       
       case self.TIME_SCALES.UT1:
-        if len(self.UT1_TAI_OFFSETS) == 0:
+        if len(self.UT1_TAI_OFFSET_TABLE.secs) == 0:
           raise ValueError('Cannot convert TAI to UT1 as no UT1 offsets exist')
         else:
-          if self.time < self.UT1_TAI_OFFSETS[0].secs_since_epoch:
-            return self.time + self.UT1_TAI_OFFSETS[0].ut1_minus_tai
-          elif self.time > self.UT1_TAI_OFFSETS[-1].secs_since_epoch:
-            return self.time + self.UT1_TAI_OFFSETS[-1].ut1_minus_tai
-          else:
-            start_index = binary_search(lambda x: self.time >= self.UT1_TAI_OFFSETS[x].secs_since_epoch, 0, len(self.UT1_TAI_OFFSETS))
-            
-            if self.UT1_TAI_OFFSETS[start_index].secs_since_epoch == self.time:
-              return self.time + self.UT1_TAI_OFFSETS[start_index].ut1_minus_tai
-            else:
-              stop_index = start_index + 1
-              through_fraction = (self.time - self.UT1_TAI_OFFSETS[start_index].secs_since_epoch) / (self.UT1_TAI_OFFSETS[stop_index].secs_since_epoch - self.UT1_TAI_OFFSETS[start_index].secs_since_epoch)
-              ut1_minus_tai = self.UT1_TAI_OFFSETS[start_index].ut1_minus_tai + (self.UT1_TAI_OFFSETS[stop_index].ut1_minus_tai - self.UT1_TAI_OFFSETS[start_index].ut1_minus_tai) * through_fraction
-              return self.time + ut1_minus_tai
+          return self.time + self._get_ut1_offset(self.UT1_TAI_OFFSET_TABLE, self.time)
+  
+  @classmethod
+  def from_secs_since_epoch_mono_many(cls, time_scale: TIME_SCALES, mono_secs_since_epoch_list: Iterable[TimeStorageType]) -> list[Self]:
+    'Returns from_secs_since_epoch_mono for many times; for UT1, sorted times step through the offset table instead of searching it.'
+    
+    if time_scale == cls.TIME_SCALES.UT1:
+      if len(cls.TAI_UT1_OFFSET_TABLE.secs) == 0:
+        raise ValueError('Cannot convert UT1 to TAI as no UT1 offsets exist')
+      mono_secs_since_epoch_list = list(mono_secs_since_epoch_list)
+      return [
+        cls(mono_secs_since_epoch + tai_minus_ut1)
+        for mono_secs_since_epoch, tai_minus_ut1 in zip(mono_secs_since_epoch_list, cls._get_ut1_offsets_many(cls.TAI_UT1_OFFSET_TABLE, mono_secs_since_epoch_list))
+      ]
+    else:
+      return [cls.from_secs_since_epoch_mono(time_scale, mono_secs_since_epoch) for mono_secs_since_epoch in mono_secs_since_epoch_list]
+  
+  @classmethod
+  def to_secs_since_epoch_mono_many(cls, instants: Iterable[Self], time_scale: TIME_SCALES) -> list[TimeStorageType]:
+    'Returns to_secs_since_epoch_mono for many instants; for UT1, sorted instants step through the offset table instead of searching it.'
+    
+    tai_secs_since_epoch_list = [instant.time for instant in instants]
+    
+    if time_scale == cls.TIME_SCALES.UT1:
+      if len(cls.UT1_TAI_OFFSET_TABLE.secs) == 0:
+        raise ValueError('Cannot convert TAI to UT1 as no UT1 offsets exist')
+      return [
+        tai_secs_since_epoch + ut1_minus_tai
+        for tai_secs_since_epoch, ut1_minus_tai in zip(tai_secs_since_epoch_list, cls._get_ut1_offsets_many(cls.UT1_TAI_OFFSET_TABLE, tai_secs_since_epoch_list))
+      ]
+    else:
+      return [cls(tai_secs_since_epoch).to_secs_since_epoch_mono(time_scale) for tai_secs_since_epoch in tai_secs_since_epoch_list]
   
   def to_date_tuple_mono(self, time_scale: TIME_SCALES, date_cls: type[JulGregBaseDate] = GregorianDate) -> DateTupleBasic:
     return self.epoch_instant_to_date_tuple(self.to_secs_since_epoch_mono(time_scale), date_cls = date_cls)
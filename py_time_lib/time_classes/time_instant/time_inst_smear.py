@@ -1,14 +1,17 @@
+from bisect import bisect_right
 from dataclasses import dataclass, field
 from enum import Enum
+from functools import lru_cache
 from numbers import Integral
 from typing import NamedTuple, Self
 from weakref import WeakValueDictionary
 
-from ...lib_funcs import binary_search, almost_linear_func_inverse_deriv
+from ...lib_funcs import binary_search
 from ...calendars.date_delta import DateDelta
 from ...calendars.jul_greg_base import JulGregBaseDate
 from ...calendars.gregorian import GregorianDate
 from ...fixed_prec import FixedPrec
+from ...piecewise_chebyshev import PiecewiseChebyshev
 from ..lib import TimeStorageType
 from ...named_tuples import DateTupleBasic, DateTupleTZ, SecsSinceEpochSmearTZ, CurrentTZOffset
 from .time_inst_mono import TimeInstMonotonic
@@ -41,6 +44,12 @@ class LeapSmearOverrideEntry(NamedTuple):
   leap_start_tai_secs_since_epoch: TimeStorageType
   smear: LeapSmearSingle
 
+class SmearTables(NamedTuple):
+  # to_smear(x) - x, over [0, smear_length + leap_extra_secs)
+  to_smear_delta: PiecewiseChebyshev
+  # from_smear(x) - x, over [0, smear_length)
+  from_smear_delta: PiecewiseChebyshev
+
 SmearTableEntryMode = Enum('SmearTableEntryMode', (
   'FIXED_OFFSET',
   'SMEAR',
@@ -59,6 +68,7 @@ class TAIToUTCSmearEntry:
   #     'smear_type': SmearType,
   #     'smear_length': FixedPrec seconds,
   #     'leap_extra_secs': FixedPrec seconds,
+  #     'smear_tables': SmearTables | None,
   # }
   data: dict[str, FixedPrec]
 
@@ -75,9 +85,35 @@ class UTCSmearToTAIEntry:
   #     'smear_type': SmearType,
   #     'smear_length': FixedPrec seconds,
   #     'leap_extra_secs': FixedPrec seconds,
+  #     'smear_tables': SmearTables | None,
   # }
   data: dict[str, FixedPrec]
 
+class _SmearColumnEntry(NamedTuple):
+  smear_type: SmearType
+  smear_length: FixedPrec
+  leap_extra_secs: FixedPrec
+  smear_tables: SmearTables | None
+
+class _SmearPlanColumns(NamedTuple):
+  # format:
+  # one item per entry of tai_to_utc_smear_table and utc_smear_to_tai_table (which share start times), in order;
+  # smear_tai_offsets is None for SMEAR entries and smears is None for FIXED_OFFSET entries
+  tai_secs: list[TimeStorageType]
+  smear_secs: list[TimeStorageType]
+  smear_tai_offsets: list[TimeStorageType | None]
+  smears: list[_SmearColumnEntry | None]
+
+class _FixedOffsetWindow(NamedTuple):
+  # format:
+  # tai and smeared utc times from start (inclusive) to end (exclusive) have smear_tai_offset between them;
+  # a start or end of None is unbounded
+  tai_start: TimeStorageType | None
+  tai_end: TimeStorageType | None
+  smear_start: TimeStorageType | None
+  smear_end: TimeStorageType | None
+  smear_tai_offset: TimeStorageType
+
 @dataclass
 class LeapSmearPlan():
   # static stuff
@@ -112,13 +148,40 @@ class LeapSmearPlan():
   utc_smear_tai_initial_offset: TimeStorageType = field(init = False)
   tai_to_utc_smear_table: list[TAIToUTCSmearEntry] = field(init = False)
   utc_smear_to_tai_table: list[UTCSmearToTAIEntry] = field(init = False)
+  # (segments, degree), set by use_smear_tables
+  smear_table_size: tuple[int, int] | None = field(init = False, default = None)
+  # the tables as columns, for bisect lookup
+  _table_columns: _SmearPlanColumns = field(init = False, repr = False, compare = False)
+  # TimeInstant.TAI_TO_UTC_OFFSET_TABLE entries the tables were generated from
+  _leap_table_generated: list[dict[str, FixedPrec | bool | None]] = field(init = False, repr = False, compare = False)
+  # the fixed offset after the last smear (None if there are no smears), and the fixed offset window last looked up
+  _final_fixed_offset_window: _FixedOffsetWindow | None = field(init = False, repr = False, compare = False)
+  _last_fixed_offset_window: _FixedOffsetWindow | None = field(init = False, repr = False, compare = False)
   
   def _generate_tables(self):
     self.utc_smear_tai_initial_offset = TimeInstant.UTC_INITIAL_OFFSET_FROM_TAI
     self.tai_to_utc_smear_table = []
     self.utc_smear_to_tai_table = []
-    
-    for i in range(len(TimeInstant.TAI_TO_UTC_OFFSET_TABLE)):
+    self._table_columns = _SmearPlanColumns([], [], [], [])
+    self._add_leap_entries(0)
+  
+  def _update_tables(self):
+    '''
+    Brings the tables up to date with TimeInstant.TAI_TO_UTC_OFFSET_TABLE. If leap seconds were only added to its end,
+    only their entries are appended; otherwise the tables are generated again.
+    '''
+    generated_count = len(self._leap_table_generated)
+    if (
+      self.utc_smear_tai_initial_offset == TimeInstant.UTC_INITIAL_OFFSET_FROM_TAI and
+      TimeInstant.TAI_TO_UTC_OFFSET_TABLE[:generated_count] == self._leap_table_generated
+    ):
+      self._add_leap_entries(generated_count)
+    else:
+      self._generate_tables()
+  
+  def _add_leap_entries(self, start_index: int):
+    'Appends table entries for TimeInstant.TAI_TO_UTC_OFFSET_TABLE[start_index:].'
+    for i in range(start_index, len(TimeInstant.TAI_TO_UTC_OFFSET_TABLE)):
       leap_entry = TimeInstant.TAI_TO_UTC_OFFSET_TABLE[i]
       
       if leap_entry['leap_utc_delta'] <= 0:
@@ -165,10 +228,16 @@ class LeapSmearPlan():
         smear_start_utc = smear_start_tai + start_utc_tai_offset
         smear_end_utc = smear_end_tai + end_utc_tai_offset
         
+        if self.smear_table_size != None and smear_profile.type != SmearType.LINEAR:
+          smear_tables = TimeInstant.get_smear_tables(smear_profile.type, smear_length, -leap_entry['leap_utc_delta'], *self.smear_table_size)
+        else:
+          smear_tables = None
+        
         self.tai_to_utc_smear_table.append(TAIToUTCSmearEntry(SmearTableEntryMode.SMEAR, smear_start_tai, smear_start_utc, {
           'smear_type': smear_profile.type,
           'smear_length': smear_length,
           'leap_extra_secs': -leap_entry['leap_utc_delta'],
+          'smear_tables': smear_tables,
         }))
         
         self.tai_to_utc_smear_table.append(TAIToUTCSmearEntry(SmearTableEntryMode.FIXED_OFFSET, smear_end_tai, smear_end_utc, {
@@ -179,11 +248,55 @@ class LeapSmearPlan():
           'smear_type': smear_profile.type,
           'smear_length': smear_length,
           'leap_extra_secs': -leap_entry['leap_utc_delta'],
+          'smear_tables': smear_tables,
         }))
         
         self.utc_smear_to_tai_table.append(UTCSmearToTAIEntry(SmearTableEntryMode.FIXED_OFFSET, smear_end_tai, smear_end_utc, {
           'tai_smear_offset': -end_utc_tai_offset,
         }))
+        
+        self._table_columns.tai_secs.extend((smear_start_tai, smear_end_tai))
+        self._table_columns.smear_secs.extend((smear_start_utc, smear_end_utc))
+        self._table_columns.smear_tai_offsets.extend((None, end_utc_tai_offset))
+        self._table_columns.smears.extend((_SmearColumnEntry(smear_profile.type, smear_length, -leap_entry['leap_utc_delta'], smear_tables), None))
+    
+    self._leap_table_generated = list(TimeInstant.TAI_TO_UTC_OFFSET_TABLE)
+    
+    table_columns = self._table_columns
+    if len(table_columns.tai_secs) > 0 and table_columns.smears[-1] == None:
+      self._final_fixed_offset_window = self._get_fixed_offset_window(len(table_columns.tai_secs) - 1)
+    else:
+      self._final_fixed_offset_window = None
+    self._last_fixed_offset_window = None
+  
+  def _get_fixed_offset_window(self, table_index: int) -> _FixedOffsetWindow:
+    'Returns the window of the FIXED_OFFSET entry at table_index, or of the initial offset if table_index is -1.'
+    table_columns = self._table_columns
+    
+    if table_index < 0:
+      smear_tai_offset = self.utc_smear_tai_initial_offset
+      tai_start = smear_start = None
+    else:
+      smear_tai_offset = table_columns.smear_tai_offsets[table_index]
+      tai_start = table_columns.tai_secs[table_index]
+      smear_start = table_columns.smear_secs[table_index]
+    
+    if table_index + 1 < len(table_columns.tai_secs):
+      tai_end = table_columns.tai_secs[table_index + 1]
+      smear_end = table_columns.smear_secs[table_index + 1]
+    else:
+      tai_end = smear_end = None
+    
+    return _FixedOffsetWindow(tai_start, tai_end, smear_start, smear_end, smear_tai_offset)
+  
+  def use_smear_tables(self, enabled: bool = True, segments: int = PiecewiseChebyshev.DEFAULT_SEGMENTS, degree: int = PiecewiseChebyshev.DEFAULT_DEGREE) -> None:
+    '''
+    Switches COSINE and BUMP smears of this plan from exact evaluation to TimeInstant.get_smear_tables tables.
+    The max_error of each table estimates its error (it is not a bound); with the defaults it is about 5e-12 s for a
+    1 day smear, the rounding noise of the exact functions.
+    '''
+    self.smear_table_size = (segments, degree) if enabled else None
+    self._generate_tables()
   
   def __post_init__(self):
     self._generate_tables()
@@ -194,6 +307,8 @@ _active_smear_plans: WeakValueDictionary[int, LeapSmearPlan] = WeakValueDictiona
 class TimeInstantLeapSmear(TimeInstMonotonic):
   # static stuff
   
+  MAX_TO_SMEAR_STEPS = 20
+  
   @staticmethod
   def _bump_pos(num: FixedPrec) -> FixedPrec:
     'Function is 0 when num <= 0, and rises smoothly when num > 0.'
@@ -205,7 +320,43 @@ class TimeInstantLeapSmear(TimeInstMonotonic):
   @staticmethod
   def _bump_0_to_1(num: FixedPrec) -> FixedPrec:
     'Function is 0 when num <= 0, 1 when num >= 1, and rises smoothly in the middle.'
-    return TimeInstantLeapSmear._bump_pos(num) / (TimeInstantLeapSmear._bump_pos(num) + TimeInstantLeapSmear._bump_pos(1 - num))
+    bump = TimeInstantLeapSmear._bump_pos(num)
+    return bump / (bump + TimeInstantLeapSmear._bump_pos(1 - num))
+  
+  @staticmethod
+  def _bump_0_to_1_rate(num: FixedPrec) -> FixedPrec:
+    'Derivative of _bump_0_to_1.'
+    if num <= 0 or num >= 1:
+      return FixedPrec(0)
+    else:
+      # _bump_pos'(x) = _bump_pos(x) / x**2
+      bump = TimeInstantLeapSmear._bump_pos(num)
+      bump_flip = TimeInstantLeapSmear._bump_pos(1 - num)
+      if bump == 0 or bump_flip == 0:
+        # near the ends the rate underflows, before num ** 2 or (1 - num) ** 2 does
+        return FixedPrec(0)
+      bump_sum = bump + bump_flip
+      return bump * bump_flip * (1 / (num * num) + 1 / ((1 - num) * (1 - num))) / (bump_sum * bump_sum)
+  
+  @staticmethod
+  def from_smear_rate(smear_type: SmearType, smear_length: TimeStorageType, leap_extra_secs: TimeStorageType, smear_time_in_smear: TimeStorageType) -> FixedPrec:
+    'Returns the derivative of from_smear (tai seconds per smeared second).'
+    smear_time_in_smear = FixedPrec.from_basic(smear_time_in_smear)
+    
+    if not (0 <= smear_time_in_smear <= smear_length):
+      raise ValueError(f'Tai time out of range: 0 <= smear_time <= {smear_length}; smear_time is {smear_time_in_smear}')
+    
+    match smear_type:
+      case SmearType.LINEAR:
+        return FixedPrec.from_basic(smear_length + leap_extra_secs) / smear_length
+      
+      case SmearType.COSINE:
+        half_leap_time = leap_extra_secs / 2
+        pi = smear_time_in_smear.pi()
+        return 1 + half_leap_time * pi / smear_length * (pi * smear_time_in_smear / smear_length).sin()
+      
+      case SmearType.BUMP:
+        return 1 + leap_extra_secs * TimeInstantLeapSmear._bump_0_to_1_rate(smear_time_in_smear / smear_length) / smear_length
   
   @staticmethod
   def to_smear(smear_type: SmearType, smear_length: TimeStorageType, leap_extra_secs: TimeStorageType, tai_time_in_smear: TimeStorageType) -> FixedPrec:
@@ -224,32 +375,34 @@ class TimeInstantLeapSmear(TimeInstMonotonic):
         case SmearType.LINEAR:
           return tai_time_in_smear * smear_length / tai_length
         
-        case SmearType.COSINE:
-          tai_time_in_smear = FixedPrec.from_basic(tai_time_in_smear)
-          epsilon = tai_time_in_smear.smallest_representable() * 2
-          return almost_linear_func_inverse_deriv(
-            lambda x: TimeInstantLeapSmear.from_smear(smear_type, smear_length, leap_extra_secs, x),
-            tai_time_in_smear,
-            epsilon = epsilon,
-            min_val = 0,
-            max_val = smear_length,
-            deriv_epsilon = tai_time_in_smear.smallest_representable() * 10
-          )
-        
-        case SmearType.BUMP:
-          tai_time_in_smear = FixedPrec.from_basic(tai_time_in_smear)
-          epsilon = tai_time_in_smear.smallest_representable() * 2
-          if smear_length * 0.1 < tai_time_in_smear < smear_length * 0.9:
-            # low precision on middle
-            epsilon *= 500_000
-          return almost_linear_func_inverse_deriv(
-            lambda x: TimeInstantLeapSmear.from_smear(smear_type, smear_length, leap_extra_secs, x),
-            tai_time_in_smear,
-            epsilon = epsilon,
-            min_val = 0,
-            max_val = smear_length,
-            deriv_epsilon = tai_time_in_smear.smallest_representable() * 10
-          )
+        case SmearType.COSINE | SmearType.BUMP:
+          # newton's method from the linear smear; the rate of from_smear changes by only ~leap_extra_secs / smear_length**2
+          # per second, so the exact rate at the first guess is kept and each step gains about 10 digits
+          smear_time_in_smear = tai_time_in_smear * smear_length / tai_length
+          rate = TimeInstantLeapSmear.from_smear_rate(smear_type, smear_length, leap_extra_secs, smear_time_in_smear)
+          best_smear_time_in_smear = smear_time_in_smear
+          best_error = None
+          
+          for _ in range(TimeInstantLeapSmear.MAX_TO_SMEAR_STEPS):
+            error = TimeInstantLeapSmear.from_smear(smear_type, smear_length, leap_extra_secs, smear_time_in_smear) - tai_time_in_smear
+            if best_error != None and abs(error) >= best_error:
+              break
+            best_smear_time_in_smear = smear_time_in_smear
+            best_error = abs(error)
+            if error == 0:
+              break
+            smear_time_in_smear = min(max(smear_time_in_smear - error / rate, FixedPrec(0)), FixedPrec.from_basic(smear_length))
+          
+          return best_smear_time_in_smear
+  
+  @classmethod
+  @lru_cache(maxsize = 32)
+  def get_smear_tables(cls, smear_type: SmearType, smear_length: TimeStorageType, leap_extra_secs: TimeStorageType, segments: int = PiecewiseChebyshev.DEFAULT_SEGMENTS, degree: int = PiecewiseChebyshev.DEFAULT_DEGREE) -> SmearTables:
+    'Returns tables of to_smear and from_smear over one smear. Cached since the leap seconds of a plan usually share one smear.'
+    return SmearTables(
+      PiecewiseChebyshev(lambda x: cls.to_smear(smear_type, smear_length, leap_extra_secs, x) - x, 0, smear_length + leap_extra_secs, segments, degree),
+      PiecewiseChebyshev(lambda x: cls.from_smear(smear_type, smear_length, leap_extra_secs, x) - x, 0, smear_length, segments, degree)
+    )
   
   @staticmethod
   def from_smear(smear_type: SmearType, smear_length: TimeStorageType, leap_extra_secs: TimeStorageType, smear_time_in_smear: TimeStorageType) -> FixedPrec:
@@ -284,18 +437,30 @@ class TimeInstantLeapSmear(TimeInstMonotonic):
   
   @classmethod
   def from_secs_since_epoch_smear_utc(cls, smear_plan: LeapSmearPlan, secs_since_epoch: TimeStorageType) -> Self:
-    if len(smear_plan.utc_smear_to_tai_table) == 0:
-      return cls(secs_since_epoch - smear_plan.utc_smear_tai_initial_offset)
+    # fast paths: after the last smear, or in the same fixed offset window as the last lookup
+    window = smear_plan._final_fixed_offset_window
+    if window != None and secs_since_epoch >= window.smear_start:
+      return cls(secs_since_epoch - window.smear_tai_offset)
+    
+    window = smear_plan._last_fixed_offset_window
+    if window != None and (window.smear_start == None or window.smear_start <= secs_since_epoch) and (window.smear_end == None or secs_since_epoch < window.smear_end):
+      return cls(secs_since_epoch - window.smear_tai_offset)
+    
+    table_columns = smear_plan._table_columns
+    table_index = bisect_right(table_columns.smear_secs, secs_since_epoch) - 1
+    
+    smear = table_columns.smears[table_index] if table_index >= 0 else None
+    if smear == None:
+      window = smear_plan._get_fixed_offset_window(table_index)
+      smear_plan._last_fixed_offset_window = window
+      return cls(secs_since_epoch - window.smear_tai_offset)
+    
+    smear_time_in_smear = secs_since_epoch - table_columns.smear_secs[table_index]
+    if smear.smear_tables != None and (table_value := smear.smear_tables.from_smear_delta(smear_time_in_smear)) != None:
+      tai_time_in_smear = smear_time_in_smear + cls._table_value_to_fixed_prec(table_value)
     else:
-      if secs_since_epoch < smear_plan.utc_smear_to_tai_table[0].smear_secs_since_epoch:
-        return cls(secs_since_epoch - smear_plan.utc_smear_tai_initial_offset)
-      else:
-        table_index = binary_search(lambda x: smear_plan.utc_smear_to_tai_table[x].smear_secs_since_epoch <= secs_since_epoch, 0, len(smear_plan.utc_smear_to_tai_table))
-        smear_entry = smear_plan.utc_smear_to_tai_table[table_index]
-        if smear_entry.mode == SmearTableEntryMode.FIXED_OFFSET:
-          return cls(secs_since_epoch + smear_entry.data['tai_smear_offset'])
-        else:
-          return cls(cls.from_smear(smear_entry.data['smear_type'], smear_entry.data['smear_length'], smear_entry.data['leap_extra_secs'], secs_since_epoch - smear_entry.smear_secs_since_epoch) + smear_entry.tai_secs_since_epoch)
+      tai_time_in_smear = cls.from_smear(smear.smear_type, smear.smear_length, smear.leap_extra_secs, smear_time_in_smear)
+    return cls(tai_time_in_smear + table_columns.tai_secs[table_index])
   
   @classmethod
   def from_date_tuple_smear_utc(
@@ -310,18 +475,30 @@ class TimeInstantLeapSmear(TimeInstMonotonic):
     )
   
   def to_secs_since_epoch_smear_utc(self, smear_plan: LeapSmearPlan) -> TimeStorageType:
-    if len(smear_plan.tai_to_utc_smear_table) == 0:
-      return self.time + smear_plan.utc_smear_tai_initial_offset
+    # fast paths: after the last smear, or in the same fixed offset window as the last lookup
+    window = smear_plan._final_fixed_offset_window
+    if window != None and self.time >= window.tai_start:
+      return self.time + window.smear_tai_offset
+    
+    window = smear_plan._last_fixed_offset_window
+    if window != None and (window.tai_start == None or window.tai_start <= self.time) and (window.tai_end == None or self.time < window.tai_end):
+      return self.time + window.smear_tai_offset
+    
+    table_columns = smear_plan._table_columns
+    table_index = bisect_right(table_columns.tai_secs, self.time) - 1
+    
+    smear = table_columns.smears[table_index] if table_index >= 0 else None
+    if smear == None:
+      window = smear_plan._get_fixed_offset_window(table_index)
+      smear_plan._last_fixed_offset_window = window
+      return self.time + window.smear_tai_offset
+    
+    tai_time_in_smear = self.time - table_columns.tai_secs[table_index]
+    if smear.smear_tables != None and (table_value := smear.smear_tables.to_smear_delta(tai_time_in_smear)) != None:
+      smear_time_in_smear = tai_time_in_smear + self._table_value_to_fixed_prec(table_value)
     else:
-      if self.time < smear_plan.tai_to_utc_smear_table[0].tai_secs_since_epoch:
-        return self.time + smear_plan.utc_smear_tai_initial_offset
-      else:
-        table_index = binary_search(lambda x: smear_plan.tai_to_utc_smear_table[x].tai_secs_since_epoch <= self.time, 0, len(smear_plan.tai_to_utc_smear_table))
-        smear_entry = smear_plan.tai_to_utc_smear_table[table_index]
-        if smear_entry.mode == SmearTableEntryMode.FIXED_OFFSET:
-          return self.time + smear_entry.data['smear_tai_offset']
-        else:
-          return self.to_smear(smear_entry.data['smear_type'], smear_entry.data['smear_length'], smear_entry.data['leap_extra_secs'], self.time - smear_entry.tai_secs_since_epoch) + smear_entry.smear_secs_since_epoch
+      smear_time_in_smear = self.to_smear(smear.smear_type, smear.smear_length, smear.leap_extra_secs, tai_time_in_smear)
+    return smear_time_in_smear + table_columns.smear_secs[table_index]
   
   def to_date_tuple_smear_utc(self, smear_plan: LeapSmearPlan, date_cls: type[JulGregBaseDate] = GregorianDate) -> DateTupleBasic:
     return self.epoch_instant_to_date_tuple(self.to_secs_since_epoch_smear_utc(smear_plan), date_cls = date_cls)
@@ -1,10 +1,11 @@
+from collections.abc import Iterable
 from numbers import Integral
 from typing import Self
 
-from ...lib_funcs import almost_linear_func_inverse_deriv
 from ...calendars.jul_greg_base import JulGregBaseDate
 from ...calendars.gregorian import GregorianDate
 from ...fixed_prec import FixedPrec
+from ...piecewise_chebyshev import PiecewiseChebyshev
 from ..lib import TimeStorageType
 from .time_inst_mono import TimeInstMonotonic
 from ...named_tuples import DateTupleBasic
@@ -15,6 +16,92 @@ class TimeInstantSolar(TimeInstMonotonic):
   DEGREES_PER_HOUR_ROTATION = 15
   # https://en.wikipedia.org/wiki/Tropical_year
   UT1_SECS_PER_TROPICAL_YEAR = FixedPrec('365.24217') * TimeInstMonotonic.NOMINAL_SECS_PER_DAY
+  # https://en.wikipedia.org/wiki/Equation_of_time
+  EQUATION_OF_TIME_D_AT_YEAR_START = FixedPrec('6.24004077')
+  EQUATION_OF_TIME_SIN_D_AMPLITUDE = FixedPrec('-7.659')
+  EQUATION_OF_TIME_SIN_2D_AMPLITUDE = FixedPrec('9.863')
+  EQUATION_OF_TIME_SIN_2D_PHASE = FixedPrec('3.5932')
+  EQUATION_OF_TIME_TWO_PI = 2 * FixedPrec(0).pi()
+  # set by use_equation_of_time_table
+  EQUATION_OF_TIME_TABLE: PiecewiseChebyshev | None = None
+  EQUATION_OF_TIME_RATE_TABLE: PiecewiseChebyshev | None = None
+  MAX_TRUE_SOLAR_INVERSE_STEPS = 50
+  
+  @classmethod
+  def _get_equation_of_time_d(cls, secs_since_year_start: FixedPrec) -> FixedPrec:
+    return cls.EQUATION_OF_TIME_D_AT_YEAR_START + secs_since_year_start * cls.EQUATION_OF_TIME_TWO_PI / cls.UT1_SECS_PER_TROPICAL_YEAR
+  
+  @classmethod
+  def _get_equation_of_time_exact(cls, secs_since_year_start: FixedPrec) -> FixedPrec:
+    'Returns true solar time minus mean solar time.'
+    D = cls._get_equation_of_time_d(secs_since_year_start)
+    return (cls.EQUATION_OF_TIME_SIN_D_AMPLITUDE * D.sin() + cls.EQUATION_OF_TIME_SIN_2D_AMPLITUDE * (2 * D + cls.EQUATION_OF_TIME_SIN_2D_PHASE).sin()) * 60
+  
+  @classmethod
+  def _get_equation_of_time(cls, ut1_secs_since_epoch: FixedPrec) -> FixedPrec:
+    secs_since_year_start = ut1_secs_since_epoch % cls.UT1_SECS_PER_TROPICAL_YEAR
+    if cls.EQUATION_OF_TIME_TABLE != None and (table_value := cls.EQUATION_OF_TIME_TABLE(secs_since_year_start)) != None:
+      return cls._table_value_to_fixed_prec(table_value)
+    else:
+      return cls._get_equation_of_time_exact(secs_since_year_start)
+  
+  @classmethod
+  def _get_equation_of_time_rate(cls, ut1_secs_since_epoch: FixedPrec) -> FixedPrec:
+    'Returns the derivative of the equation of time with respect to ut1 seconds.'
+    secs_since_year_start = ut1_secs_since_epoch % cls.UT1_SECS_PER_TROPICAL_YEAR
+    if cls.EQUATION_OF_TIME_RATE_TABLE != None and (table_value := cls.EQUATION_OF_TIME_RATE_TABLE(secs_since_year_start)) != None:
+      return FixedPrec.from_basic(table_value)
+    else:
+      D = cls._get_equation_of_time_d(secs_since_year_start)
+      return (cls.EQUATION_OF_TIME_SIN_D_AMPLITUDE * D.cos() + 2 * cls.EQUATION_OF_TIME_SIN_2D_AMPLITUDE * (2 * D + cls.EQUATION_OF_TIME_SIN_2D_PHASE).cos()) * 60 * cls.EQUATION_OF_TIME_TWO_PI / cls.UT1_SECS_PER_TROPICAL_YEAR
+  
+  @classmethod
+  def _get_ut1_from_mean_solar(cls, mean_solar_secs_since_epoch: FixedPrec) -> FixedPrec:
+    '''
+    Solves ut1 + equation_of_time(ut1) = mean_solar_secs_since_epoch (true solar time with the longitude taken out).
+    The equation of time changes by at most ~30 s per day, so newton's method with the rate from the first guess
+    converges in a few steps.
+    '''
+    
+    ut1_secs_since_epoch = mean_solar_secs_since_epoch - cls._get_equation_of_time(mean_solar_secs_since_epoch)
+    rate = 1 + cls._get_equation_of_time_rate(ut1_secs_since_epoch)
+    best_ut1_secs_since_epoch = None
+    best_error = None
+    
+    # steps until the error is zero or stops shrinking (when rounding makes the answer flip between neighbors)
+    for _ in range(cls.MAX_TRUE_SOLAR_INVERSE_STEPS):
+      error = ut1_secs_since_epoch + cls._get_equation_of_time(ut1_secs_since_epoch) - mean_solar_secs_since_epoch
+      if best_error != None and abs(error) >= best_error:
+        break
+      best_ut1_secs_since_epoch = ut1_secs_since_epoch
+      best_error = abs(error)
+      if error == 0:
+        break
+      ut1_secs_since_epoch -= error / rate
+    
+    return best_ut1_secs_since_epoch
+  
+  @classmethod
+  def _get_longitude_secs_list(cls, longitude_deg: TimeStorageType | Iterable[TimeStorageType], count: int) -> list[TimeStorageType]:
+    secs_per_degree = cls.NOMINAL_SECS_PER_HOUR // cls.DEGREES_PER_HOUR_ROTATION
+    if isinstance(longitude_deg, Iterable):
+      return [longitude * secs_per_degree for longitude in longitude_deg]
+    else:
+      return [longitude_deg * secs_per_degree] * count
+  
+  @classmethod
+  def use_equation_of_time_table(cls, enabled: bool = True, segments: int = PiecewiseChebyshev.DEFAULT_SEGMENTS, degree: int = PiecewiseChebyshev.DEFAULT_DEGREE) -> None:
+    '''
+    Switches true solar time from the exact equation of time series to a PiecewiseChebyshev table of it.
+    The table spans one tropical year, so it covers all dates; with the defaults its max_error (an error estimate, not a
+    bound) is about 3e-9 s, which is the rounding noise of the exact series.
+    '''
+    if enabled:
+      cls.EQUATION_OF_TIME_TABLE = PiecewiseChebyshev(cls._get_equation_of_time_exact, 0, cls.UT1_SECS_PER_TROPICAL_YEAR, segments, degree)
+      cls.EQUATION_OF_TIME_RATE_TABLE = cls.EQUATION_OF_TIME_TABLE.derivative()
+    else:
+      cls.EQUATION_OF_TIME_TABLE = None
+      cls.EQUATION_OF_TIME_RATE_TABLE = None
   
   # instance stuff
   
@@ -22,23 +109,35 @@ class TimeInstantSolar(TimeInstMonotonic):
   
   @classmethod
   def from_secs_since_epoch_solar(cls, longitude_deg: TimeStorageType, true_solar_time: bool, secs_since_epoch_solar: TimeStorageType) -> Self:
+    mean_solar_secs_since_epoch = secs_since_epoch_solar - longitude_deg * (cls.NOMINAL_SECS_PER_HOUR // cls.DEGREES_PER_HOUR_ROTATION)
+    if true_solar_time:
+      return cls.from_secs_since_epoch_mono(cls.TIME_SCALES.UT1, cls._get_ut1_from_mean_solar(FixedPrec.from_basic(mean_solar_secs_since_epoch)))
+    else:
+      return cls.from_secs_since_epoch_mono(cls.TIME_SCALES.UT1, mean_solar_secs_since_epoch)
+  
+  @classmethod
+  def from_secs_since_epoch_solar_many(cls, longitude_deg: TimeStorageType | Iterable[TimeStorageType], true_solar_time: bool, solar_secs_since_epoch_list: Iterable[TimeStorageType]) -> list[Self]:
+    '''
+    Returns from_secs_since_epoch_solar for many times. longitude_deg is one longitude for all times or one per time.
+    Sorted times step through the ut1 offset table instead of searching it.
+    '''
+    
+    solar_secs_since_epoch_list = list(solar_secs_since_epoch_list)
+    longitude_secs_list = cls._get_longitude_secs_list(longitude_deg, len(solar_secs_since_epoch_list))
+    mean_solar_secs_since_epoch_list = [
+      solar_secs_since_epoch - longitude_secs
+      for solar_secs_since_epoch, longitude_secs in zip(solar_secs_since_epoch_list, longitude_secs_list, strict = True)
+    ]
+    
     if true_solar_time:
-      secs_since_epoch_solar = FixedPrec.from_basic(secs_since_epoch_solar)
-      # https://en.wikipedia.org/wiki/Equation_of_time
-      return cls.from_secs_since_epoch_solar(
-        longitude_deg,
-        False,
-        almost_linear_func_inverse_deriv(
-          lambda x: cls.from_secs_since_epoch_solar(longitude_deg, False, x).to_secs_since_epoch_solar(longitude_deg, True),
-          secs_since_epoch_solar,
-          epsilon = secs_since_epoch_solar.smallest_representable() * 2
-        )
-      )
+      ut1_secs_since_epoch_list = [
+        cls._get_ut1_from_mean_solar(FixedPrec.from_basic(mean_solar_secs_since_epoch))
+        for mean_solar_secs_since_epoch in mean_solar_secs_since_epoch_list
+      ]
     else:
-      return cls.from_secs_since_epoch_mono(
-        cls.TIME_SCALES.UT1,
-        secs_since_epoch_solar - longitude_deg * (cls.NOMINAL_SECS_PER_HOUR // cls.DEGREES_PER_HOUR_ROTATION)
-      )
+      ut1_secs_since_epoch_list = mean_solar_secs_since_epoch_list
+    
+    return cls.from_secs_since_epoch_mono_many(cls.TIME_SCALES.UT1, ut1_secs_since_epoch_list)
   
   @classmethod
   def from_date_tuple_solar(
@@ -54,17 +153,45 @@ class TimeInstantSolar(TimeInstMonotonic):
     )
   
   def to_secs_since_epoch_solar(self, longitude_deg: TimeStorageType, true_solar_time: bool) -> TimeStorageType:
+    ut1_secs_since_epoch = self.to_secs_since_epoch_mono(self.TIME_SCALES.UT1)
     if true_solar_time:
-      ut1_secs_since_epoch = self.to_secs_since_epoch_mono(self.TIME_SCALES.UT1)
-      secs_since_year_start = ut1_secs_since_epoch % self.UT1_SECS_PER_TROPICAL_YEAR
-      # https://en.wikipedia.org/wiki/Equation_of_time
-      D: FixedPrec = FixedPrec('6.24004077') + secs_since_year_start * 2 * ut1_secs_since_epoch.pi() / self.UT1_SECS_PER_TROPICAL_YEAR
-      true_mean_delta = (FixedPrec('-7.659') * D.sin() + FixedPrec('9.863') * (2 * D + FixedPrec('3.5932')).sin()) * 60
-      return self.to_secs_since_epoch_solar(longitude_deg, False) + true_mean_delta
+      return ut1_secs_since_epoch + longitude_deg * (self.NOMINAL_SECS_PER_HOUR // self.DEGREES_PER_HOUR_ROTATION) + self._get_equation_of_time(ut1_secs_since_epoch)
     else:
-      ut1_secs_since_epoch = self.to_secs_since_epoch_mono(self.TIME_SCALES.UT1)
       return ut1_secs_since_epoch + longitude_deg * (self.NOMINAL_SECS_PER_HOUR // self.DEGREES_PER_HOUR_ROTATION)
   
+  @classmethod
+  def to_secs_since_epoch_solar_many(cls, instants: Iterable[Self], longitude_deg: TimeStorageType | Iterable[TimeStorageType], true_solar_time: bool) -> list[TimeStorageType]:
+    '''
+    Returns to_secs_since_epoch_solar for many instants. longitude_deg is one longitude for all instants or one per instant.
+    Sorted instants step through the ut1 offset table instead of searching it.
+    '''
+    
+    ut1_secs_since_epoch_list = cls.to_secs_since_epoch_mono_many(instants, cls.TIME_SCALES.UT1)
+    longitude_secs_list = cls._get_longitude_secs_list(longitude_deg, len(ut1_secs_since_epoch_list))
+    
+    if true_solar_time:
+      return [
+        ut1_secs_since_epoch + longitude_secs + cls._get_equation_of_time(ut1_secs_since_epoch)
+        for ut1_secs_since_epoch, longitude_secs in zip(ut1_secs_since_epoch_list, longitude_secs_list, strict = True)
+      ]
+    else:
+      return [
+        ut1_secs_since_epoch + longitude_secs
+        for ut1_secs_since_epoch, longitude_secs in zip(ut1_secs_since_epoch_list, longitude_secs_list, strict = True)
+      ]
+  
+  def to_secs_since_epoch_solar_longitudes(self, longitudes_deg: Iterable[TimeStorageType], true_solar_time: bool) -> list[TimeStorageType]:
+    'Returns to_secs_since_epoch_solar of this instant at many longitudes; ut1 and the equation of time are found once.'
+    
+    ut1_secs_since_epoch = self.to_secs_since_epoch_mono(self.TIME_SCALES.UT1)
+    if true_solar_time:
+      ut1_secs_since_epoch += self._get_equation_of_time(ut1_secs_since_epoch)
+    
+    return [
+      ut1_secs_since_epoch + longitude_deg * (self.NOMINAL_SECS_PER_HOUR // self.DEGREES_PER_HOUR_ROTATION)
+      for longitude_deg in longitudes_deg
+    ]
+  
   def to_date_tuple_solar(self, longitude_deg: TimeStorageType, true_solar_time: bool, date_cls: type[JulGregBaseDate] = GregorianDate) -> DateTupleBasic:
     return self.epoch_instant_to_date_tuple(self.to_secs_since_epoch_solar(longitude_deg, true_solar_time), date_cls = date_cls)
   
@@ -1,5 +1,6 @@
+from enum import Enum
 from numbers import Integral
-from typing import Self
+from typing import Iterable, Iterator, NamedTuple, Self
 
 from ...lib_funcs import binary_search
 from ...exceptions import TimeUnmappableError
@@ -10,54 +11,166 @@ from ..time_zone import TimeZone
 from ...named_tuples import SecsSinceEpochTZ, DateTupleTZ, CurrentTZOffset
 from .time_inst_date_tup import TimeInstantDateTuple
 
+TZResolvePolicy = Enum('TZResolvePolicy', (
+  'EARLIEST',
+  'LATEST',
+  'RAISE',
+  'NONE',
+  'OFFSET_BEFORE',
+  'OFFSET_AFTER',
+))
+
+LocalTimeUnit = Enum('LocalTimeUnit', (
+  'YEAR',
+  'MONTH',
+  'WEEK',
+  'DAY',
+  'HOUR',
+  'MINUTE',
+  'SECOND',
+))
+
+class TZResolveResult(NamedTuple):
+  instants: list
+  ambiguous: list[bool]
+  nonexistent: list[bool]
+
+class _TimeZoneCursor:
+  '''
+  Lookup state for converting many times in one timezone. Keeps the year boundaries and offset
+  table of the last year used, and the last offset table index, so consecutive (especially sorted)
+  times skip the year calculation and table search.
+  '''
+  
+  __slots__ = '_time_zone', '_date_cls', '_year_start_time', '_next_year_start_time', '_offset_times', '_offset_index'
+  _time_zone: TimeZone
+  _date_cls: type[JulGregBaseDate]
+  _year_start_time: Integral | None
+  _next_year_start_time: Integral | None
+  _offset_times: list[dict[str]] | None
+  _offset_index: int
+  
+  def __init__(self, time_zone: TimeZone, date_cls: type[JulGregBaseDate] = GregorianDate):
+    self._time_zone = time_zone
+    self._date_cls = date_cls
+    self._year_start_time = None
+    self._next_year_start_time = None
+    self._offset_times = None
+    self._offset_index = 0
+  
+  def get_year_info(self, secs_since_epoch: TimeStorageType) -> tuple[Integral, list[dict[str]]]:
+    'Returns (year_start_time, offset_times) for the year that a local epoch time is in.'
+    
+    if self._year_start_time == None or not (self._year_start_time <= secs_since_epoch < self._next_year_start_time):
+      days_since_epoch = int(secs_since_epoch // TimeInstantDateTuple.NOMINAL_SECS_PER_DAY)
+      year = self._date_cls.days_since_epoch_to_date(days_since_epoch)[0]
+      self._year_start_time = self._date_cls.date_to_days_since_epoch(year, 1, 1) * TimeInstantDateTuple.NOMINAL_SECS_PER_DAY
+      self._next_year_start_time = self._date_cls.date_to_days_since_epoch(year + 1, 1, 1) * TimeInstantDateTuple.NOMINAL_SECS_PER_DAY
+      self._offset_times = self._time_zone.get_offset_utc_times_for_year(year, date_cls = self._date_cls)
+      self._offset_index = 0
+    
+    return self._year_start_time, self._offset_times
+  
+  def get_offset_index(self, time_in_year: TimeStorageType, key: str) -> int:
+    'Returns the index of the last offset table entry with entry[key] <= time_in_year, or -1 if there is none. Must be called after get_year_info.'
+    
+    offset_times = self._offset_times
+    index = self._offset_index
+    
+    if offset_times[index][key] <= time_in_year:
+      # check the cached entry and the one after it before falling back to a search
+      if index + 1 == len(offset_times) or offset_times[index + 1][key] > time_in_year:
+        return index
+      elif index + 2 == len(offset_times) or offset_times[index + 2][key] > time_in_year:
+        self._offset_index = index + 1
+        return index + 1
+    elif offset_times[0][key] > time_in_year:
+      return -1
+    
+    index = binary_search(lambda x: time_in_year >= offset_times[x][key], 0, len(offset_times))
+    self._offset_index = index
+    return index
+
 class TimeInstantTimeZones(TimeInstantDateTuple):
   # instance stuff
   
   __slots__ = ()
   
   @classmethod
-  def _from_secs_since_epoch_tz_get_secs_raw(
+  def _from_secs_since_epoch_tz_resolve(
       cls,
       time_zone: TimeZone,
       tz_secs_since_epoch: TimeStorageType,
       dst_second_fold: bool,
-      round_invalid_dst_time_upwards: bool,
-      date_cls: type[JulGregBaseDate]
-    ) -> TimeStorageType:
+      cursor: _TimeZoneCursor,
+      nonexistent_fold: bool | None = None
+    ) -> tuple[TimeStorageType, bool, bool]:
+    '''
+    Returns a tuple of the form (secs_since_epoch, ambiguous, nonexistent). Nonexistent times are moved to the end of their dst transition,
+    or if nonexistent_fold is given, converted with the offset before (False) or after (True) the transition, like fold in PEP 495.
+    '''
+    
+    ambiguous = False
+    nonexistent = False
+    
     if len(time_zone.later_offsets) == 0:
       initial_tz_secs_since_epoch = tz_secs_since_epoch
     else:
-      prelim_year = cls.epoch_instant_to_date_tuple(tz_secs_since_epoch, date_cls = date_cls)[0]
-      prelim_year_start_time = cls.date_tuple_to_epoch_instant(prelim_year, 1, 1, 0, 0, 0, 0, date_cls = date_cls)
+      prelim_year_start_time, offset_times = cursor.get_year_info(tz_secs_since_epoch)
       current_offset_time_in_year = tz_secs_since_epoch - prelim_year_start_time
-      offset_times = time_zone.get_offset_utc_times_for_year(prelim_year, date_cls = date_cls)
+      dst_table_index = cursor.get_offset_index(current_offset_time_in_year, 'current_offset_min_time_in_year')
       
-      if offset_times[0]['current_offset_min_time_in_year'] > current_offset_time_in_year:
+      if dst_table_index < 0:
         initial_tz_secs_since_epoch = tz_secs_since_epoch
       else:
-        dst_table_index = binary_search(lambda x: current_offset_time_in_year >= offset_times[x]['current_offset_min_time_in_year'], 0, len(offset_times))
         dst_entry = offset_times[dst_table_index]
         
         if dst_entry['dst_transition_offset'] >= 0:
           # spring forward
           if current_offset_time_in_year - dst_entry['current_offset_start_time_in_year'] < dst_entry['dst_transition_offset']:
             # in middle of spring forward, this time does not map to a physical time
-            if round_invalid_dst_time_upwards:
+            nonexistent = True
+            if nonexistent_fold == None:
               current_offset_time_in_year = dst_entry['current_offset_end_time_in_year']
               tz_secs_since_epoch = current_offset_time_in_year + prelim_year_start_time
-            else:
-              raise TimeUnmappableError('tz time does not map to utc')
           
-          # past the end of spring forward or adjusted to the end
-          initial_tz_secs_since_epoch = tz_secs_since_epoch - (dst_entry['utc_offset'] - time_zone.initial_offset['utc_offset'])
+          if nonexistent and nonexistent_fold == False:
+            # offset before the spring forward
+            initial_tz_secs_since_epoch = tz_secs_since_epoch - (dst_entry['utc_offset'] - dst_entry['dst_transition_offset'] - time_zone.initial_offset.utc_offset)
+          else:
+            # past the end of spring forward, adjusted to the end, or offset after the spring forward
+            initial_tz_secs_since_epoch = tz_secs_since_epoch - (dst_entry['utc_offset'] - time_zone.initial_offset.utc_offset)
         else:
           # fall back
-          if dst_second_fold or current_offset_time_in_year >= dst_entry['current_offset_start_time_in_year']:
-            initial_tz_secs_since_epoch = tz_secs_since_epoch - (dst_entry['utc_offset'] - time_zone.initial_offset['utc_offset'])
+          if current_offset_time_in_year < dst_entry['current_offset_start_time_in_year']:
+            ambiguous = True
+          
+          if dst_second_fold or not ambiguous:
+            initial_tz_secs_since_epoch = tz_secs_since_epoch - (dst_entry['utc_offset'] - time_zone.initial_offset.utc_offset)
           else:
-            initial_tz_secs_since_epoch = tz_secs_since_epoch - (dst_entry['utc_offset'] - time_zone.initial_offset['utc_offset']) + dst_entry['dst_transition_offset']
+            initial_tz_secs_since_epoch = tz_secs_since_epoch - (dst_entry['utc_offset'] - time_zone.initial_offset.utc_offset) + dst_entry['dst_transition_offset']
     
-    secs_since_epoch = initial_tz_secs_since_epoch - time_zone.initial_offset['utc_offset']
+    secs_since_epoch = initial_tz_secs_since_epoch - time_zone.initial_offset.utc_offset
+    
+    return secs_since_epoch, ambiguous, nonexistent
+  
+  @classmethod
+  def _from_secs_since_epoch_tz_get_secs_raw(
+      cls,
+      time_zone: TimeZone,
+      tz_secs_since_epoch: TimeStorageType,
+      dst_second_fold: bool,
+      round_invalid_dst_time_upwards: bool,
+      date_cls: type[JulGregBaseDate],
+      cursor: _TimeZoneCursor | None = None
+    ) -> TimeStorageType:
+    if cursor == None:
+      cursor = _TimeZoneCursor(time_zone, date_cls)
+    
+    secs_since_epoch, _, nonexistent = cls._from_secs_since_epoch_tz_resolve(time_zone, tz_secs_since_epoch, dst_second_fold, cursor)
+    
+    if nonexistent and not round_invalid_dst_time_upwards:
+      raise TimeUnmappableError('tz time does not map to utc')
     
     return secs_since_epoch
   
@@ -82,17 +195,87 @@ class TimeInstantTimeZones(TimeInstantDateTuple):
     return cls.from_secs_since_epoch_utc(secs_since_epoch, leap_second_fold, round_invalid_time_upwards = round_invalid_leap_time_upwards)
   
   @classmethod
-  def from_date_tuple_tz(
+  def _from_secs_since_epoch_tz_using_policy(
       cls,
+      cursor: _TimeZoneCursor,
       time_zone: TimeZone,
-      year: Integral, month: Integral, day: Integral, hour: Integral, minute: Integral, second: Integral, frac_second: TimeStorageType,
-      dst_second_fold: bool = False,
-      round_invalid_dst_time_upwards: bool = True,
+      tz_secs_since_epoch: TimeStorageType,
+      ambiguous_policy: TZResolvePolicy,
+      nonexistent_policy: TZResolvePolicy,
+      round_invalid_leap_time_upwards: bool,
+      leap_second_fold: bool = False
+    ) -> tuple[Self | None, bool, bool]:
+    'Returns a tuple of the form (instant, ambiguous, nonexistent), with instant resolved according to the policies.'
+    
+    # in a fold the offset after the transition gives the later instant, in a gap it gives the earlier one
+    secs_since_epoch, ambiguous, nonexistent = cls._from_secs_since_epoch_tz_resolve(
+      time_zone, tz_secs_since_epoch,
+      ambiguous_policy in (TZResolvePolicy.LATEST, TZResolvePolicy.OFFSET_AFTER),
+      cursor,
+      nonexistent_fold = nonexistent_policy in (TZResolvePolicy.EARLIEST, TZResolvePolicy.OFFSET_AFTER)
+    )
+    
+    if ambiguous:
+      policy = ambiguous_policy
+    elif nonexistent:
+      policy = nonexistent_policy
+    else:
+      policy = None
+    
+    if policy == TZResolvePolicy.NONE:
+      instant = None
+    elif policy == TZResolvePolicy.RAISE:
+      raise TimeUnmappableError(f'tz time {tz_secs_since_epoch} {'is ambiguous' if ambiguous else 'does not map to utc'}')
+    else:
+      instant = cls.from_secs_since_epoch_utc(secs_since_epoch, leap_second_fold, round_invalid_time_upwards = round_invalid_leap_time_upwards)
+    
+    return instant, ambiguous, nonexistent
+  
+  @classmethod
+  def from_secs_since_epoch_tz_many(
+      cls,
+      time_zone: TimeZone,
+      tz_secs_since_epoch_values: Iterable[TimeStorageType],
+      ambiguous_policy: TZResolvePolicy = TZResolvePolicy.EARLIEST,
+      nonexistent_policy: TZResolvePolicy = TZResolvePolicy.EARLIEST,
       round_invalid_leap_time_upwards: bool = True,
       date_cls: type[JulGregBaseDate] = GregorianDate
-    ) -> Self:
-    'Converts a tuple of the form (year, month, day, hour, minute, second, frac_second) into a TimeInstant. Does not handle leap seconds that occur not on a minute boundary, or timezones not on a minute offset.'
+    ) -> TZResolveResult:
+    '''
+    Converts many local epoch times in one timezone into TimeInstants. Returns a tuple of the form (instants, ambiguous, nonexistent),
+    where ambiguous and nonexistent flag times in a dst fold or gap. Ambiguous and nonexistent times resolve to the earlier or later
+    instant with EARLIEST or LATEST, or are converted with the offset before or after the transition with OFFSET_BEFORE or OFFSET_AFTER,
+    like fold=0 and fold=1 in PEP 495 (so in a gap, OFFSET_BEFORE gives the later instant). NONE gives None and RAISE raises TimeUnmappableError.
+    '''
+    
+    cursor = _TimeZoneCursor(time_zone, date_cls)
     
+    instants = []
+    ambiguous_values = []
+    nonexistent_values = []
+    
+    for tz_secs_since_epoch in tz_secs_since_epoch_values:
+      instant, ambiguous, nonexistent = cls._from_secs_since_epoch_tz_using_policy(
+        cursor, time_zone, tz_secs_since_epoch,
+        ambiguous_policy, nonexistent_policy, round_invalid_leap_time_upwards
+      )
+      instants.append(instant)
+      ambiguous_values.append(ambiguous)
+      nonexistent_values.append(nonexistent)
+    
+    return TZResolveResult(instants, ambiguous_values, nonexistent_values)
+  
+  @classmethod
+  def _from_date_tuple_tz_using_cursor(
+      cls,
+      cursor: _TimeZoneCursor,
+      time_zone: TimeZone,
+      year: Integral, month: Integral, day: Integral, hour: Integral, minute: Integral, second: Integral, frac_second: TimeStorageType,
+      dst_second_fold: bool,
+      round_invalid_dst_time_upwards: bool,
+      round_invalid_leap_time_upwards: bool,
+      date_cls: type[JulGregBaseDate]
+    ) -> Self:
     date = date_cls(year, month, day)
     date_mins = cls.days_h_m_to_mins_since_epoch(date.days_since_epoch, hour, minute)
     
@@ -100,66 +283,101 @@ class TimeInstantTimeZones(TimeInstantDateTuple):
     time += second
     time += frac_second
     
-    offset, _ = cls.from_secs_since_epoch_tz(
-      time_zone,
-      time,
+    secs_since_epoch = cls._from_secs_since_epoch_tz_get_secs_raw(
+      time_zone = time_zone,
+      tz_secs_since_epoch = time,
       dst_second_fold = dst_second_fold,
-      leap_second_fold = False,
       round_invalid_dst_time_upwards = round_invalid_dst_time_upwards,
-      round_invalid_leap_time_upwards = round_invalid_leap_time_upwards,
-      date_cls = date_cls
-    ).get_current_tz_offset(time_zone, date_cls = date_cls)
+      date_cls = date_cls,
+      cursor = cursor
+    )
+    
+    offset, _ = cls._get_current_tz_offset_using_secs_raw(time_zone, date_cls, secs_since_epoch, cursor = cursor)
     
     utc_date_mins = date_mins - (offset // cls.NOMINAL_SECS_PER_MIN)
+    leap_fold = cls._get_leap_second_fold(utc_date_mins, second, frac_second)
     
-    if utc_date_mins in cls.LEAP_SECONDS_DICT:
-      leap_entries = cls.LEAP_SECONDS_DICT[utc_date_mins]
-      leap_delta = leap_entries[-1]['utc_delta']
-      if leap_delta < 0:
-        # positive leap second
-        if second + frac_second < -leap_delta:
-          leap_fold = True
-        else:
-          leap_fold = False
-      else:
-        leap_fold = False
-    else:
-      leap_fold = False
+    return cls.from_secs_since_epoch_utc(secs_since_epoch, leap_fold, round_invalid_time_upwards = round_invalid_leap_time_upwards)
+  
+  @classmethod
+  def from_date_tuple_tz(
+      cls,
+      time_zone: TimeZone,
+      year: Integral, month: Integral, day: Integral, hour: Integral, minute: Integral, second: Integral, frac_second: TimeStorageType,
+      dst_second_fold: bool = False,
+      round_invalid_dst_time_upwards: bool = True,
+      round_invalid_leap_time_upwards: bool = True,
+      date_cls: type[JulGregBaseDate] = GregorianDate
+    ) -> Self:
+    'Converts a tuple of the form (year, month, day, hour, minute, second, frac_second) into a TimeInstant. Does not handle leap seconds that occur not on a minute boundary, or timezones not on a minute offset.'
     
-    return cls.from_secs_since_epoch_tz(
+    return cls._from_date_tuple_tz_using_cursor(
+      _TimeZoneCursor(time_zone, date_cls),
       time_zone,
-      time,
+      year, month, day, hour, minute, second, frac_second,
       dst_second_fold = dst_second_fold,
-      leap_second_fold = leap_fold,
       round_invalid_dst_time_upwards = round_invalid_dst_time_upwards,
       round_invalid_leap_time_upwards = round_invalid_leap_time_upwards,
       date_cls = date_cls
     )
   
+  @classmethod
+  def from_date_tuple_tz_many(
+      cls,
+      time_zone: TimeZone,
+      date_tuples: Iterable[tuple],
+      dst_second_fold: bool = False,
+      round_invalid_dst_time_upwards: bool = True,
+      round_invalid_leap_time_upwards: bool = True,
+      date_cls: type[JulGregBaseDate] = GregorianDate
+    ) -> list[Self]:
+    '''
+    Converts many tuples of the form (year, month, day, hour, minute, second, frac_second) in one timezone into TimeInstants.
+    An 8th element (like in DateTupleTZ) overrides dst_second_fold for that tuple. Faster than from_date_tuple_tz per tuple, especially for sorted tuples.
+    '''
+    
+    cursor = _TimeZoneCursor(time_zone, date_cls)
+    
+    return [
+      cls._from_date_tuple_tz_using_cursor(
+        cursor,
+        time_zone,
+        *date_tuple[:7],
+        dst_second_fold = date_tuple[7] if len(date_tuple) > 7 else dst_second_fold,
+        round_invalid_dst_time_upwards = round_invalid_dst_time_upwards,
+        round_invalid_leap_time_upwards = round_invalid_leap_time_upwards,
+        date_cls = date_cls
+      )
+      for date_tuple in date_tuples
+    ]
+  
   @classmethod
   def _to_secs_since_epoch_tz_using_secs_raw(
       cls,
       time_zone: TimeZone,
       date_cls: type[JulGregBaseDate],
-      secs_since_epoch: TimeStorageType
+      secs_since_epoch: TimeStorageType,
+      cursor: _TimeZoneCursor | None = None
     ) -> tuple[TimeStorageType, bool]:
-    initial_tz_secs_since_epoch = secs_since_epoch + time_zone.initial_offset['utc_offset']
+    initial_tz_secs_since_epoch = secs_since_epoch + time_zone.initial_offset.utc_offset
     
     if len(time_zone.later_offsets) == 0:
       tz_secs_since_epoch = initial_tz_secs_since_epoch
       dst_second_fold = False
     else:
-      prelim_year = cls.epoch_instant_to_date_tuple(initial_tz_secs_since_epoch, date_cls = date_cls)[0]
-      prelim_year_start_time = cls.date_tuple_to_epoch_instant(prelim_year, 1, 1, 0, 0, 0, 0, date_cls = date_cls)
+      if cursor == None:
+        cursor = _TimeZoneCursor(time_zone, date_cls)
+      
+      prelim_year_start_time, offset_times = cursor.get_year_info(initial_tz_secs_since_epoch)
       init_offset_time_in_year = initial_tz_secs_since_epoch - prelim_year_start_time
-      offset_times = time_zone.get_offset_utc_times_for_year(prelim_year, date_cls = date_cls)
-      if offset_times[0]['init_offset_start_time_in_year'] > init_offset_time_in_year:
+      dst_table_index = cursor.get_offset_index(init_offset_time_in_year, 'init_offset_start_time_in_year')
+      
+      if dst_table_index < 0:
         tz_secs_since_epoch = initial_tz_secs_since_epoch
         dst_second_fold = False
       else:
-        dst_table_index = binary_search(lambda x: init_offset_time_in_year >= offset_times[x]['init_offset_start_time_in_year'], 0, len(offset_times))
         dst_entry = offset_times[dst_table_index]
-        tz_secs_since_epoch = initial_tz_secs_since_epoch + (dst_entry['utc_offset'] - time_zone.initial_offset['utc_offset'])
+        tz_secs_since_epoch = initial_tz_secs_since_epoch + (dst_entry['utc_offset'] - time_zone.initial_offset.utc_offset)
         if dst_entry['dst_transition_offset'] < 0:
           if init_offset_time_in_year - dst_entry['init_offset_start_time_in_year'] < -dst_entry['dst_transition_offset']:
             dst_second_fold = True
@@ -178,10 +396,100 @@ class TimeInstantTimeZones(TimeInstantDateTuple):
     
     return SecsSinceEpochTZ(tz_secs_since_epoch, dst_second_fold, leap_second_fold)
   
-  def to_date_tuple_tz(self, time_zone: TimeZone, date_cls: type[JulGregBaseDate] = GregorianDate) -> DateTupleTZ:
-    'Returns a date tuple in a timezone. Does not handle leap seconds that occur not on a minute boundary, or timezones not on a minute offset.'
+  @classmethod
+  def _get_leap_run_boundaries(cls) -> list[TimeStorageType]:
+    'Returns the tai instants where the utc - tai offset or the leap second fold changes.'
+    
+    boundaries = []
+    
+    for tai_table_entry in cls.TAI_TO_UTC_OFFSET_TABLE:
+      boundaries.append(tai_table_entry['start_instant'])
+      if not tai_table_entry['positive_leap_second_occurring'] and tai_table_entry['leap_utc_delta'] < 0:
+        # end of the leap second fold
+        boundaries.append(tai_table_entry['start_instant'] - tai_table_entry['leap_utc_delta'])
+    
+    return sorted(boundaries)
+  
+  def _get_tz_run_end(self, time_zone: TimeZone, date_cls: type[JulGregBaseDate]) -> TimeStorageType | None:
+    'Returns the first tai instant after this one where the offset or the dst fold changes, or None if there is none.'
+    
+    # start a day early to catch a dst fold that started before this instant
+    search_start = self.__class__(self._time - self.NOMINAL_SECS_PER_DAY)
+    utc_offset, _ = search_start.get_current_tz_offset(time_zone, date_cls = date_cls)
+    
+    for transition in time_zone.transitions(search_start, date_cls = date_cls):
+      transition_time = transition.instant.time
+      
+      if transition_time > self._time:
+        return transition_time
+      
+      if transition.utc_offset < utc_offset:
+        fold_end_time = transition_time + (utc_offset - transition.utc_offset)
+        if fold_end_time > self._time:
+          return fold_end_time
+      
+      utc_offset = transition.utc_offset
+    
+    return None
+  
+  @classmethod
+  def _iter_secs_since_epoch_tz_runs(cls, instants: Iterable[Self], time_zone: TimeZone, date_cls: type[JulGregBaseDate]) -> Iterator[tuple[Self, SecsSinceEpochTZ, bool]]:
+    '''
+    Yields (instant, to_secs_since_epoch_tz result, run_start) for each instant. Sorted instants are split into runs between
+    dst transitions, dst folds and leap seconds, and each run is converted with one addition. run_start is true for the first
+    instant of each run. Unsorted instants are correct but start more runs.
+    '''
+    
+    leap_run_boundaries = cls._get_leap_run_boundaries()
+    
+    run_start = None
+    run_end = None
+    
+    for instant in instants:
+      time = instant._time
+      
+      if run_start == None or time < run_start or (run_end != None and time >= run_end):
+        tz_secs_since_epoch, dst_second_fold, leap_second_fold = instant.to_secs_since_epoch_tz(time_zone, date_cls = date_cls)
+        run_start = time
+        run_offset = tz_secs_since_epoch - time
+        run_end = instant._get_tz_run_end(time_zone, date_cls)
+        
+        if len(leap_run_boundaries) > 0 and time < leap_run_boundaries[-1]:
+          if time < leap_run_boundaries[0]:
+            leap_run_end = leap_run_boundaries[0]
+          else:
+            leap_run_end = leap_run_boundaries[binary_search(lambda x: time >= leap_run_boundaries[x], 0, len(leap_run_boundaries)) + 1]
+          
+          if run_end == None or leap_run_end < run_end:
+            run_end = leap_run_end
+        
+        yield instant, SecsSinceEpochTZ(tz_secs_since_epoch, dst_second_fold, leap_second_fold), True
+      else:
+        yield instant, SecsSinceEpochTZ(time + run_offset, dst_second_fold, leap_second_fold), False
+  
+  @classmethod
+  def to_secs_since_epoch_tz_many(cls, instants: Iterable[Self], time_zone: TimeZone, date_cls: type[JulGregBaseDate] = GregorianDate) -> list[SecsSinceEpochTZ]:
+    'Returns to_secs_since_epoch_tz for many instants in one timezone. Faster than to_secs_since_epoch_tz per instant, especially for sorted instants.'
+    return [secs_since_epoch_tz for _, secs_since_epoch_tz, _ in cls._iter_secs_since_epoch_tz_runs(instants, time_zone, date_cls)]
+  
+  def _to_secs_since_epoch_tz_leap_split(self, cursor: _TimeZoneCursor, time_zone: TimeZone, date_cls: type[JulGregBaseDate]) -> tuple[TimeStorageType, bool, TimeStorageType | None]:
+    '''
+    Returns the local epoch time, dst second fold, and time into a positive leap second (None outside of one).
+    During a positive leap second the local epoch time is the start of the second before it, as epoch times have no 60th second.
+    '''
+    
+    utc_info = self.to_utc_info()
+    tz_secs_since_epoch, dst_second_fold = self._to_secs_since_epoch_tz_using_secs_raw(time_zone, date_cls, self.to_secs_since_epoch_utc()[0], cursor = cursor)
+    
+    if utc_info['positive_leap_second_occurring']:
+      time_in_leap = self._time - utc_info['last_leap_transition_time']
+      return tz_secs_since_epoch - 1 - time_in_leap, dst_second_fold, time_in_leap
+    else:
+      return tz_secs_since_epoch, dst_second_fold, None
+  
+  def _to_date_tuple_tz_using_cursor(self, cursor: _TimeZoneCursor, time_zone: TimeZone, date_cls: type[JulGregBaseDate]) -> DateTupleTZ:
     utc_info = self.to_utc_info()
-    tz_secs_since_epoch, dst_second_fold, _ = self.to_secs_since_epoch_tz(time_zone, date_cls = date_cls)
+    tz_secs_since_epoch, dst_second_fold = self._to_secs_since_epoch_tz_using_secs_raw(time_zone, date_cls, self.to_secs_since_epoch_utc()[0], cursor = cursor)
     if utc_info['positive_leap_second_occurring']:
       time_in_leap = self._time - utc_info['last_leap_transition_time']
       tz_secs_since_epoch -= 1 + time_in_leap
@@ -192,6 +500,16 @@ class TimeInstantTimeZones(TimeInstantDateTuple):
       second = int(second + second_addl)
     return DateTupleTZ(*date, hour, minute, second, frac_second, dst_second_fold)
   
+  def to_date_tuple_tz(self, time_zone: TimeZone, date_cls: type[JulGregBaseDate] = GregorianDate) -> DateTupleTZ:
+    'Returns a date tuple in a timezone. Does not handle leap seconds that occur not on a minute boundary, or timezones not on a minute offset.'
+    return self._to_date_tuple_tz_using_cursor(_TimeZoneCursor(time_zone, date_cls), time_zone, date_cls)
+  
+  @classmethod
+  def to_date_tuple_tz_many(cls, instants: Iterable[Self], time_zone: TimeZone, date_cls: type[JulGregBaseDate] = GregorianDate) -> list[DateTupleTZ]:
+    'Returns date tuples in one timezone for many instants. Faster than to_date_tuple_tz per instant, especially for sorted instants.'
+    cursor = _TimeZoneCursor(time_zone, date_cls)
+    return [instant._to_date_tuple_tz_using_cursor(cursor, time_zone, date_cls) for instant in instants]
+  
   def get_date_object_tz[T: JulGregBaseDate](self, time_zone: TimeZone, date_cls: type[T] = GregorianDate) -> T:
     return date_cls(*self.to_date_tuple_tz(time_zone, date_cls = date_cls)[:3])
   
@@ -199,25 +517,28 @@ class TimeInstantTimeZones(TimeInstantDateTuple):
   def _get_current_tz_offset_using_secs_raw(
       cls,
       time_zone: TimeZone, date_cls: type[JulGregBaseDate],
-      secs_since_epoch: TimeStorageType
+      secs_since_epoch: TimeStorageType,
+      cursor: _TimeZoneCursor | None = None
     ) -> CurrentTZOffset:
-    initial_tz_secs_since_epoch = secs_since_epoch + time_zone.initial_offset['utc_offset']
-    offset = time_zone.initial_offset['utc_offset']
+    initial_tz_secs_since_epoch = secs_since_epoch + time_zone.initial_offset.utc_offset
+    offset = time_zone.initial_offset.utc_offset
     
     if len(time_zone.later_offsets) != 0:
-      prelim_year = cls.epoch_instant_to_date_tuple(initial_tz_secs_since_epoch, date_cls = date_cls)[0]
-      prelim_year_start_time = cls.date_tuple_to_epoch_instant(prelim_year, 1, 1, 0, 0, 0, 0, date_cls = date_cls)
+      if cursor == None:
+        cursor = _TimeZoneCursor(time_zone, date_cls)
+      
+      prelim_year_start_time, offset_times = cursor.get_year_info(initial_tz_secs_since_epoch)
       init_offset_time_in_year = initial_tz_secs_since_epoch - prelim_year_start_time
-      offset_times = time_zone.get_offset_utc_times_for_year(prelim_year, date_cls = date_cls)
-      if offset_times[0]['init_offset_start_time_in_year'] <= init_offset_time_in_year:
-        dst_table_index = binary_search(lambda x: init_offset_time_in_year >= offset_times[x]['init_offset_start_time_in_year'], 0, len(offset_times))
+      dst_table_index = cursor.get_offset_index(init_offset_time_in_year, 'init_offset_start_time_in_year')
+      
+      if dst_table_index >= 0:
         dst_entry = offset_times[dst_table_index]
-        offset += (dst_entry['utc_offset'] - time_zone.initial_offset['utc_offset'])
+        offset += (dst_entry['utc_offset'] - time_zone.initial_offset.utc_offset)
         offset_abbr = dst_entry['abbreviation']
       else:
-        offset_abbr = time_zone.initial_offset['abbreviation']
+        offset_abbr = time_zone.initial_offset.abbreviation
     else:
-      offset_abbr = time_zone.initial_offset['abbreviation']
+      offset_abbr = time_zone.initial_offset.abbreviation
     
     return CurrentTZOffset(offset, offset_abbr)
   
@@ -229,3 +550,205 @@ class TimeInstantTimeZones(TimeInstantDateTuple):
       date_cls,
       secs_since_epoch
     )
+  
+  @classmethod
+  def _add_calendar_units_tz_secs(
+      cls,
+      tz_secs_since_epoch: TimeStorageType,
+      years: Integral, months: Integral, days: Integral,
+      date_cls: type[JulGregBaseDate]
+    ) -> TimeStorageType:
+    'Adds calendar units to a local epoch time, keeping the time of day. The day is clamped to the end of the month if needed.'
+    
+    days_since_epoch, time_in_day = divmod(tz_secs_since_epoch, cls.NOMINAL_SECS_PER_DAY)
+    days_since_epoch = int(days_since_epoch)
+    
+    if years != 0 or months != 0:
+      year, month, day = date_cls.days_since_epoch_to_date(days_since_epoch)
+      year_addl, month = divmod(month - 1 + months, date_cls.MONTHS_IN_YEAR)
+      year += years + year_addl
+      month += 1
+      day = min(day, date_cls.days_in_month(year, month))
+      days_since_epoch = date_cls.date_to_days_since_epoch(year, month, day)
+    
+    return (days_since_epoch + days) * cls.NOMINAL_SECS_PER_DAY + time_in_day
+  
+  def _add_local_using_cursor(
+      self,
+      cursor: _TimeZoneCursor,
+      time_zone: TimeZone,
+      years: Integral, months: Integral, days: Integral,
+      hours: Integral, minutes: Integral, seconds: TimeStorageType,
+      ambiguous_policy: TZResolvePolicy,
+      nonexistent_policy: TZResolvePolicy,
+      date_cls: type[JulGregBaseDate]
+    ) -> Self | None:
+    if years != 0 or months != 0 or days != 0:
+      tz_secs_since_epoch, _, time_in_leap = self._to_secs_since_epoch_tz_leap_split(cursor, time_zone, date_cls)
+      if time_in_leap != None:
+        # a leap second is clamped to the second before it, like a day past the end of a month
+        tz_secs_since_epoch += time_in_leap
+      tz_secs_since_epoch = self._add_calendar_units_tz_secs(tz_secs_since_epoch, years, months, days, date_cls)
+      # the wall clock result is never the 60th second, so it is the second fold of its epoch time
+      result, _, _ = self._from_secs_since_epoch_tz_using_policy(
+        cursor, time_zone, tz_secs_since_epoch,
+        ambiguous_policy, nonexistent_policy, True,
+        leap_second_fold = True
+      )
+      
+      if result == None:
+        return None
+    else:
+      result = self
+    
+    elapsed_secs = hours * self.NOMINAL_SECS_PER_HOUR + minutes * self.NOMINAL_SECS_PER_MIN + seconds
+    
+    if elapsed_secs != 0:
+      return self.__class__(result.time + elapsed_secs)
+    else:
+      return result
+  
+  def add_local(
+      self,
+      time_zone: TimeZone,
+      years: Integral = 0, months: Integral = 0, days: Integral = 0,
+      hours: Integral = 0, minutes: Integral = 0, seconds: TimeStorageType = 0,
+      ambiguous_policy: TZResolvePolicy = TZResolvePolicy.EARLIEST,
+      nonexistent_policy: TZResolvePolicy = TZResolvePolicy.EARLIEST,
+      date_cls: type[JulGregBaseDate] = GregorianDate
+    ) -> Self | None:
+    '''
+    Adds years, months and days on the local wall clock of a timezone (keeping the local time of day, and clamping the day to the end
+    of the month, and a leap second to the second before it), then adds hours, minutes and seconds as elapsed time. A wall clock result in a dst fold or gap is resolved using
+    ambiguous_policy or nonexistent_policy, as in from_secs_since_epoch_tz_many.
+    '''
+    
+    return self._add_local_using_cursor(
+      _TimeZoneCursor(time_zone, date_cls),
+      time_zone,
+      years, months, days, hours, minutes, seconds,
+      ambiguous_policy, nonexistent_policy, date_cls
+    )
+  
+  @classmethod
+  def add_local_many(
+      cls,
+      instants: Iterable[Self],
+      time_zone: TimeZone,
+      years: Integral = 0, months: Integral = 0, days: Integral = 0,
+      hours: Integral = 0, minutes: Integral = 0, seconds: TimeStorageType = 0,
+      ambiguous_policy: TZResolvePolicy = TZResolvePolicy.EARLIEST,
+      nonexistent_policy: TZResolvePolicy = TZResolvePolicy.EARLIEST,
+      date_cls: type[JulGregBaseDate] = GregorianDate
+    ) -> list[Self | None]:
+    'Applies add_local to many instants in one timezone.'
+    
+    cursor = _TimeZoneCursor(time_zone, date_cls)
+    
+    return [
+      instant._add_local_using_cursor(
+        cursor,
+        time_zone,
+        years, months, days, hours, minutes, seconds,
+        ambiguous_policy, nonexistent_policy, date_cls
+      )
+      for instant in instants
+    ]
+  
+  @classmethod
+  def _round_tz_secs_to_unit(
+      cls,
+      tz_secs_since_epoch: TimeStorageType,
+      unit: LocalTimeUnit,
+      ceil: bool,
+      week_start_day: Integral,
+      date_cls: type[JulGregBaseDate]
+    ) -> TimeStorageType:
+    'Rounds a local epoch time down (or up if ceil) to a multiple of unit on the local wall clock.'
+    
+    days_since_epoch, time_in_day = divmod(tz_secs_since_epoch, cls.NOMINAL_SECS_PER_DAY)
+    days_since_epoch = int(days_since_epoch)
+    
+    if unit == LocalTimeUnit.YEAR or unit == LocalTimeUnit.MONTH:
+      year, month, _ = date_cls.days_since_epoch_to_date(days_since_epoch)
+      if unit == LocalTimeUnit.YEAR:
+        month = 1
+      start_days = date_cls.date_to_days_since_epoch(year, month, 1)
+      if ceil and (start_days != days_since_epoch or time_in_day != 0):
+        start_days = date_cls.date_to_days_since_epoch(year + (unit == LocalTimeUnit.YEAR), month + (unit == LocalTimeUnit.MONTH), 1)
+      return start_days * cls.NOMINAL_SECS_PER_DAY
+    elif unit == LocalTimeUnit.WEEK or unit == LocalTimeUnit.DAY:
+      if unit == LocalTimeUnit.WEEK:
+        start_days = days_since_epoch - (days_since_epoch + date_cls.DAY_OF_WEEK_OFFSET - week_start_day) % date_cls.DAYS_IN_WEEK
+        unit_days = date_cls.DAYS_IN_WEEK
+      else:
+        start_days = days_since_epoch
+        unit_days = 1
+      if ceil and (start_days != days_since_epoch or time_in_day != 0):
+        start_days += unit_days
+      return start_days * cls.NOMINAL_SECS_PER_DAY
+    else:
+      if unit == LocalTimeUnit.HOUR:
+        unit_secs = cls.NOMINAL_SECS_PER_HOUR
+      elif unit == LocalTimeUnit.MINUTE:
+        unit_secs = cls.NOMINAL_SECS_PER_MIN
+      elif unit == LocalTimeUnit.SECOND:
+        unit_secs = 1
+      else:
+        raise ValueError(f'Local time unit {unit} unrecognized')
+      start_time_in_day = time_in_day - time_in_day % unit_secs
+      if ceil and start_time_in_day != time_in_day:
+        start_time_in_day += unit_secs
+      return days_since_epoch * cls.NOMINAL_SECS_PER_DAY + start_time_in_day
+  
+  def _round_local_using_cursor(
+      self,
+      cursor: _TimeZoneCursor,
+      time_zone: TimeZone,
+      unit: LocalTimeUnit,
+      ceil: bool,
+      week_start_day: Integral,
+      date_cls: type[JulGregBaseDate]
+    ) -> Self:
+    tz_secs_since_epoch, dst_second_fold, time_in_leap = self._to_secs_since_epoch_tz_leap_split(cursor, time_zone, date_cls)
+    
+    if time_in_leap != None:
+      if unit == LocalTimeUnit.SECOND:
+        if time_in_leap == 0:
+          return self
+        else:
+          return self.__class__(self._time - time_in_leap + ceil)
+      
+      # every larger unit containing the leap second also contains the second before it, which is not at a unit boundary
+      rounded_tz_secs_since_epoch = self._round_tz_secs_to_unit(tz_secs_since_epoch, unit, ceil, week_start_day, date_cls)
+    else:
+      rounded_tz_secs_since_epoch = self._round_tz_secs_to_unit(tz_secs_since_epoch, unit, ceil, week_start_day, date_cls)
+      
+      if rounded_tz_secs_since_epoch == tz_secs_since_epoch:
+        return self
+    
+    # resolving in the same pass through a dst fold as this instant keeps floor <= instant <= ceil,
+    # and a rounded time in a dst gap becomes the end of the gap, which is also on the correct side
+    secs_since_epoch, _, _ = self._from_secs_since_epoch_tz_resolve(time_zone, rounded_tz_secs_since_epoch, dst_second_fold, cursor)
+    # unit starts are never the 60th second, so a start just after a leap second is the second fold of its epoch time
+    return self.from_secs_since_epoch_utc(secs_since_epoch, True)
+  
+  def floor_local(self, time_zone: TimeZone, unit: LocalTimeUnit, week_start_day: Integral = 0, date_cls: type[JulGregBaseDate] = GregorianDate) -> Self:
+    'Returns the start of the local year, month, week (starting on week_start_day, 0 = sunday), day, hour, minute or second containing this instant.'
+    return self._round_local_using_cursor(_TimeZoneCursor(time_zone, date_cls), time_zone, unit, False, week_start_day, date_cls)
+  
+  def ceil_local(self, time_zone: TimeZone, unit: LocalTimeUnit, week_start_day: Integral = 0, date_cls: type[JulGregBaseDate] = GregorianDate) -> Self:
+    'Returns the start of the next local unit (as in floor_local), or this instant if it is already at the start of one.'
+    return self._round_local_using_cursor(_TimeZoneCursor(time_zone, date_cls), time_zone, unit, True, week_start_day, date_cls)
+  
+  @classmethod
+  def floor_local_many(cls, instants: Iterable[Self], time_zone: TimeZone, unit: LocalTimeUnit, week_start_day: Integral = 0, date_cls: type[JulGregBaseDate] = GregorianDate) -> list[Self]:
+    'Applies floor_local to many instants in one timezone, such as for bucketing them into local days or months.'
+    cursor = _TimeZoneCursor(time_zone, date_cls)
+    return [instant._round_local_using_cursor(cursor, time_zone, unit, False, week_start_day, date_cls) for instant in instants]
+  
+  @classmethod
+  def ceil_local_many(cls, instants: Iterable[Self], time_zone: TimeZone, unit: LocalTimeUnit, week_start_day: Integral = 0, date_cls: type[JulGregBaseDate] = GregorianDate) -> list[Self]:
+    'Applies ceil_local to many instants in one timezone.'
+    cursor = _TimeZoneCursor(time_zone, date_cls)
+    return [instant._round_local_using_cursor(cursor, time_zone, unit, True, week_start_day, date_cls) for instant in instants]
@@ -1,26 +1,168 @@
+from abc import abstractmethod
+from collections.abc import Callable, Iterator, Mapping
+from dataclasses import dataclass, field
 from enum import Enum
 from functools import lru_cache
 from numbers import Integral
-from typing import Iterable
+from typing import Iterable, NamedTuple, Self
+from weakref import WeakValueDictionary
 
 from ..fixed_prec import FixedPrec
 from ..calendars.jul_greg_base import JulGregBaseDate
 from ..calendars.gregorian import GregorianDate
+from .lib import TimeStorageType
 from .time_instant import time_inst
 
+# top-level definition for pickle support
+OffsetDayMode = Enum('OffsetDayMode', (
+  'MONTH_AND_DAY',
+  'MONTH_WEEK_DAY',
+  'MONTH_WEEKDAY_DAY_GE',
+  'MONTH_WEEKDAY_DAY_LE',
+))
+
+class TimeZoneTransition(NamedTuple):
+  instant: 'time_inst.TimeInstant'
+  utc_offset: FixedPrec
+  abbreviation: str | None
+  is_dst: bool
+
+class TimeZoneOffsetInterval(NamedTuple):
+  start: 'time_inst.TimeInstant'
+  end: 'time_inst.TimeInstant'
+  utc_offset: FixedPrec
+  abbreviation: str | None
+  is_dst: bool
+
+class _OffsetMapping(Mapping):
+  'Read only dict view of an offset rule, for code written against the dict format.'
+  
+  __slots__ = ()
+  
+  @abstractmethod
+  def _dict_keys(self) -> tuple[str, ...]:
+    ...
+  
+  def __getitem__(self, key: str):
+    if key in self._dict_keys():
+      return getattr(self, key)
+    else:
+      raise KeyError(key)
+  
+  def __iter__(self) -> Iterator[str]:
+    return iter(self._dict_keys())
+  
+  def __len__(self) -> int:
+    return len(self._dict_keys())
+  
+  def to_dict(self) -> dict[str]:
+    return {key: getattr(self, key) for key in self._dict_keys()}
+  
+  def __hash__(self):
+    return hash(tuple(self.items()))
+  
+  def __eq__(self, other: Mapping | None):
+    if other is None:
+      return False
+    
+    if isinstance(other, Mapping):
+      return self.to_dict() == dict(other.items())
+    else:
+      return NotImplemented
+
+@dataclass(frozen = True, slots = True, eq = False)
+class TimeZoneInitialOffset(_OffsetMapping):
+  utc_offset: FixedPrec
+  abbreviation: str | None
+  name: str | None
+  
+  def _dict_keys(self) -> tuple[str, ...]:
+    return _initial_offset_keys
+
+_initial_offset_keys = 'utc_offset', 'abbreviation', 'name'
+
+@dataclass(frozen = True, slots = True, eq = False)
+class TimeZoneLaterOffset(_OffsetMapping):
+  offset_day_mode: OffsetDayMode
+  month: Integral
+  day: Integral | None
+  week: Integral | None
+  day_in_week: Integral | None
+  from_month_end: bool | None
+  start_time_in_day: FixedPrec
+  utc_offset: FixedPrec
+  abbreviation: str | None
+  name: str | None
+  # offset_day_mode resolved once, as the function giving the days since epoch in a year
+  _realize_days_func: Callable = field(init = False, repr = False)
+  
+  def __post_init__(self):
+    object.__setattr__(self, '_realize_days_func', _later_offset_modes[self.offset_day_mode][0])
+  
+  def _dict_keys(self) -> tuple[str, ...]:
+    return _later_offset_modes[self.offset_day_mode][1]
+  
+  def realize_days(self, year: Integral, date_cls: type[JulGregBaseDate] = GregorianDate) -> Integral:
+    'Returns the days since epoch of the day this offset starts on in the given year.'
+    return self._realize_days_func(self, year, date_cls)
+  
+  def realize_days_for_years(self, start_year: Integral, end_year: Integral, date_cls: type[JulGregBaseDate] = GregorianDate) -> list[Integral]:
+    'Returns the days since epoch of the day this offset starts on for each year in range(start_year, end_year).'
+    realize_days_func = self._realize_days_func
+    return [realize_days_func(self, year, date_cls) for year in range(start_year, end_year)]
+  
+  def realize[T: JulGregBaseDate](self, year: Integral, date_cls: type[T] = GregorianDate) -> T:
+    'Returns the date this offset starts on in the given year.'
+    return date_cls(self._realize_days_func(self, year, date_cls))
+
+def _realize_days_month_and_day(entry: TimeZoneLaterOffset, year: Integral, date_cls: type[JulGregBaseDate]) -> Integral:
+  if not (1 <= entry.day <= date_cls.days_in_month(year, entry.month)):
+    raise ValueError(f'day {year}-{entry.month}-{entry.day} out of range, must be between 1 and {date_cls.days_in_month(year, entry.month)}')
+  return date_cls.date_to_days_since_epoch(year, entry.month, entry.day)
+
+def _realize_days_month_week_day(entry: TimeZoneLaterOffset, year: Integral, date_cls: type[JulGregBaseDate]) -> Integral:
+  return date_cls.month_week_day_to_days_since_epoch(year, entry.month, entry.week, entry.day_in_week, from_month_end = entry.from_month_end)
+
+def _realize_days_month_weekday_day_ge(entry: TimeZoneLaterOffset, year: Integral, date_cls: type[JulGregBaseDate]) -> Integral:
+  return date_cls.month_day_of_week_comp_day_to_days_since_epoch(year, entry.month, entry.day, entry.day_in_week, greater_than_equals = True)
+
+def _realize_days_month_weekday_day_le(entry: TimeZoneLaterOffset, year: Integral, date_cls: type[JulGregBaseDate]) -> Integral:
+  return date_cls.month_day_of_week_comp_day_to_days_since_epoch(year, entry.month, entry.day, entry.day_in_week, greater_than_equals = False)
+
+# format:
+# {
+#   OffsetDayMode: (days since epoch function, dict keys),
+#   ...
+# }
+_later_offset_modes = {
+  OffsetDayMode.MONTH_AND_DAY: (
+    _realize_days_month_and_day,
+    ('offset_day_mode', 'month', 'day', 'start_time_in_day', 'utc_offset', 'abbreviation', 'name'),
+  ),
+  OffsetDayMode.MONTH_WEEK_DAY: (
+    _realize_days_month_week_day,
+    ('offset_day_mode', 'month', 'week', 'day_in_week', 'from_month_end', 'start_time_in_day', 'utc_offset', 'abbreviation', 'name'),
+  ),
+  OffsetDayMode.MONTH_WEEKDAY_DAY_GE: (
+    _realize_days_month_weekday_day_ge,
+    ('offset_day_mode', 'month', 'day_in_week', 'day', 'start_time_in_day', 'utc_offset', 'abbreviation', 'name'),
+  ),
+  OffsetDayMode.MONTH_WEEKDAY_DAY_LE: (
+    _realize_days_month_weekday_day_le,
+    ('offset_day_mode', 'month', 'day_in_week', 'day', 'start_time_in_day', 'utc_offset', 'abbreviation', 'name'),
+  ),
+}
+
 class TimeZone:
   # static stuff
   
-  OffsetDayMode = Enum('OffsetDayMode', (
-    'MONTH_AND_DAY',
-    'MONTH_WEEK_DAY',
-    'MONTH_WEEKDAY_DAY_GE',
-    'MONTH_WEEKDAY_DAY_LE',
-  ))
+  OffsetDayMode = OffsetDayMode
   
   @classmethod
-  def realize_offset_entry[T: type[JulGregBaseDate]](cls, year: Integral, offset_day_entry: dict[str], date_cls: T = GregorianDate) -> T:
-    if offset_day_entry['offset_day_mode'] == cls.OffsetDayMode.MONTH_AND_DAY:
+  def realize_offset_entry[T: type[JulGregBaseDate]](cls, year: Integral, offset_day_entry: TimeZoneLaterOffset | dict[str], date_cls: T = GregorianDate) -> T:
+    if isinstance(offset_day_entry, TimeZoneLaterOffset):
+      return offset_day_entry.realize(year, date_cls = date_cls)
+    elif offset_day_entry['offset_day_mode'] == cls.OffsetDayMode.MONTH_AND_DAY:
       return date_cls(year, offset_day_entry['month'], offset_day_entry['day'])
     elif offset_day_entry['offset_day_mode'] == cls.OffsetDayMode.MONTH_WEEK_DAY:
       return date_cls.from_month_week_day(
@@ -41,13 +183,23 @@ class TimeZone:
         greater_than_equals = False
       )
   
+  _interned_zones: WeakValueDictionary[tuple, 'TimeZone'] = WeakValueDictionary()
+  
+  @classmethod
+  def intern(cls, time_zone: Self) -> Self:
+    'Returns the registered TimeZone equal to time_zone, registering time_zone if there is none, so that equal zones share one object (and cache).'
+    return cls._interned_zones.setdefault(time_zone.to_hashable_tuple(), time_zone)
+  
   # instance stuff
   
-  __slots__ = '_base_utc_offset', '_data_name', '_initial_offset', '_later_offsets'
+  __slots__ = '_base_utc_offset', '_data_name', '_initial_offset', '_later_offsets', '_hashable_tuple', '_hash', '__weakref__'
   _base_utc_offset: FixedPrec
   _data_name: str
-  _initial_offset: dict[str]
-  _later_offsets: tuple[dict[str], ...]
+  _initial_offset: TimeZoneInitialOffset
+  _later_offsets: tuple[TimeZoneLaterOffset, ...]
+  _hashable_tuple: tuple
+  _hash: int
+  _pickled_slots = '_base_utc_offset', '_data_name', '_initial_offset', '_later_offsets', '_hashable_tuple'
   
   def __init__(
       self,
@@ -61,20 +213,22 @@ class TimeZone:
     else:
       self._base_utc_offset = base_utc_offset
     
-    self._initial_offset = {}
-    
     if initial_offset != None:
       if coerce_to_fixed_prec and not isinstance(initial_offset['utc_offset'], FixedPrec):
-        self._initial_offset['utc_offset'] = FixedPrec.from_basic(initial_offset['utc_offset'])
+        initial_utc_offset = FixedPrec.from_basic(initial_offset['utc_offset'])
       else:
-        self._initial_offset['utc_offset'] = initial_offset['utc_offset']
+        initial_utc_offset = initial_offset['utc_offset']
       
-      self._initial_offset['abbreviation'] = initial_offset.get('abbreviation', None)
-      self._initial_offset['name'] = initial_offset.get('name', None)
+      self._initial_offset = TimeZoneInitialOffset(
+        initial_utc_offset,
+        initial_offset.get('abbreviation', None),
+        initial_offset.get('name', None)
+      )
     else:
-      self._initial_offset['utc_offset'] = base_utc_offset
-      self._initial_offset['abbreviation'] = None
-      self._initial_offset['name'] = None
+      self._initial_offset = TimeZoneInitialOffset(self._base_utc_offset, None, None)
+    
+    # initial_offset and later_offsets are given as dicts (or the rule objects themselves)
+    # and stored as immutable rule objects, which also act as read only dicts
     
     # format for initial_offset:
     # {
@@ -95,6 +249,10 @@ class TimeZone:
     #       'week': Integer,
     #       'day_in_week': Integer,
     #       'from_month_end': bool,
+    #     elif offset_day_mode in (MONTH_WEEKDAY_DAY_GE, MONTH_WEEKDAY_DAY_LE):
+    #       'month': Integer,
+    #       'day_in_week': Integer,
+    #       'day': Integer,
     #     'start_time_in_day': FixedPrec seconds,
     #     'utc_offset': FixedPrec seconds,
     #     'abbreviation': str | None,
@@ -105,61 +263,104 @@ class TimeZone:
     later_offsets_processed = []
     
     for offset_entry in later_offsets:
-      offset_entry_processed = {}
-      
-      offset_entry_processed['offset_day_mode'] = offset_entry['offset_day_mode']
+      offset_day_mode = offset_entry['offset_day_mode']
       
-      offset_entry_processed['month'] = offset_entry['month']
-      if offset_entry_processed['offset_day_mode'] == self.OffsetDayMode.MONTH_AND_DAY:
-        offset_entry_processed['day'] = offset_entry['day']
-      elif offset_entry_processed['offset_day_mode'] == self.OffsetDayMode.MONTH_WEEK_DAY:
-        offset_entry_processed['week'] = offset_entry['week']
-        offset_entry_processed['day_in_week'] = offset_entry['day_in_week']
-        offset_entry_processed['from_month_end'] = offset_entry['from_month_end']
-      elif offset_entry_processed['offset_day_mode'] == self.OffsetDayMode.MONTH_WEEKDAY_DAY_GE:
-        offset_entry_processed['day_in_week'] = offset_entry['day_in_week']
-        offset_entry_processed['day'] = offset_entry['day']
-      elif offset_entry_processed['offset_day_mode'] == self.OffsetDayMode.MONTH_WEEKDAY_DAY_LE:
-        offset_entry_processed['day_in_week'] = offset_entry['day_in_week']
-        offset_entry_processed['day'] = offset_entry['day']
+      if offset_day_mode == self.OffsetDayMode.MONTH_AND_DAY:
+        day = offset_entry['day']
+        week = None
+        day_in_week = None
+        from_month_end = None
+      elif offset_day_mode == self.OffsetDayMode.MONTH_WEEK_DAY:
+        day = None
+        week = offset_entry['week']
+        day_in_week = offset_entry['day_in_week']
+        from_month_end = offset_entry['from_month_end']
+      elif offset_day_mode == self.OffsetDayMode.MONTH_WEEKDAY_DAY_GE or offset_day_mode == self.OffsetDayMode.MONTH_WEEKDAY_DAY_LE:
+        day = offset_entry['day']
+        week = None
+        day_in_week = offset_entry['day_in_week']
+        from_month_end = None
       else:
-        raise ValueError(f'Offset mode {offset_entry_processed['offset_day_mode']} unrecognized')
+        raise ValueError(f'Offset mode {offset_day_mode} unrecognized')
       
       if coerce_to_fixed_prec and not isinstance(offset_entry['start_time_in_day'], FixedPrec):
-        offset_entry_processed['start_time_in_day'] = FixedPrec.from_basic(offset_entry['start_time_in_day'])
+        start_time_in_day = FixedPrec.from_basic(offset_entry['start_time_in_day'])
       else:
-        offset_entry_processed['start_time_in_day'] = offset_entry['start_time_in_day']
+        start_time_in_day = offset_entry['start_time_in_day']
       
       if coerce_to_fixed_prec and not isinstance(offset_entry['utc_offset'], FixedPrec):
-        offset_entry_processed['utc_offset'] = FixedPrec.from_basic(offset_entry['utc_offset'])
+        utc_offset = FixedPrec.from_basic(offset_entry['utc_offset'])
       else:
-        offset_entry_processed['utc_offset'] = offset_entry['utc_offset']
+        utc_offset = offset_entry['utc_offset']
       
-      offset_entry_processed['abbreviation'] = offset_entry.get('abbreviation', None)
-      offset_entry_processed['name'] = offset_entry.get('name', None)
-      
-      later_offsets_processed.append(offset_entry_processed)
+      later_offsets_processed.append(TimeZoneLaterOffset(
+        offset_day_mode = offset_day_mode,
+        month = offset_entry['month'],
+        day = day,
+        week = week,
+        day_in_week = day_in_week,
+        from_month_end = from_month_end,
+        start_time_in_day = start_time_in_day,
+        utc_offset = utc_offset,
+        abbreviation = offset_entry.get('abbreviation', None),
+        name = offset_entry.get('name', None),
+      ))
     
     self._later_offsets = tuple(later_offsets_processed)
+    
+    self._hashable_tuple = ('TimeZone', self._base_utc_offset, self._initial_offset, self._later_offsets)
+    # cached since get_offset_utc_times_for_year's lru_cache hashes the zone on every call
+    self._hash = hash(self._hashable_tuple)
   
   def __repr__(self):
-    return f'{self.__class__.__name__}({self.initial_offset!r}, {self.later_offsets!r})'
+    return f'{self.__class__.__name__}({self.initial_offset.to_dict()!r}, {tuple(offset_entry.to_dict() for offset_entry in self.later_offsets)!r})'
   
   def __str__(self):
     return f'TZ: UTC{time_inst.TimeInstant.fixedprec_offset_to_str(self.initial_offset['utc_offset'])} (initial){'; + others' if len(self.later_offsets) > 0 else ''}'
   
+  def __getstate__(self) -> dict:
+    # the cached hash is left out, since str and Enum hashes differ between processes
+    return {name: getattr(self, name) for name in self._pickled_slots if hasattr(self, name)}
+  
+  def __setstate__(self, state: dict) -> None:
+    for name, value in state.items():
+      setattr(self, name, value)
+    self._hash = hash(self._hashable_tuple)
+  
+  def to_hashable_tuple(self) -> tuple:
+    return self._hashable_tuple
+  
+  def __hash__(self):
+    return self._hash
+  
+  def __eq__(self, other: Self | None):
+    if other is None:
+      return False
+    
+    if isinstance(other, TimeZone):
+      return self is other or self._hashable_tuple == other._hashable_tuple
+    else:
+      return NotImplemented
+  
   @property
   def base_utc_offset(self) -> FixedPrec:
     return self._base_utc_offset
   
   @property
-  def initial_offset(self) -> dict[str, FixedPrec | int | float | str | None]:
+  def initial_offset(self) -> TimeZoneInitialOffset:
     return self._initial_offset
   
   @property
-  def later_offsets(self) -> tuple[dict[str], ...]:
+  def later_offsets(self) -> tuple[TimeZoneLaterOffset, ...]:
     return self._later_offsets
   
+  def get_offset_days_for_years(self, start_year: Integral, end_year: Integral, date_cls: type[JulGregBaseDate] = GregorianDate) -> list[tuple[Integral, ...]]:
+    'Returns, for each year in range(start_year, end_year), a tuple of the days since epoch that each later offset starts on.'
+    if len(self._later_offsets) == 0:
+      return [() for _ in range(start_year, end_year)]
+    
+    return list(zip(*(offset_entry.realize_days_for_years(start_year, end_year, date_cls = date_cls) for offset_entry in self._later_offsets)))
+  
   @lru_cache(maxsize = 32)
   def get_offset_utc_times_for_year(self, year: Integral, date_cls: type[JulGregBaseDate] = GregorianDate):
     # format:
@@ -175,22 +376,17 @@ class TimeZone:
     
     offset_times = []
     
-    current_offset = self.initial_offset['utc_offset']
+    initial_utc_offset = self._initial_offset.utc_offset
+    current_offset = initial_utc_offset
     year_start_time = time_inst.TimeInstant.date_tuple_to_epoch_instant(year, 1, 1, 0, 0, 0, 0, date_cls = GregorianDate)
     
-    for later_offset_entry in self.later_offsets:
-      later_date = self.realize_offset_entry(year, later_offset_entry, date_cls = date_cls)
-      
-      later_instant = time_inst.TimeInstant.date_tuple_to_epoch_instant(
-        later_date.year, later_date.month, later_date.day,
-        0, 0, 0, 0,
-        date_cls = date_cls
-      )
+    for later_offset_entry in self._later_offsets:
+      later_instant = later_offset_entry.realize_days(year, date_cls = date_cls) * time_inst.TimeInstant.NOMINAL_SECS_PER_DAY
       
-      later_time = later_instant + later_offset_entry['start_time_in_day'] - (current_offset - self.initial_offset['utc_offset'])
+      later_time = later_instant + later_offset_entry.start_time_in_day - (current_offset - initial_utc_offset)
       init_offset_start_time_in_year = later_time - year_start_time
-      current_offset_start_time_in_year = init_offset_start_time_in_year + (current_offset - self.initial_offset['utc_offset'])
-      utc_offset = later_offset_entry['utc_offset']
+      current_offset_start_time_in_year = init_offset_start_time_in_year + (current_offset - initial_utc_offset)
+      utc_offset = later_offset_entry.utc_offset
       dst_transition_offset = utc_offset - current_offset
       current_offset_end_time_in_year = current_offset_start_time_in_year + dst_transition_offset
       current_offset_min_time_in_year = min(current_offset_start_time_in_year, current_offset_end_time_in_year)
@@ -201,12 +397,98 @@ class TimeZone:
         'current_offset_min_time_in_year': current_offset_min_time_in_year,
         'utc_offset': utc_offset,
         'dst_transition_offset': dst_transition_offset,
-        'abbreviation': later_offset_entry['abbreviation'],
-        'name': later_offset_entry['name'],
+        'abbreviation': later_offset_entry.abbreviation,
+        'name': later_offset_entry.name,
       })
-      current_offset = later_offset_entry['utc_offset']
+      current_offset = utc_offset
     
     return offset_times
-
-# top-level export for pickle support
-OffsetDayMode = TimeZone.OffsetDayMode
+  
+  @lru_cache(maxsize = 32)
+  def get_transition_utc_times_for_year(self, year: Integral, date_cls: type[JulGregBaseDate] = GregorianDate) -> tuple[tuple[TimeStorageType, FixedPrec, str | None], ...]:
+    'Returns the transitions in a year as (utc secs since epoch, utc offset, abbreviation) tuples. Offset entries that change neither are skipped.'
+    
+    transitions = []
+    
+    initial_utc_offset = self._initial_offset.utc_offset
+    current_offset = initial_utc_offset
+    current_abbreviation = self._initial_offset.abbreviation
+    year_start_time = time_inst.TimeInstant.date_tuple_to_epoch_instant(year, 1, 1, 0, 0, 0, 0, date_cls = GregorianDate)
+    
+    for offset_time_entry in self.get_offset_utc_times_for_year(year, date_cls = date_cls):
+      if offset_time_entry['utc_offset'] != current_offset or offset_time_entry['abbreviation'] != current_abbreviation:
+        transitions.append((
+          year_start_time + offset_time_entry['init_offset_start_time_in_year'] - initial_utc_offset,
+          offset_time_entry['utc_offset'],
+          offset_time_entry['abbreviation'],
+        ))
+      
+      current_offset = offset_time_entry['utc_offset']
+      current_abbreviation = offset_time_entry['abbreviation']
+    
+    return tuple(transitions)
+  
+  def transitions(
+      self,
+      start: 'time_inst.TimeInstant',
+      end: 'time_inst.TimeInstant | None' = None,
+      date_cls: type[JulGregBaseDate] = GregorianDate
+    ) -> Iterator[TimeZoneTransition]:
+    '''
+    Lazily yields each transition with start <= instant < end (or without an end if end is None) as a tuple of the form
+    (instant, utc_offset, abbreviation, is_dst), computing the transitions one year at a time.
+    '''
+    
+    TimeInstant = time_inst.TimeInstant
+    
+    start_secs, _ = start.to_secs_since_epoch_utc()
+    if end != None:
+      end_secs, _ = end.to_secs_since_epoch_utc()
+    else:
+      end_secs = None
+    
+    # local year can be one before the utc year
+    year = date_cls.days_since_epoch_to_date(int(start_secs // TimeInstant.NOMINAL_SECS_PER_DAY))[0] - 1
+    
+    while True:
+      year_transitions = self.get_transition_utc_times_for_year(year, date_cls = date_cls)
+      
+      if len(year_transitions) == 0:
+        # the rules are the same every year, so there are no transitions in any year
+        return
+      
+      for transition_secs, utc_offset, abbreviation in year_transitions:
+        if end_secs != None and transition_secs >= end_secs:
+          return
+        
+        if transition_secs >= start_secs:
+          yield TimeZoneTransition(
+            TimeInstant.from_secs_since_epoch_utc(transition_secs),
+            utc_offset,
+            abbreviation,
+            utc_offset != self._base_utc_offset
+          )
+      
+      year += 1
+  
+  def offset_intervals(
+      self,
+      start: 'time_inst.TimeInstant',
+      end: 'time_inst.TimeInstant',
+      date_cls: type[JulGregBaseDate] = GregorianDate
+    ) -> Iterator[TimeZoneOffsetInterval]:
+    'Lazily yields the spans of constant offset covering start <= instant < end, as tuples of the form (start, end, utc_offset, abbreviation, is_dst).'
+    
+    interval_start = start
+    utc_offset, abbreviation = start.get_current_tz_offset(self, date_cls = date_cls)
+    
+    for transition in self.transitions(start, end, date_cls = date_cls):
+      if transition.instant > interval_start:
+        yield TimeZoneOffsetInterval(interval_start, transition.instant, utc_offset, abbreviation, utc_offset != self._base_utc_offset)
+      
+      interval_start = transition.instant
+      utc_offset = transition.utc_offset
+      abbreviation = transition.abbreviation
+    
+    if end > interval_start:
+      yield TimeZoneOffsetInterval(interval_start, end, utc_offset, abbreviation, utc_offset != self._base_utc_offset)
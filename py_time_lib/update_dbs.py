@@ -1,10 +1,15 @@
-from asyncio import sleep as asyncio_sleep
+from asyncio import gather, get_running_loop, sleep as asyncio_sleep
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Iterable
 
 from .time_classes.time_instant.time_inst import TimeInstant
 from .time_classes.time_zone import TimeZone
 from .time_classes.lib import TimeStorageType
 from .update_leap_seconds import get_leap_sec_data
 from .time_classes.time_instant.time_inst_smear import _active_smear_plans
+from .named_tuples import LeapSecEntry, UT1TAIOffsetEntry
+from .fixed_prec import FixedPrec
 
 from .data_py import leap_seconds as _leap_seconds
 from .update_leap_seconds import DEFAULT_LOG_DOWNLOADS as _DEFAULT_LOG_DOWNLOADS
@@ -15,7 +20,15 @@ from .update_timezone_db import DEFAULT_TZDB_URL as _DEFAULT_TZDB_URL
 from .update_timezone_db import DEFAULT_TZDB_VERSION_URL as _DEFAULT_TZDB_VERSION_URL
 from .update_timezone_db import DEFAULT_TZDB_PATH as _DEFAULT_TZDB_PATH
 from .update_timezone_db import DEFAULT_TZDB_DOWNLOADED_TIME_PATH as _DEFAULT_TZDB_DOWNLOADED_TIME_PATH
+from .update_timezone_db import DEFAULT_TZDB_PARSE_MAX_WORKERS as _DEFAULT_TZDB_PARSE_MAX_WORKERS
 from .update_timezone_db import get_tzdb_data as _Tzdb_get_tzdb_data
+from .update_timezone_db import update_stored_tzdb_if_needed as _Tzdb_update_stored_tzdb_if_needed
+from .update_timezone_db import get_tzdb_stored_file_cache_key as _Tzdb_get_tzdb_stored_file_cache_key
+from .update_timezone_db import get_cached_tzdb_data_key as _Tzdb_get_cached_tzdb_data_key
+from .update_timezone_db import get_cached_tzdb_data as _Tzdb_get_cached_tzdb_data
+from .update_timezone_db import set_cached_tzdb_data as _Tzdb_set_cached_tzdb_data
+from .update_timezone_db import parse_tzdb_stored_file as _Tzdb_parse_tzdb_stored_file
+from .update_timezone_tzif import get_tzif_data as _Tzif_get_tzif_data
 from .update_ut1 import DEFAULT_HISTORICAL_UPDATE_TIME as _DEFAULT_HISTORICAL_UPDATE_TIME
 from .update_ut1 import DEFAULT_HISTORICAL_DOWNLOADED_TIME_FILE_PATH as _DEFAULT_HISTORICAL_DOWNLOADED_TIME_FILE_PATH
 from .update_ut1 import DEFAULT_HISTORICAL_FILE_PATH as _DEFAULT_HISTORICAL_FILE_PATH
@@ -28,7 +41,15 @@ from .update_ut1 import DEFAULT_DAILY_UPDATE_TIME as _DEFAULT_DAILY_UPDATE_TIME
 from .update_ut1 import DEFAULT_DAILY_DOWNLOADED_TIME_FILE_PATH as _DEFAULT_DAILY_DOWNLOADED_TIME_FILE_PATH
 from .update_ut1 import DEFAULT_DAILY_FILE_PATH as _DEFAULT_DAILY_FILE_PATH
 from .update_ut1 import DEFAULT_DAILY_URL as _DEFAULT_DAILY_URL
+from .update_ut1 import DEFAULT_CACHE_FILE_PATH as _DEFAULT_UT1_CACHE_FILE_PATH
 from .update_ut1 import get_ut1_offsets as _Ut1_get_ut1_offsets
+from .update_ut1 import eop_historic_get_file as _Ut1_eop_historic_get_file
+from .update_ut1 import eop_recent_get_file as _Ut1_eop_recent_get_file
+from .update_ut1 import eop_daily_get_file as _Ut1_eop_daily_get_file
+from .update_ut1 import parse_ut1_offsets_cached as _Ut1_parse_ut1_offsets_cached
+from .update_ut1 import get_ut1_offsets_cache_key as _Ut1_get_ut1_offsets_cache_key
+from .update_ut1 import get_cached_ut1_offsets as _Ut1_get_cached_ut1_offsets
+from .update_ut1 import set_cached_ut1_offsets as _Ut1_set_cached_ut1_offsets
 
 TIMEZONES: dict[str, dict[str, TimeZone]] = {
   'proleptic_variable': {},
@@ -37,15 +58,67 @@ TIMEZONES: dict[str, dict[str, TimeZone]] = {
   'full_fixed': {},
 }
 
-def update_leap_seconds(log_downloads: bool = _DEFAULT_LOG_DOWNLOADS, file_path: str = _DEFAULT_LEAP_FILE_PATH, url: str = _DEFAULT_LEAP_FILE_URL):
-  leap_sec_data = get_leap_sec_data(log_downloads = log_downloads, file_path = file_path, url = url)
+def _set_leap_sec_data(leap_sec_data: dict[str, int | FixedPrec | list[LeapSecEntry]]) -> None:
   _leap_seconds.UTC_INITIAL_OFFSET_FROM_TAI = leap_sec_data['initial_utc_tai_offset']
   _leap_seconds.LEAP_SECONDS = leap_sec_data['leap_seconds']
   TimeInstant.UTC_INITIAL_OFFSET_FROM_TAI = _leap_seconds.UTC_INITIAL_OFFSET_FROM_TAI
   TimeInstant.LEAP_SECONDS = _leap_seconds.LEAP_SECONDS
   TimeInstant._init_class_vars()
+
+def _apply_leap_sec_data(leap_sec_data: dict[str, int | FixedPrec | list[LeapSecEntry]]) -> None:
+  _set_leap_sec_data(leap_sec_data)
   for smear_plan in _active_smear_plans.values():
-    smear_plan._generate_tables()
+    smear_plan._update_tables()
+
+def _apply_timezone_data(new_data: dict[str, dict[str, TimeZone]]) -> None:
+  for key in new_data:
+    TIMEZONES[key] = new_data[key]
+
+def _apply_ut1_offsets(ut1_offsets: list[UT1TAIOffsetEntry]) -> None:
+  TimeInstant.UT1_TAI_OFFSETS[:] = ut1_offsets
+  TimeInstant._init_ut1_vars()
+
+def _parse_ut1_offsets_with_leap_sec_data(
+    leap_sec_data: dict[str, int | FixedPrec | list[LeapSecEntry]],
+    historic_file_str: str,
+    recent_file_str: str,
+    daily_file_str: str,
+    cache_file_path: str | None
+  ) -> list[UT1TAIOffsetEntry]:
+  'Runs in a worker process, so the leap seconds used for parsing can be replaced without touching the ones in use by the caller.'
+  _set_leap_sec_data(leap_sec_data)
+  return _Ut1_parse_ut1_offsets_cached(historic_file_str, recent_file_str, daily_file_str, cache_file_path)
+
+def _get_tzdb_data_if_changed(
+    cached_key: tuple | None,
+    log_downloads: bool,
+    update_check_time: TimeStorageType | None,
+    tzdb_url: str,
+    version_url: str,
+    db_file_path: str,
+    downloaded_time_file_path: str,
+    parse_max_workers: int | None
+  ) -> tuple[tuple, dict[str, dict[str, TimeZone]] | None]:
+  'Runs in a worker process. Returns the cache key of the stored timezone database, and its parsed data unless the key is cached_key.'
+  
+  _Tzdb_update_stored_tzdb_if_needed(
+    log_downloads = log_downloads,
+    update_check_time = update_check_time,
+    tzdb_url = tzdb_url,
+    version_url = version_url,
+    db_file_path = db_file_path,
+    downloaded_time_file_path = downloaded_time_file_path
+  )
+  
+  key = _Tzdb_get_tzdb_stored_file_cache_key(db_file_path)
+  
+  if key == cached_key:
+    return key, None
+  else:
+    return key, _Tzdb_parse_tzdb_stored_file(db_file_path, max_workers = parse_max_workers)
+
+def update_leap_seconds(log_downloads: bool = _DEFAULT_LOG_DOWNLOADS, file_path: str = _DEFAULT_LEAP_FILE_PATH, url: str = _DEFAULT_LEAP_FILE_URL):
+  _apply_leap_sec_data(get_leap_sec_data(log_downloads = log_downloads, file_path = file_path, url = url))
 
 def update_timezone_data(
     log_downloads: bool = _DEFAULT_LOG_DOWNLOADS,
@@ -53,18 +126,28 @@ def update_timezone_data(
     tzdb_url: str = _DEFAULT_TZDB_URL,
     version_url: str = _DEFAULT_TZDB_VERSION_URL,
     db_file_path: str = _DEFAULT_TZDB_PATH,
-    downloaded_time_file_path: str = _DEFAULT_TZDB_DOWNLOADED_TIME_PATH
+    downloaded_time_file_path: str = _DEFAULT_TZDB_DOWNLOADED_TIME_PATH,
+    parse_max_workers: int | None = _DEFAULT_TZDB_PARSE_MAX_WORKERS,
+    zones: Iterable[str] | None = None
   ) -> None:
+  'Replaces TIMEZONES with the parsed timezone database, or only the given zones if zones is given.'
+  
   new_data = _Tzdb_get_tzdb_data(
     log_downloads = log_downloads,
     update_check_time = update_check_time,
     tzdb_url = tzdb_url,
     version_url = version_url,
     db_file_path = db_file_path,
-    downloaded_time_file_path = downloaded_time_file_path
+    downloaded_time_file_path = downloaded_time_file_path,
+    parse_max_workers = parse_max_workers,
+    zones = zones
   )
-  for key in new_data:
-    TIMEZONES[key] = new_data[key]
+  _apply_timezone_data(new_data)
+
+def update_timezone_data_from_tzif(zoneinfo_path: str | None = None) -> None:
+  'Updates timezone data from a local zoneinfo directory instead of downloading the timezone database.'
+  
+  _apply_timezone_data(_Tzif_get_tzif_data(zoneinfo_path))
 
 def update_ut1_offsets(
     historic_min_redownload_age: TimeStorageType | None = _DEFAULT_HISTORICAL_UPDATE_TIME,
@@ -78,9 +161,10 @@ def update_ut1_offsets(
     daily_min_redownload_age: TimeStorageType | None = _DEFAULT_DAILY_UPDATE_TIME,
     daily_downloaded_time_file_path: str = _DEFAULT_DAILY_DOWNLOADED_TIME_FILE_PATH,
     daily_data_file_path: str = _DEFAULT_DAILY_FILE_PATH,
-    daily_url: str = _DEFAULT_DAILY_URL
+    daily_url: str = _DEFAULT_DAILY_URL,
+    cache_file_path: str | None = _DEFAULT_UT1_CACHE_FILE_PATH
   ) -> None:
-  TimeInstant.UT1_TAI_OFFSETS[:] = _Ut1_get_ut1_offsets(
+  _apply_ut1_offsets(_Ut1_get_ut1_offsets(
     historic_min_redownload_age,
     historic_downloaded_time_file_path,
     historic_data_file_path,
@@ -92,8 +176,9 @@ def update_ut1_offsets(
     daily_min_redownload_age,
     daily_downloaded_time_file_path,
     daily_data_file_path,
-    daily_url
-  )
+    daily_url,
+    cache_file_path
+  ))
 
 def update_time_databases(
     log_downloads: bool = _DEFAULT_LOG_DOWNLOADS,
@@ -106,6 +191,7 @@ def update_time_databases(
     tzdb_version_url: str = _DEFAULT_TZDB_VERSION_URL,
     tzdb_file_path: str = _DEFAULT_TZDB_PATH,
     tzdb_downloaded_time_file_path: str = _DEFAULT_TZDB_DOWNLOADED_TIME_PATH,
+    tzdb_parse_max_workers: int | None = _DEFAULT_TZDB_PARSE_MAX_WORKERS,
     
     ut1_historic_min_redownload_age: TimeStorageType | None = _DEFAULT_HISTORICAL_UPDATE_TIME,
     ut1_historic_downloaded_time_file_path: str = _DEFAULT_HISTORICAL_DOWNLOADED_TIME_FILE_PATH,
@@ -118,7 +204,8 @@ def update_time_databases(
     ut1_daily_min_redownload_age: TimeStorageType | None = _DEFAULT_DAILY_UPDATE_TIME,
     ut1_daily_downloaded_time_file_path: str = _DEFAULT_DAILY_DOWNLOADED_TIME_FILE_PATH,
     ut1_daily_data_file_path: str = _DEFAULT_DAILY_FILE_PATH,
-    ut1_daily_url: str = _DEFAULT_DAILY_URL
+    ut1_daily_url: str = _DEFAULT_DAILY_URL,
+    ut1_cache_file_path: str | None = _DEFAULT_UT1_CACHE_FILE_PATH
   ) -> None:
   update_leap_seconds(
     log_downloads = log_downloads,
@@ -131,7 +218,8 @@ def update_time_databases(
     tzdb_url = tzdb_url,
     version_url = tzdb_version_url,
     db_file_path = tzdb_file_path,
-    downloaded_time_file_path = tzdb_downloaded_time_file_path
+    downloaded_time_file_path = tzdb_downloaded_time_file_path,
+    parse_max_workers = tzdb_parse_max_workers
   )
   update_ut1_offsets(
     historic_min_redownload_age = ut1_historic_min_redownload_age,
@@ -145,9 +233,131 @@ def update_time_databases(
     daily_min_redownload_age = ut1_daily_min_redownload_age,
     daily_downloaded_time_file_path = ut1_daily_downloaded_time_file_path,
     daily_data_file_path = ut1_daily_data_file_path,
-    daily_url = ut1_daily_url
+    daily_url = ut1_daily_url,
+    cache_file_path = ut1_cache_file_path
   )
 
+async def update_time_databases_async(
+    log_downloads: bool = _DEFAULT_LOG_DOWNLOADS,
+    
+    leapsec_file_path: str = _DEFAULT_LEAP_FILE_PATH,
+    leapsec_url: str = _DEFAULT_LEAP_FILE_URL,
+    
+    tzdb_update_check_time: TimeStorageType | None = _DEFAULT_TZDB_UPDATE_CHECK_TIME,
+    tzdb_url: str = _DEFAULT_TZDB_URL,
+    tzdb_version_url: str = _DEFAULT_TZDB_VERSION_URL,
+    tzdb_file_path: str = _DEFAULT_TZDB_PATH,
+    tzdb_downloaded_time_file_path: str = _DEFAULT_TZDB_DOWNLOADED_TIME_PATH,
+    tzdb_parse_max_workers: int | None = _DEFAULT_TZDB_PARSE_MAX_WORKERS,
+    
+    ut1_historic_min_redownload_age: TimeStorageType | None = _DEFAULT_HISTORICAL_UPDATE_TIME,
+    ut1_historic_downloaded_time_file_path: str = _DEFAULT_HISTORICAL_DOWNLOADED_TIME_FILE_PATH,
+    ut1_historic_data_file_path: str = _DEFAULT_HISTORICAL_FILE_PATH,
+    ut1_historic_url: str = _DEFAULT_HISTORICAL_URL,
+    ut1_recent_min_redownload_age: TimeStorageType | None = _DEFAULT_RECENT_UPDATE_TIME,
+    ut1_recent_downloaded_time_file_path: str = _DEFAULT_RECENT_DOWNLOADED_TIME_FILE_PATH,
+    ut1_recent_data_file_path: str = _DEFAULT_RECENT_FILE_PATH,
+    ut1_recent_url: str = _DEFAULT_RECENT_URL,
+    ut1_daily_min_redownload_age: TimeStorageType | None = _DEFAULT_DAILY_UPDATE_TIME,
+    ut1_daily_downloaded_time_file_path: str = _DEFAULT_DAILY_DOWNLOADED_TIME_FILE_PATH,
+    ut1_daily_data_file_path: str = _DEFAULT_DAILY_FILE_PATH,
+    ut1_daily_url: str = _DEFAULT_DAILY_URL,
+    ut1_cache_file_path: str | None = _DEFAULT_UT1_CACHE_FILE_PATH
+  ) -> None:
+  '''
+  Same as update_time_databases, but without blocking the event loop. Files are fetched concurrently in a thread pool and
+  the timezone database and ut1 offsets are parsed in worker processes, unless their contents are unchanged since the last
+  parse. All databases are then swapped in together, with no await in between, so other tasks never see new leap seconds
+  with old ut1 offsets or timezones.
+  '''
+  
+  loop = get_running_loop()
+  cached_tz_data_key = _Tzdb_get_cached_tzdb_data_key()
+  cached_tz_data = _Tzdb_get_cached_tzdb_data(cached_tz_data_key)
+  process_executor = ProcessPoolExecutor(max_workers = 2)
+  thread_executor = ThreadPoolExecutor(max_workers = 4)
+  
+  try:
+    # submitted first, so the worker processes are forked before the download threads exist
+    tz_data_future = loop.run_in_executor(process_executor, partial(
+      _get_tzdb_data_if_changed,
+      cached_tz_data_key,
+      log_downloads = log_downloads,
+      update_check_time = tzdb_update_check_time,
+      tzdb_url = tzdb_url,
+      version_url = tzdb_version_url,
+      db_file_path = tzdb_file_path,
+      downloaded_time_file_path = tzdb_downloaded_time_file_path,
+      parse_max_workers = tzdb_parse_max_workers
+    ))
+    
+    leap_sec_data, (tz_data_key, tz_data), ut1_historic_file_str, ut1_recent_file_str, ut1_daily_file_str = await gather(
+      loop.run_in_executor(thread_executor, partial(
+        get_leap_sec_data,
+        log_downloads = log_downloads,
+        file_path = leapsec_file_path,
+        url = leapsec_url
+      )),
+      tz_data_future,
+      loop.run_in_executor(thread_executor, partial(
+        _Ut1_eop_historic_get_file,
+        min_redownload_age = ut1_historic_min_redownload_age,
+        downloaded_time_file_path = ut1_historic_downloaded_time_file_path,
+        data_file_path = ut1_historic_data_file_path,
+        url = ut1_historic_url
+      )),
+      loop.run_in_executor(thread_executor, partial(
+        _Ut1_eop_recent_get_file,
+        min_redownload_age = ut1_recent_min_redownload_age,
+        downloaded_time_file_path = ut1_recent_downloaded_time_file_path,
+        data_file_path = ut1_recent_data_file_path,
+        url = ut1_recent_url
+      )),
+      loop.run_in_executor(thread_executor, partial(
+        _Ut1_eop_daily_get_file,
+        min_redownload_age = ut1_daily_min_redownload_age,
+        downloaded_time_file_path = ut1_daily_downloaded_time_file_path,
+        data_file_path = ut1_daily_data_file_path,
+        url = ut1_daily_url
+      )),
+    )
+    
+    # recent ut1 offsets are given against utc, so they are parsed with the new leap seconds
+    ut1_offsets_key = await loop.run_in_executor(thread_executor, partial(
+      _Ut1_get_ut1_offsets_cache_key,
+      ut1_historic_file_str,
+      ut1_recent_file_str,
+      ut1_daily_file_str,
+      leap_sec_data['initial_utc_tai_offset'],
+      leap_sec_data['leap_seconds']
+    ))
+    ut1_offsets = _Ut1_get_cached_ut1_offsets(ut1_offsets_key)
+    
+    if ut1_offsets == None:
+      ut1_offsets = await loop.run_in_executor(process_executor, partial(
+        _parse_ut1_offsets_with_leap_sec_data,
+        leap_sec_data,
+        ut1_historic_file_str,
+        ut1_recent_file_str,
+        ut1_daily_file_str,
+        ut1_cache_file_path
+      ))
+      _Ut1_set_cached_ut1_offsets(ut1_offsets_key, ut1_offsets)
+  finally:
+    thread_executor.shutdown(wait = False)
+    process_executor.shutdown(wait = False)
+  
+  if tz_data == None:
+    tz_data = cached_tz_data
+  else:
+    # zones unpickled from the worker process are separate objects, so share them with equal zones again
+    tz_data = {key: {name: TimeZone.intern(time_zone) for name, time_zone in zones.items()} for key, zones in tz_data.items()}
+    _Tzdb_set_cached_tzdb_data(tz_data_key, tz_data)
+  
+  _apply_leap_sec_data(leap_sec_data)
+  _apply_timezone_data(tz_data)
+  _apply_ut1_offsets(ut1_offsets)
+
 async def update_time_databases_loop(
     log_downloads: bool = _DEFAULT_LOG_DOWNLOADS,
     
@@ -159,6 +369,7 @@ async def update_time_databases_loop(
     tzdb_version_url: str = _DEFAULT_TZDB_VERSION_URL,
     tzdb_file_path: str = _DEFAULT_TZDB_PATH,
     tzdb_downloaded_time_file_path: str = _DEFAULT_TZDB_DOWNLOADED_TIME_PATH,
+    tzdb_parse_max_workers: int | None = _DEFAULT_TZDB_PARSE_MAX_WORKERS,
     
     ut1_historic_min_redownload_age: TimeStorageType | None = _DEFAULT_HISTORICAL_UPDATE_TIME,
     ut1_historic_downloaded_time_file_path: str = _DEFAULT_HISTORICAL_DOWNLOADED_TIME_FILE_PATH,
@@ -171,7 +382,8 @@ async def update_time_databases_loop(
     ut1_daily_min_redownload_age: TimeStorageType | None = _DEFAULT_DAILY_UPDATE_TIME,
     ut1_daily_downloaded_time_file_path: str = _DEFAULT_DAILY_DOWNLOADED_TIME_FILE_PATH,
     ut1_daily_data_file_path: str = _DEFAULT_DAILY_FILE_PATH,
-    ut1_daily_url: str = _DEFAULT_DAILY_URL
+    ut1_daily_url: str = _DEFAULT_DAILY_URL,
+    ut1_cache_file_path: str | None = _DEFAULT_UT1_CACHE_FILE_PATH
   ) -> None:
   update_intervals = [time for time in [
     tzdb_update_check_time,
@@ -186,7 +398,7 @@ async def update_time_databases_loop(
     while True:
       await asyncio_sleep(update_interval)
       
-      update_time_databases(
+      await update_time_databases_async(
         log_downloads = log_downloads,
         leapsec_file_path = leapsec_file_path,
         leapsec_url = leapsec_url,
@@ -195,6 +407,7 @@ async def update_time_databases_loop(
         tzdb_version_url = tzdb_version_url,
         tzdb_file_path = tzdb_file_path,
         tzdb_downloaded_time_file_path = tzdb_downloaded_time_file_path,
+        tzdb_parse_max_workers = tzdb_parse_max_workers,
         ut1_historic_min_redownload_age = ut1_historic_min_redownload_age,
         ut1_historic_downloaded_time_file_path = ut1_historic_downloaded_time_file_path,
         ut1_historic_data_file_path = ut1_historic_data_file_path,
@@ -206,5 +419,6 @@ async def update_time_databases_loop(
         ut1_daily_min_redownload_age = ut1_daily_min_redownload_age,
         ut1_daily_downloaded_time_file_path = ut1_daily_downloaded_time_file_path,
         ut1_daily_data_file_path = ut1_daily_data_file_path,
-        ut1_daily_url = ut1_daily_url
+        ut1_daily_url = ut1_daily_url,
+        ut1_cache_file_path = ut1_cache_file_path
       )
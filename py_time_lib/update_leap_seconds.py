@@ -1,7 +1,7 @@
 from re import compile as re_compile
 
 from .named_tuples import LeapSecEntry
-from .lib_funcs import get_file_at_path, set_file_at_path, get_file_from_online
+from .lib_funcs import get_file_at_path, set_file_at_path, get_file_from_online, get_file_from_online_conditional
 from .fixed_prec import FixedPrec
 from .calendars.gregorian import GregorianDate
 from .constants import NOMINAL_SECS_PER_DAY
@@ -41,6 +41,12 @@ def get_leap_sec_online_file(log_downloads: bool = DEFAULT_LOG_DOWNLOADS, url: s
     print(f'Downloading leap second database from {url}...')
   return get_file_from_online(url).decode()
 
+def update_leap_sec_stored_file(log_downloads: bool = DEFAULT_LOG_DOWNLOADS, file_path: str = DEFAULT_LEAP_FILE_PATH, url: str = DEFAULT_LEAP_FILE_URL) -> str:
+  'Downloads the leap second file into file_path unless the server reports the stored file is unchanged, and returns its contents.'
+  if log_downloads:
+    print(f'Downloading leap second database from {url}...')
+  return get_file_from_online_conditional(url, file_path)[0].decode()
+
 _leap_sec_file_metadata_lines = {'#$', '#@'}
 _leap_sec_file_last_update_regex = re_compile(r'^#\$\s+(\d+)$')
 _leap_sec_file_expiry_regex = re_compile(r'^#@\s+(\d+)$')
@@ -111,8 +117,7 @@ def get_leap_sec_data(log_downloads: bool = DEFAULT_LOG_DOWNLOADS, file_path: st
       create_new_file = True
   
   if create_new_file:
-    leap_secs_file_str = get_leap_sec_online_file(log_downloads = log_downloads, url = url)
-    set_leap_sec_stored_file(leap_secs_file_str, file_path = file_path)
+    leap_secs_file_str = update_leap_sec_stored_file(log_downloads = log_downloads, file_path = file_path, url = url)
     leap_secs_data = parse_leap_sec_file(leap_secs_file_str)
   
   return leap_secs_data
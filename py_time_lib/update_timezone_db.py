@@ -1,11 +1,14 @@
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import contextmanager
+from functools import partial
 from enum import Enum
 from numbers import Integral
 from re import compile as re_compile
 from tarfile import open as tarfile_open, TarFile
-from typing import Generator
+from typing import Generator, Iterable
 
 from .lib_funcs import file_relative_path_to_abs, file_at_path_exists, get_file_at_path, set_file_at_path, get_file_from_online
+from .lib_funcs import get_contents_hash, get_file_from_online_conditional, get_file_validators
 from .fixed_prec import FixedPrec
 from .calendars.gregorian import GregorianDate
 from .time_classes.lib import TimeStorageType
@@ -19,6 +22,7 @@ DEFAULT_TZDB_DOWNLOADED_TIME_PATH = 'data/tzdb-downloaded-time.txt'
 DEFAULT_TZDB_URL = 'https://data.iana.org/time-zones/tzdata-latest.tar.gz'
 DEFAULT_TZDB_VERSION_URL = 'https://data.iana.org/time-zones/tzdb/version'
 DEFAULT_TZDB_UPDATE_CHECK_TIME = 90 * NOMINAL_SECS_PER_DAY
+DEFAULT_TZDB_PARSE_MAX_WORKERS = 1
 
 def tzdb_stored_file_exists(file_path: str = DEFAULT_TZDB_DOWNLOADED_TIME_PATH) -> bool:
   return file_at_path_exists(file_path)
@@ -42,6 +46,12 @@ def get_tzdb_online_file(log_downloads: bool = DEFAULT_LOG_DOWNLOADS, url: str =
     print(f'Downloading timezone database from {url}...')
   return get_file_from_online(url)
 
+def update_tzdb_stored_file(log_downloads: bool = DEFAULT_LOG_DOWNLOADS, url: str = DEFAULT_TZDB_URL, file_path: str = DEFAULT_TZDB_PATH) -> bool:
+  'Downloads the timezone database into file_path unless the server reports the stored file is unchanged. Returns whether the stored file changed.'
+  if log_downloads:
+    print(f'Downloading timezone database from {url}...')
+  return get_file_from_online_conditional(url, file_path)[1]
+
 def get_tzdb_online_version(log_downloads: bool = DEFAULT_LOG_DOWNLOADS, url: str = DEFAULT_TZDB_VERSION_URL) -> str:
   if log_downloads:
     print(f'Downloading version of timezone database from {url}...')
@@ -64,7 +74,7 @@ _parse_tzdb_rule_date_ge_regex = re_compile(r'^(' + _parse_tzdb_week_names_regex
 _parse_tzdb_rule_date_le_regex = re_compile(r'^(' + _parse_tzdb_week_names_regex_part + r')<=(\d+)$')
 
 _parse_tzdb_time_regex = re_compile(r'^(\d{1,2}):(\d{2})(?::(\d{2})(?:\.(\d+))?)?(|[sguzw])$')
-_parse_tzdb_time_types = Enum('_parse_tzdb_rule_time_types', (
+_parse_tzdb_time_types = Enum('_parse_tzdb_time_types', (
   'WALL',
   'STANDARD',
   'UTC',
@@ -142,7 +152,7 @@ def _parse_tzdb_day_in_month_dict_to_date(year: Integral, month: Integral, day_d
     **day_dict,
   })
 
-def _parse_tzdb_get_filtered_lines(tgz_file: TarFile) -> list[str]:
+def _parse_tzdb_get_file_strs(tgz_file: TarFile) -> list[str]:
   # get all zone/rule files
   
   all_names = tgz_file.getnames()
@@ -164,20 +174,22 @@ def _parse_tzdb_get_filtered_lines(tgz_file: TarFile) -> list[str]:
     if name not in _parse_tzdb_unused_files
   ]
   
-  # get all zone/rule lines
+  # get contents of each file
   
-  all_lines = []
+  file_strs = []
   
   for filename in used_zone_names:
     with tgz_file.extractfile(filename) as f:
-      lines = f.read().decode().splitlines()
-      all_lines.extend(lines)
+      file_strs.append(f.read().decode())
   
+  return file_strs
+
+def _parse_tzdb_get_filtered_lines(file_str: str) -> list[str]:
   # filter out comments
   
   filtered_lines = []
   
-  for line in all_lines:
+  for line in file_str.splitlines():
     match = _parse_tzdb_line_comment_regex.match(line)
     
     non_comment = match[1]
@@ -258,7 +270,9 @@ def _parse_tzdb_get_result_dicts_zone(offset_str, rules, abbr_format, until_list
   
   return entry_dict
 
-def _parse_tzdb_get_result_dicts(lines_split: list[list[str]]) -> dict[str, dict[str, list[str | dict]]]:
+def _parse_tzdb_get_result_dicts(lines_split: list[list[str]], zone_names: set[str] | None = None, rule_names: set[str] | None = None) -> dict[str, dict[str, list[str | dict]]]:
+  # zone_names / rule_names of None parse every zone / rule, otherwise only the named ones are parsed
+  
   last_line_type = None
   
   # format:
@@ -323,7 +337,7 @@ def _parse_tzdb_get_result_dicts(lines_split: list[list[str]]) -> dict[str, dict
   
   for line_split in lines_split:
     match line_split:
-      case 'Rule', rule_name, from_year_str, to_year_str, _, month, date, time_str, offset_str, letter:
+      case 'Rule', rule_name, from_year_str, to_year_str, _, month, date, time_str, offset_str, letter if rule_names == None or rule_name in rule_names:
         last_line_type = 'Rule'
         
         entry_dict = {}
@@ -349,7 +363,10 @@ def _parse_tzdb_get_result_dicts(lines_split: list[list[str]]) -> dict[str, dict
         else:
           rules_dict[rule_name].append(entry_dict)
       
-      case 'Zone', zone_name, offset_str, rules, abbr_format, *until_list:
+      case 'Rule', _, _, _, _, _, _, _, _, _:
+        last_line_type = 'Rule'
+      
+      case 'Zone', zone_name, offset_str, rules, abbr_format, *until_list if zone_names == None or zone_name in zone_names:
         last_line_type = 'Zone'
         
         entry_dict = _parse_tzdb_get_result_dicts_zone(offset_str, rules, abbr_format, until_list)
@@ -359,8 +376,13 @@ def _parse_tzdb_get_result_dicts(lines_split: list[list[str]]) -> dict[str, dict
         else:
           zones_dict[zone_name].append(entry_dict)
       
+      case 'Zone', _, _, _, _, *_:
+        last_line_type = 'Zone-Skipped'
+      
       case ('Zone-Continue',), offset_str, rules, abbr_format, *until_list:
-        if last_line_type == 'Zone':
+        if last_line_type == 'Zone-Skipped':
+          pass
+        elif last_line_type == 'Zone':
           entry_dict = _parse_tzdb_get_result_dicts_zone(offset_str, rules, abbr_format, until_list)
           
           if zone_name not in zones_dict:
@@ -387,6 +409,39 @@ def _parse_tzdb_get_result_dicts(lines_split: list[list[str]]) -> dict[str, dict
     'links': links_dict,
   }
 
+def _parse_tzdb_get_file_result_dicts(file_str: str, zone_names: set[str] | None = None, rule_names: set[str] | None = None) -> dict[str, dict[str, list[str | dict]]]:
+  # zone continuation lines never cross files, so each file can be parsed on its own
+  filtered_lines = _parse_tzdb_get_filtered_lines(file_str)
+  lines_split = _parse_tzdb_get_processed_lines(filtered_lines)
+  return _parse_tzdb_get_result_dicts(lines_split, zone_names = zone_names, rule_names = rule_names)
+
+def _parse_tzdb_get_files_result_dicts(file_strs: list[str], max_workers: int | None, zone_names: set[str] | None = None, rule_names: set[str] | None = None) -> list[dict[str, dict[str, list[str | dict]]]]:
+  parse_func = partial(_parse_tzdb_get_file_result_dicts, zone_names = zone_names, rule_names = rule_names)
+  
+  if max_workers == 1 or len(file_strs) <= 1:
+    return [parse_func(file_str) for file_str in file_strs]
+  else:
+    with ProcessPoolExecutor(max_workers = max_workers) as executor:
+      return list(executor.map(parse_func, file_strs))
+
+def _parse_tzdb_merge_result_dicts(result_dicts_list: Iterable[dict[str, dict[str, list[str | dict]]]]) -> dict[str, dict[str, list[str | dict]]]:
+  merged_result_dicts = {
+    'rules': {},
+    'zones': {},
+    'links': {},
+  }
+  
+  for result_dicts in result_dicts_list:
+    for dict_name in merged_result_dicts:
+      merged_dict = merged_result_dicts[dict_name]
+      for name, entries in result_dicts[dict_name].items():
+        if name not in merged_dict:
+          merged_dict[name] = list(entries)
+        else:
+          merged_dict[name].extend(entries)
+  
+  return merged_result_dicts
+
 def _parse_tzdb_get_tz_dicts(result_dicts: dict[str, dict[str, list[str | dict]]]) -> dict[str, dict[str, TimeZone]]:
   # get rules and zones that go to max time
   
@@ -454,13 +509,13 @@ def _parse_tzdb_get_tz_dicts(result_dicts: dict[str, dict[str, list[str | dict]]
         later_offsets.append(tz_rule)
         
         if abbr not in proleptic_fixed:
-          proleptic_fixed[abbr] = TimeZone(
+          proleptic_fixed[abbr] = TimeZone.intern(TimeZone(
             tz_rule['utc_offset'],
             {
               'utc_offset': tz_rule['utc_offset'],
               'abbreviation': abbr,
             }
-          )
+          ))
         
         past_offset_from_standard = offset_from_standard
     else:
@@ -469,23 +524,24 @@ def _parse_tzdb_get_tz_dicts(result_dicts: dict[str, dict[str, list[str | dict]]
       initial_abbr = abbr_format.replace('%s', 'S')
       later_offsets = ()
     
-    proleptic_varying[zone_name] = TimeZone(
+    # zones sharing a rule set and offset share one object
+    proleptic_varying[zone_name] = TimeZone.intern(TimeZone(
       utc_offset,
       {
         'utc_offset': initial_utc_offset,
         'abbreviation': initial_abbr,
       },
       later_offsets
-    )
+    ))
     
     if initial_abbr not in proleptic_fixed:
-      proleptic_fixed[initial_abbr] = TimeZone(
+      proleptic_fixed[initial_abbr] = TimeZone.intern(TimeZone(
         initial_utc_offset,
         {
           'utc_offset': initial_utc_offset,
           'abbreviation': initial_abbr,
         }
-      )
+      ))
   
   # format for proleptic/full:
   # {
@@ -499,10 +555,48 @@ def _parse_tzdb_get_tz_dicts(result_dicts: dict[str, dict[str, list[str | dict]]
     'full_fixed': {},
   }
 
-def parse_tzdb(tgz_file: TarFile) -> dict[str, dict[str, TimeZone]]:
-  filtered_lines = _parse_tzdb_get_filtered_lines(tgz_file)
-  lines_split = _parse_tzdb_get_processed_lines(filtered_lines)
-  result_dicts = _parse_tzdb_get_result_dicts(lines_split)
+def parse_tzdb(tgz_file: TarFile, max_workers: int | None = DEFAULT_TZDB_PARSE_MAX_WORKERS, zones: Iterable[str] | None = None) -> dict[str, dict[str, TimeZone]]:
+  '''
+  Parses the timezone database. Each source file is parsed separately, in a process pool unless max_workers is 1 (None uses every core).
+  If zones is given, only those Zone names and the Rule sets they use are parsed; a name with no Zone line (including Link names) raises ValueError.
+  '''
+  
+  file_strs = _parse_tzdb_get_file_strs(tgz_file)
+  
+  if zones == None:
+    file_result_dicts = _parse_tzdb_get_files_result_dicts(file_strs, max_workers)
+  else:
+    # rules can be in a different file than the zone using them, so find the zones first
+    zone_names = set(zones)
+    file_result_dicts = _parse_tzdb_get_files_result_dicts(file_strs, max_workers, zone_names = zone_names, rule_names = set())
+    
+    missing_zone_names = zone_names.difference(*(result_dicts['zones'] for result_dicts in file_result_dicts))
+    
+    if len(missing_zone_names) > 0:
+      link_targets = {
+        link_name: target
+        for result_dicts in file_result_dicts
+        for target, link_names in result_dicts['links'].items()
+        for link_name in link_names
+      }
+      missing_strs = (
+        f'{zone_name} (link to {link_targets[zone_name]})' if zone_name in link_targets else zone_name
+        for zone_name in sorted(missing_zone_names)
+      )
+      raise ValueError(f'Zones not found in timezone database: {", ".join(missing_strs)}')
+    
+    used_rule_names = set(
+      zone_entry['rule']
+      for result_dicts in file_result_dicts
+      for zone_entries in result_dicts['zones'].values()
+      for zone_entry in zone_entries
+      if zone_entry['until'] == None and zone_entry['rule'] != None
+    )
+    
+    if len(used_rule_names) > 0:
+      file_result_dicts += _parse_tzdb_get_files_result_dicts(file_strs, max_workers, zone_names = set(), rule_names = used_rule_names)
+  
+  result_dicts = _parse_tzdb_merge_result_dicts(file_result_dicts)
   tz_dicts = _parse_tzdb_get_tz_dicts(result_dicts)
   
   return tz_dicts
@@ -531,31 +625,73 @@ def update_stored_tzdb_if_needed(
       file_age = current_instant - get_tzdb_stored_file_downloaded_time(downloaded_time_file_path)
       if file_age.time_delta > update_check_time:
         # stored file is old enough to check for update
-        file_version = get_tzdb_stored_file_version(db_file_path)
-        online_version = get_tzdb_online_version(log_downloads = log_downloads, url = version_url)
-        if online_version != file_version:
-          # stored file is old
+        if get_file_validators(db_file_path) != None:
+          # the conditional download only sends the file if it changed
           create_new_file = True
         else:
-          # stored file is new, reset version string
-          set_tzdb_stored_file_downloaded_time(current_instant, downloaded_time_file_path)
+          file_version = get_tzdb_stored_file_version(db_file_path)
+          online_version = get_tzdb_online_version(log_downloads = log_downloads, url = version_url)
+          if online_version != file_version:
+            # stored file is old
+            create_new_file = True
+          else:
+            # stored file is new, reset version string
+            set_tzdb_stored_file_downloaded_time(current_instant, downloaded_time_file_path)
       else:
         # stored file is recent enough to keep
         pass
   
   if create_new_file:
-    set_tzdb_stored_file(get_tzdb_online_file(log_downloads = log_downloads, url = tzdb_url), db_file_path)
+    update_tzdb_stored_file(log_downloads = log_downloads, url = tzdb_url, file_path = db_file_path)
     set_tzdb_stored_file_downloaded_time(current_instant, downloaded_time_file_path)
 
+_parsed_tzdb_cache: dict[tuple[str, tuple[str, ...] | None], dict[str, dict[str, TimeZone]]] = {}
+
+def get_tzdb_stored_file_cache_key(file_path: str = DEFAULT_TZDB_PATH, zones: Iterable[str] | None = None) -> tuple[str, tuple[str, ...] | None]:
+  return get_contents_hash(get_file_at_path(file_path)), None if zones == None else tuple(sorted(zones))
+
+def get_cached_tzdb_data_key() -> tuple[str, tuple[str, ...] | None] | None:
+  return next(iter(_parsed_tzdb_cache), None)
+
+def get_cached_tzdb_data(key: tuple[str, tuple[str, ...] | None]) -> dict[str, dict[str, TimeZone]] | None:
+  'Returns the parse result stored for key (a copy of its dicts), or None if the last parse was for a different file or zones.'
+  if key in _parsed_tzdb_cache:
+    return {dict_name: dict(tz_dict) for dict_name, tz_dict in _parsed_tzdb_cache[key].items()}
+  else:
+    return None
+
+def set_cached_tzdb_data(key: tuple[str, tuple[str, ...] | None], tz_data: dict[str, dict[str, TimeZone]]) -> None:
+  # only the last parse is kept, earlier ones are not asked for again
+  _parsed_tzdb_cache.clear()
+  _parsed_tzdb_cache[key] = {dict_name: dict(tz_dict) for dict_name, tz_dict in tz_data.items()}
+
+def parse_tzdb_stored_file(file_path: str = DEFAULT_TZDB_PATH, max_workers: int | None = DEFAULT_TZDB_PARSE_MAX_WORKERS, zones: Iterable[str] | None = None) -> dict[str, dict[str, TimeZone]]:
+  'Parses the stored timezone database, reusing the last result if neither the file contents nor the zones changed.'
+  
+  if zones != None:
+    zones = tuple(zones)
+  
+  key = get_tzdb_stored_file_cache_key(file_path, zones)
+  tz_data = get_cached_tzdb_data(key)
+  
+  if tz_data == None:
+    with get_tzdb_stored_file(file_path) as tgz_file:
+      tz_data = parse_tzdb(tgz_file, max_workers = max_workers, zones = zones)
+    set_cached_tzdb_data(key, tz_data)
+  
+  return tz_data
+
 def get_tzdb_data(
     log_downloads: bool = DEFAULT_LOG_DOWNLOADS,
     update_check_time: TimeStorageType | None = DEFAULT_TZDB_UPDATE_CHECK_TIME,
     tzdb_url: str = DEFAULT_TZDB_URL,
     version_url: str = DEFAULT_TZDB_VERSION_URL,
     db_file_path: str = DEFAULT_TZDB_PATH,
-    downloaded_time_file_path: str = DEFAULT_TZDB_DOWNLOADED_TIME_PATH
+    downloaded_time_file_path: str = DEFAULT_TZDB_DOWNLOADED_TIME_PATH,
+    parse_max_workers: int | None = DEFAULT_TZDB_PARSE_MAX_WORKERS,
+    zones: Iterable[str] | None = None
   ):
-  'Gets timezone database from file (if not too old) or from https://data.iana.org/time-zones/tzdata-latest.tar.gz.'
+  'Gets timezone database from file (if not too old) or from https://data.iana.org/time-zones/tzdata-latest.tar.gz. If zones is given, only those zones are parsed.'
   
   update_stored_tzdb_if_needed(
     log_downloads = log_downloads,
@@ -566,5 +702,4 @@ def get_tzdb_data(
     downloaded_time_file_path = downloaded_time_file_path
   )
   
-  with get_tzdb_stored_file(db_file_path) as tgz_file:
-    return parse_tzdb(tgz_file)
+  return parse_tzdb_stored_file(db_file_path, max_workers = parse_max_workers, zones = zones)
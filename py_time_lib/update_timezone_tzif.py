@@ -0,0 +1,365 @@
+from os import walk
+from os.path import isdir, relpath
+from re import compile as re_compile
+from struct import unpack_from, calcsize
+
+from .lib_funcs import file_relative_path_to_abs, get_file_at_path
+from .fixed_prec import FixedPrec
+from .time_classes.time_zone import TimeZone
+from .constants import NOMINAL_SECS_PER_HOUR, NOMINAL_SECS_PER_MIN
+
+DEFAULT_ZONEINFO_PATHS = (
+  '/usr/share/zoneinfo',
+  '/usr/lib/zoneinfo',
+  '/usr/share/lib/zoneinfo',
+  '/etc/zoneinfo',
+)
+
+_tzif_magic = b'TZif'
+_tzif_header_format = '>4sc15x6l'
+_tzif_header_size = calcsize(_tzif_header_format)
+_tzif_ttinfo_format = '>lBB'
+_tzif_ttinfo_size = calcsize(_tzif_ttinfo_format)
+# zoneinfo directories also contain these, which are alternate trees or not zones at all
+_tzif_omitted_dirs = set(('posix', 'right'))
+
+def _parse_tzif_data_block(contents: bytes, index: int, counts: tuple[int, ...], time_size: int) -> tuple[dict[str], int]:
+  isutcnt, isstdcnt, leapcnt, timecnt, typecnt, charcnt = counts
+  time_format_char = 'q' if time_size == 8 else 'l'
+  
+  transition_times = unpack_from(f'>{timecnt}{time_format_char}', contents, index)
+  index += timecnt * time_size
+  
+  transition_types = unpack_from(f'>{timecnt}B', contents, index)
+  index += timecnt
+  
+  raw_types = []
+  for _ in range(typecnt):
+    raw_types.append(unpack_from(_tzif_ttinfo_format, contents, index))
+    index += _tzif_ttinfo_size
+  
+  abbreviation_chars = contents[index:index + charcnt]
+  index += charcnt
+  
+  leap_seconds = []
+  for _ in range(leapcnt):
+    leap_seconds.append(unpack_from(f'>{time_format_char}l', contents, index))
+    index += time_size + 4
+  
+  standard_indicators = unpack_from(f'>{isstdcnt}B', contents, index)
+  index += isstdcnt
+  
+  ut_indicators = unpack_from(f'>{isutcnt}B', contents, index)
+  index += isutcnt
+  
+  local_time_types = []
+  for utc_offset, is_dst, abbreviation_index in raw_types:
+    abbreviation_end = abbreviation_chars.index(b'\0', abbreviation_index)
+    local_time_types.append({
+      'utc_offset': utc_offset,
+      'is_dst': is_dst != 0,
+      'abbreviation': abbreviation_chars[abbreviation_index:abbreviation_end].decode(),
+    })
+  
+  return {
+    'transition_times': transition_times,
+    'transition_types': transition_types,
+    'local_time_types': tuple(local_time_types),
+    'leap_seconds': tuple(leap_seconds),
+    'standard_indicators': standard_indicators,
+    'ut_indicators': ut_indicators,
+  }, index
+
+def _parse_tzif_header(contents: bytes, index: int) -> tuple[int, tuple[int, ...]]:
+  magic, version, *counts = unpack_from(_tzif_header_format, contents, index)
+  
+  if magic != _tzif_magic:
+    raise ValueError('Not a TZif file')
+  
+  if version == b'\0':
+    version_int = 1
+  elif version in (b'2', b'3', b'4'):
+    version_int = int(version)
+  else:
+    raise ValueError(f'TZif version unknown: {version!r}')
+  
+  return version_int, tuple(counts)
+
+def is_tzif_file(contents: bytes) -> bool:
+  return contents[:len(_tzif_magic)] == _tzif_magic
+
+def parse_tzif(contents: bytes) -> dict[str]:
+  'Parses a compiled TZif (RFC 8536) file, versions 1 through 4.'
+  
+  version, counts = _parse_tzif_header(contents, 0)
+  
+  data_dict, index = _parse_tzif_data_block(contents, _tzif_header_size, counts, 4)
+  
+  footer = None
+  
+  if version >= 2:
+    # the v1 block is only kept for old readers, the 64 bit block after it is authoritative
+    _, counts = _parse_tzif_header(contents, index)
+    data_dict, index = _parse_tzif_data_block(contents, index + _tzif_header_size, counts, 8)
+    
+    if contents[index:index + 1] != b'\n':
+      raise ValueError('TZif footer missing')
+    
+    footer_end = contents.index(b'\n', index + 1)
+    footer = contents[index + 1:footer_end].decode()
+  
+  # format:
+  # {
+  #   'version': int (1-4),
+  #   'transition_times': tuple[int utc seconds since unix epoch, ...],
+  #   'transition_types': tuple[int index into local_time_types, ...],
+  #   'local_time_types': tuple[
+  #     {
+  #       'utc_offset': int seconds,
+  #       'is_dst': bool,
+  #       'abbreviation': str,
+  #     },
+  #     ...
+  #   ],
+  #   'leap_seconds': tuple[(int occurrence, int correction), ...],
+  #   'standard_indicators': tuple[int, ...],
+  #   'ut_indicators': tuple[int, ...],
+  #   'footer': str posix tz string | None,
+  # }
+  return {
+    'version': version,
+    **data_dict,
+    'footer': footer,
+  }
+
+_posix_tz_name_regex_part = r'<[^>]*>|[A-Za-z]{3,}'
+_posix_tz_offset_regex_part = r'[+-]?\d{1,3}(?::\d{2}){0,2}'
+_posix_tz_date_regex_part = r'J\d{1,3}|\d{1,3}|M\d{1,2}\.\d\.\d'
+_posix_tz_regex = re_compile(
+  r'^(' + _posix_tz_name_regex_part + r')(' + _posix_tz_offset_regex_part + r')' +
+  r'(?:(' + _posix_tz_name_regex_part + r')(' + _posix_tz_offset_regex_part + r')?' +
+  r'(?:,(' + _posix_tz_date_regex_part + r')(?:/(' + _posix_tz_offset_regex_part + r'))?' +
+  r',(' + _posix_tz_date_regex_part + r')(?:/(' + _posix_tz_offset_regex_part + r'))?)?)?$'
+)
+_posix_tz_time_regex = re_compile(r'^([+-]?)(\d{1,3})(?::(\d{2}))?(?::(\d{2}))?$')
+_posix_tz_month_week_day_regex = re_compile(r'^M(\d{1,2})\.(\d)\.(\d)$')
+_posix_tz_julian_day_regex = re_compile(r'^J(\d{1,3})$')
+_posix_tz_zero_based_day_regex = re_compile(r'^(\d{1,3})$')
+# posix default when the dst rule is omitted
+_posix_tz_default_rule = ('M3.2.0', None, 'M11.1.0', None)
+_posix_tz_default_rule_time = 2 * NOMINAL_SECS_PER_HOUR
+_posix_tz_non_leap_month_starts = (0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334, 365)
+
+def _parse_posix_tz_time(time_str: str) -> FixedPrec:
+  if match := _posix_tz_time_regex.match(time_str):
+    time_abs = FixedPrec(int(match[2]) * NOMINAL_SECS_PER_HOUR)
+    if match[3] != None:
+      time_abs += int(match[3]) * NOMINAL_SECS_PER_MIN
+    if match[4] != None:
+      time_abs += int(match[4])
+    
+    return -time_abs if match[1] == '-' else time_abs
+  else:
+    raise ValueError(f'Posix TZ time format unknown: {time_str}')
+
+def _parse_posix_tz_name(name_str: str) -> str:
+  if name_str[:1] == '<':
+    return name_str[1:-1]
+  else:
+    return name_str
+
+def _parse_posix_tz_date(date_str: str) -> dict[str, TimeZone.OffsetDayMode | int | bool]:
+  if match := _posix_tz_month_week_day_regex.match(date_str):
+    week = int(match[2])
+    if week == 5:
+      return {
+        'offset_day_mode': TimeZone.OffsetDayMode.MONTH_WEEK_DAY,
+        'month': int(match[1]),
+        'week': 1,
+        'day_in_week': int(match[3]),
+        'from_month_end': True,
+      }
+    else:
+      return {
+        'offset_day_mode': TimeZone.OffsetDayMode.MONTH_WEEK_DAY,
+        'month': int(match[1]),
+        'week': week,
+        'day_in_week': int(match[3]),
+        'from_month_end': False,
+      }
+  elif match := _posix_tz_julian_day_regex.match(date_str):
+    # 1-365, february 29 is never counted
+    day_of_year = int(match[1]) - 1
+  elif match := _posix_tz_zero_based_day_regex.match(date_str):
+    # 0-365, february 29 is counted so only days before it map to a fixed month and day
+    day_of_year = int(match[1])
+    if day_of_year >= _posix_tz_non_leap_month_starts[2]:
+      raise ValueError(f'Posix TZ zero based day after february not supported: {date_str}')
+  else:
+    raise ValueError(f'Posix TZ date format unknown: {date_str}')
+  
+  if not 0 <= day_of_year < _posix_tz_non_leap_month_starts[-1]:
+    raise ValueError(f'Posix TZ day out of range: {date_str}')
+  
+  month = next(month for month in range(12, 0, -1) if _posix_tz_non_leap_month_starts[month - 1] <= day_of_year)
+  
+  return {
+    'offset_day_mode': TimeZone.OffsetDayMode.MONTH_AND_DAY,
+    'month': month,
+    'day': day_of_year - _posix_tz_non_leap_month_starts[month - 1] + 1,
+  }
+
+def parse_posix_tz_string(tz_str: str) -> TimeZone:
+  'Creates a TimeZone from a POSIX TZ string, like the footer of a TZif file (e.g. "CST6CDT,M3.2.0,M11.1.0").'
+  
+  if match := _posix_tz_regex.match(tz_str):
+    std_name, std_offset_str, dst_name, dst_offset_str, start_date, start_time, end_date, end_time = match.groups()
+  else:
+    raise ValueError(f'Posix TZ string format unknown: {tz_str}')
+  
+  # posix offsets are positive west of greenwich
+  std_abbr = _parse_posix_tz_name(std_name)
+  std_utc_offset = -_parse_posix_tz_time(std_offset_str)
+  
+  if dst_name == None:
+    return TimeZone(
+      std_utc_offset,
+      {
+        'utc_offset': std_utc_offset,
+        'abbreviation': std_abbr,
+      }
+    )
+  
+  dst_abbr = _parse_posix_tz_name(dst_name)
+  
+  if dst_offset_str != None:
+    dst_utc_offset = -_parse_posix_tz_time(dst_offset_str)
+  else:
+    dst_utc_offset = std_utc_offset + NOMINAL_SECS_PER_HOUR
+  
+  if start_date == None:
+    start_date, start_time, end_date, end_time = _posix_tz_default_rule
+  
+  later_offsets = [
+    {
+      **_parse_posix_tz_date(start_date),
+      'start_time_in_day': _parse_posix_tz_time(start_time) if start_time != None else FixedPrec(_posix_tz_default_rule_time),
+      'utc_offset': dst_utc_offset,
+      'abbreviation': dst_abbr,
+    },
+    {
+      **_parse_posix_tz_date(end_date),
+      'start_time_in_day': _parse_posix_tz_time(end_time) if end_time != None else FixedPrec(_posix_tz_default_rule_time),
+      'utc_offset': std_utc_offset,
+      'abbreviation': std_abbr,
+    },
+  ]
+  
+  later_offsets.sort(key = lambda x: x['month'])
+  
+  return TimeZone(
+    std_utc_offset,
+    {
+      'utc_offset': later_offsets[-1]['utc_offset'],
+      'abbreviation': later_offsets[-1]['abbreviation'],
+    },
+    later_offsets
+  )
+
+def tzif_to_time_zone(tzif_dict: dict[str]) -> TimeZone:
+  'Creates a TimeZone for the current rules of a parsed TZif file.'
+  
+  if tzif_dict['footer']:
+    return parse_posix_tz_string(tzif_dict['footer'])
+  
+  # no footer (v1 file or unspecified future), so the last local time type stays in effect
+  if len(tzif_dict['transition_types']) > 0:
+    local_time_type = tzif_dict['local_time_types'][tzif_dict['transition_types'][-1]]
+  elif len(tzif_dict['local_time_types']) > 0:
+    local_time_type = tzif_dict['local_time_types'][0]
+  else:
+    raise ValueError('TZif file has no local time types')
+  
+  utc_offset = FixedPrec(local_time_type['utc_offset'])
+  
+  return TimeZone(
+    utc_offset,
+    {
+      'utc_offset': utc_offset,
+      'abbreviation': local_time_type['abbreviation'],
+    }
+  )
+
+def get_zoneinfo_path(zoneinfo_path: str | None = None) -> str | None:
+  'Gets the first existing zoneinfo directory, checking the system locations and then the tzdata package.'
+  
+  if zoneinfo_path != None:
+    return file_relative_path_to_abs(zoneinfo_path)
+  
+  for path in DEFAULT_ZONEINFO_PATHS:
+    if isdir(path):
+      return path
+  
+  try:
+    from importlib.resources import files
+    tzdata_path = str(files('tzdata') / 'zoneinfo')
+    if isdir(tzdata_path):
+      return tzdata_path
+  except ImportError:
+    pass
+  
+  return None
+
+def parse_zoneinfo_dir(zoneinfo_path: str) -> dict[str, dict[str, TimeZone]]:
+  'Parses every TZif file in a zoneinfo directory, named by their relative path (e.g. "America/Chicago").'
+  
+  abs_path = file_relative_path_to_abs(zoneinfo_path)
+  
+  proleptic_varying = {}
+  proleptic_fixed = {}
+  
+  for dir_path, dir_names, file_names in walk(abs_path):
+    if dir_path == abs_path:
+      dir_names[:] = [name for name in dir_names if name not in _tzif_omitted_dirs]
+    dir_names.sort()
+    
+    for file_name in sorted(file_names):
+      file_path = f'{dir_path}/{file_name}'
+      contents = get_file_at_path(file_path)
+      
+      if contents == None or not is_tzif_file(contents):
+        continue
+      
+      zone_name = relpath(file_path, abs_path).replace('\\', '/')
+      # many zones share the same current rules, so share one object between them
+      time_zone = TimeZone.intern(tzif_to_time_zone(parse_tzif(contents)))
+      proleptic_varying[zone_name] = time_zone
+      
+      for offset_entry in (time_zone.initial_offset, *time_zone.later_offsets):
+        abbr = offset_entry['abbreviation']
+        if abbr != None and abbr not in proleptic_fixed:
+          proleptic_fixed[abbr] = TimeZone.intern(TimeZone(
+            offset_entry['utc_offset'],
+            {
+              'utc_offset': offset_entry['utc_offset'],
+              'abbreviation': abbr,
+            }
+          ))
+  
+  # same format as parse_tzdb
+  return {
+    'proleptic_variable': proleptic_varying,
+    'proleptic_fixed': proleptic_fixed,
+    'full_varying': {},
+    'full_fixed': {},
+  }
+
+def get_tzif_data(zoneinfo_path: str | None = None) -> dict[str, dict[str, TimeZone]]:
+  'Gets timezone database from a local zoneinfo directory (such as /usr/share/zoneinfo), without downloading anything.'
+  
+  found_path = get_zoneinfo_path(zoneinfo_path)
+  
+  if found_path == None:
+    raise FileNotFoundError('No zoneinfo directory found')
+  
+  return parse_zoneinfo_dir(found_path)
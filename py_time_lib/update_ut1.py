@@ -1,11 +1,12 @@
-from re import compile as re_compile
+from array import array
+from struct import pack, unpack_from
 
-from .lib_funcs import binary_search, file_at_path_exists, get_file_at_path, set_file_at_path, get_file_from_online
+from .lib_funcs import binary_search, file_at_path_exists, get_file_at_path, set_file_at_path, get_contents_hash, get_file_from_online_conditional
 from .fixed_prec import FixedPrec
 from .time_classes.lib import TimeStorageType
 from .time_classes.time_instant.time_inst import TimeInstant
 from .constants import NOMINAL_SECS_PER_DAY
-from .named_tuples import UT1TAIOffsetEntry
+from .named_tuples import LeapSecEntry, UT1TAIOffsetEntry
 
 DEFAULT_HISTORICAL_URL = 'https://datacenter.iers.org/data/latestVersion/EOP_C01_IAU2000_1846-now.txt'
 DEFAULT_HISTORICAL_FILE_PATH = 'data/EOP_C01_IAU2000_1846-now.txt'
@@ -19,6 +20,7 @@ DEFAULT_DAILY_URL = 'https://datacenter.iers.org/data/latestVersion/finals.daily
 DEFAULT_DAILY_FILE_PATH = 'data/finals.daily.iau2000.txt'
 DEFAULT_DAILY_DOWNLOADED_TIME_FILE_PATH = 'data/eop-daily-downloaded-time.txt'
 DEFAULT_DAILY_UPDATE_TIME = 1 * NOMINAL_SECS_PER_DAY
+DEFAULT_CACHE_FILE_PATH = 'data/ut1-offsets-cache.bin'
 
 def _get_file(
     file_descriptor: str,
@@ -42,9 +44,8 @@ def _get_file(
   
   if create_new_file:
     print(f'Downloading EOP {file_descriptor} file from {url}...')
-    file_contents = get_file_from_online(url)
+    file_contents, _ = get_file_from_online_conditional(url, data_file_path)
     set_file_at_path(downloaded_time_file_path, str(current_instant.time).encode())
-    set_file_at_path(data_file_path, file_contents)
   else:
     file_contents = get_file_at_path(data_file_path)
   
@@ -92,62 +93,59 @@ def eop_daily_get_file(
     url
   )
 
-_historic_file_line = re_compile(r'^\s*(-?\d+\.\d{3})(?:\s+(?:-?\d+\.\d{6})){2}\s+(-?\d+\.\d{7})(?:\s+(?:-?\d+\.\d{6})){4}\s+(-?\d+\.\d{7}).*$')
-_recent_file_line = re_compile(r'^(?:[0-9 ]{2}){3}\s+(-?\d+\.\d{2})(?:\s+[IP](?:\s+(?:-?\d+\.\d{6})){4}(?:\s+[IP]\s{0,1}(-?\d+\.\d{7})\s+(?:\d+\.\d{7}))?)?')
-
 def parse_historic_file(file_str: str) -> list[UT1TAIOffsetEntry]:
-  file_lines = [line for line in file_str.strip().splitlines() if not line.startswith('#')]
-  
-  ut1_offset_list = []
-  
-  for line in file_lines:
-    if match := _historic_file_line.match(line):
-      ut1_minus_tai_error_str = match[3]
-      # ignore invalid values
-      if ut1_minus_tai_error_str != '99.9900000':
-        mjd = FixedPrec(match[1])
-        ut1_minus_tai = FixedPrec(match[2])
-        
-        tai_secs_since_epoch = TimeInstant.from_modified_julian_date_utc(mjd, second_fold = True).time
-        
-        ut1_offset_list.append(UT1TAIOffsetEntry(tai_secs_since_epoch, ut1_minus_tai))
-    else:
+  mjds = []
+  ut1_minus_tais = []
+  
+  for line in file_str.splitlines():
+    if line.startswith('#') or line.strip() == '':
+      continue
+    
+    # columns: mjd, x, y, ut1-tai, dx, dy, x error, y error, ut1-tai error, ...
+    fields = line.split()
+    if len(fields) < 9:
       raise ValueError(f'Historic file line invalid format: {line!r}')
     
-    # ut1_minus_tai_error_str = line[95:105].strip()
-    # # ignore invalid values
-    # if ut1_minus_tai_error_str != '99.9900000':
-    #   mjd = FixedPrec(line[0:12].strip())
-    #   ut1_minus_tai = FixedPrec(line[33:48].strip())
-    #   
-    #   tai_secs_since_epoch = TimeInstant.from_modified_julian_date_utc(mjd, second_fold = True).time
-    #   
-    #   ut1_offset_list.append(UT1TAIOffsetEntry(tai_secs_since_epoch, ut1_minus_tai))
-  
-  return ut1_offset_list
+    # ignore invalid values
+    if fields[8] != '99.9900000':
+      try:
+        mjds.append(FixedPrec(fields[0]))
+        ut1_minus_tais.append(FixedPrec(fields[3]))
+      except TypeError:
+        raise ValueError(f'Historic file line invalid format: {line!r}')
+  
+  instants = TimeInstant.from_modified_julian_date_utc_many(mjds, second_fold = True)
+  
+  return [UT1TAIOffsetEntry(instant.time, ut1_minus_tai) for instant, ut1_minus_tai in zip(instants, ut1_minus_tais)]
 
 def parse_recent_files(file_str: str) -> list[UT1TAIOffsetEntry]:
-  file_lines = file_str.strip().splitlines()
-  
-  ut1_offset_list = []
-  
-  for line in file_lines:
-    if match := _recent_file_line.match(line):
-      # ignore lines without information
-      if match[2] != None:
-        mjd = FixedPrec(match[1])
-        ut1_minus_utc = FixedPrec(match[2])
-        
-        instant = TimeInstant.from_modified_julian_date_utc(mjd, second_fold = True)
-        
-        tai_secs_since_epoch = instant.time
-        ut1_minus_tai = instant.get_utc_tai_offset() + ut1_minus_utc
-        
-        ut1_offset_list.append(UT1TAIOffsetEntry(tai_secs_since_epoch, ut1_minus_tai))
-    else:
+  utc_secs_since_epoch_list = []
+  ut1_minus_utcs = []
+  
+  for line in file_str.splitlines():
+    if line.strip() == '':
+      continue
+    
+    # fixed columns (1-based): mjd in 8-15, ut1-utc flag in 58, ut1-utc in 59-68
+    try:
+      mjd = FixedPrec(line[7:15].strip())
+    except TypeError:
       raise ValueError(f'Recent file line invalid format: {line!r}')
+    
+    ut1_minus_utc_str = line[58:68].strip()
+    
+    # ignore lines without information
+    if ut1_minus_utc_str != '':
+      utc_secs_since_epoch_list.append((mjd - TimeInstant.MODIFIED_JULIAN_DATE_OFFSET_FROM_JD) * TimeInstant.NOMINAL_SECS_PER_DAY + TimeInstant.JULIAN_DATE_OFFSET)
+      ut1_minus_utcs.append(FixedPrec(ut1_minus_utc_str))
+  
+  instants = TimeInstant.from_secs_since_epoch_utc_many(utc_secs_since_epoch_list, second_fold = True)
   
-  return ut1_offset_list
+  return [
+    # utc - tai offset of the instant is the utc seconds minus the tai seconds
+    UT1TAIOffsetEntry(instant.time, utc_secs_since_epoch - instant.time + ut1_minus_utc)
+    for instant, utc_secs_since_epoch, ut1_minus_utc in zip(instants, utc_secs_since_epoch_list, ut1_minus_utcs)
+  ]
 
 def parse_ut1_offsets(historic_file_str: str, recent_file_str: str, daily_file_str: str) -> list[UT1TAIOffsetEntry]:
   historic_data = parse_historic_file(historic_file_str)
@@ -176,6 +174,125 @@ def parse_ut1_offsets(historic_file_str: str, recent_file_str: str, daily_file_s
   
   return full_data
 
+_parsed_ut1_offsets_cache: dict[tuple, list[UT1TAIOffsetEntry]] = {}
+
+def get_ut1_offsets_cache_key(
+    historic_file_str: str,
+    recent_file_str: str,
+    daily_file_str: str,
+    utc_initial_offset_from_tai: FixedPrec | None = None,
+    leap_seconds: list[LeapSecEntry] | None = None
+  ) -> tuple:
+  'Recent and daily offsets are given against utc, so the leap seconds used for parsing are part of the key. They default to the current ones.'
+  
+  if utc_initial_offset_from_tai == None:
+    utc_initial_offset_from_tai = TimeInstant.UTC_INITIAL_OFFSET_FROM_TAI
+  if leap_seconds == None:
+    leap_seconds = TimeInstant.LEAP_SECONDS
+  
+  return (
+    get_contents_hash(historic_file_str.encode()),
+    get_contents_hash(recent_file_str.encode()),
+    get_contents_hash(daily_file_str.encode()),
+    utc_initial_offset_from_tai,
+    tuple(leap_seconds),
+  )
+
+def get_cached_ut1_offsets(key: tuple) -> list[UT1TAIOffsetEntry] | None:
+  'Returns the parse result stored for key (a copy), or None if the last parse was for different files or leap seconds.'
+  if key in _parsed_ut1_offsets_cache:
+    return _parsed_ut1_offsets_cache[key][:]
+  else:
+    return None
+
+def set_cached_ut1_offsets(key: tuple, ut1_offsets: list[UT1TAIOffsetEntry]) -> None:
+  # only the last parse is kept, earlier ones are not asked for again
+  _parsed_ut1_offsets_cache.clear()
+  _parsed_ut1_offsets_cache[key] = ut1_offsets[:]
+
+_cache_file_magic = b'PTLUT1C\x01'
+# value, place and max_prec of the FixedPrec secs_since_epoch, then of the FixedPrec ut1_minus_tai
+_cache_file_column_types = 'q', 'b', 'i', 'q', 'b', 'i'
+
+def _get_cache_file_key_digest(key: tuple) -> bytes:
+  return bytes.fromhex(get_contents_hash(repr(key).encode()))
+
+def ut1_offsets_to_cache_bytes(key: tuple, ut1_offsets: list[UT1TAIOffsetEntry]) -> bytes:
+  'Packs ut1 offsets into integer arrays (native byte order, so the cache is only for this host), headed by a digest of key.'
+  
+  columns = [array(column_type) for column_type in _cache_file_column_types]
+  
+  for secs_since_epoch, ut1_minus_tai in ut1_offsets:
+    secs_since_epoch = FixedPrec.from_basic(secs_since_epoch)
+    ut1_minus_tai = FixedPrec.from_basic(ut1_minus_tai)
+    for column, value in zip(columns, (
+        secs_since_epoch.value, secs_since_epoch.place, secs_since_epoch.max_prec,
+        ut1_minus_tai.value, ut1_minus_tai.place, ut1_minus_tai.max_prec,
+      )):
+      column.append(value)
+  
+  return b''.join((
+    _cache_file_magic,
+    _get_cache_file_key_digest(key),
+    pack('<I', len(ut1_offsets)),
+    *(column.tobytes() for column in columns),
+  ))
+
+def ut1_offsets_from_cache_bytes(key: tuple, cache_bytes: bytes) -> list[UT1TAIOffsetEntry] | None:
+  'Returns the ut1 offsets packed by ut1_offsets_to_cache_bytes, or None if cache_bytes is not a complete cache for key.'
+  
+  key_digest = _get_cache_file_key_digest(key)
+  header_size = len(_cache_file_magic) + len(key_digest) + 4
+  
+  if len(cache_bytes) < header_size or cache_bytes[:len(_cache_file_magic)] != _cache_file_magic or cache_bytes[len(_cache_file_magic):header_size - 4] != key_digest:
+    return None
+  
+  count, = unpack_from('<I', cache_bytes, header_size - 4)
+  
+  columns = []
+  position = header_size
+  
+  for column_type in _cache_file_column_types:
+    column = array(column_type)
+    column_size = column.itemsize * count
+    if position + column_size > len(cache_bytes):
+      return None
+    column.frombytes(cache_bytes[position:position + column_size])
+    columns.append(column)
+    position += column_size
+  
+  if position != len(cache_bytes):
+    return None
+  
+  return [
+    UT1TAIOffsetEntry(FixedPrec(secs_value, secs_place, secs_max_prec), FixedPrec(offset_value, offset_place, offset_max_prec))
+    for secs_value, secs_place, secs_max_prec, offset_value, offset_place, offset_max_prec in zip(*columns)
+  ]
+
+def parse_ut1_offsets_cached(historic_file_str: str, recent_file_str: str, daily_file_str: str, cache_file_path: str | None = DEFAULT_CACHE_FILE_PATH) -> list[UT1TAIOffsetEntry]:
+  '''
+  Same as parse_ut1_offsets, but reuses the last result if the files and leap seconds have not changed since, from memory
+  or from the binary cache file at cache_file_path (None to not use a cache file).
+  '''
+  
+  key = get_ut1_offsets_cache_key(historic_file_str, recent_file_str, daily_file_str)
+  ut1_offsets = get_cached_ut1_offsets(key)
+  
+  if ut1_offsets == None:
+    if cache_file_path != None:
+      cache_bytes = get_file_at_path(cache_file_path)
+      if cache_bytes != None:
+        ut1_offsets = ut1_offsets_from_cache_bytes(key, cache_bytes)
+    
+    if ut1_offsets == None:
+      ut1_offsets = parse_ut1_offsets(historic_file_str, recent_file_str, daily_file_str)
+      if cache_file_path != None:
+        set_file_at_path(cache_file_path, ut1_offsets_to_cache_bytes(key, ut1_offsets))
+    
+    set_cached_ut1_offsets(key, ut1_offsets)
+  
+  return ut1_offsets
+
 def get_ut1_offsets(
     historic_min_redownload_age: TimeStorageType | None = DEFAULT_HISTORICAL_UPDATE_TIME,
     historic_downloaded_time_file_path: str = DEFAULT_HISTORICAL_DOWNLOADED_TIME_FILE_PATH,
@@ -188,9 +305,10 @@ def get_ut1_offsets(
     daily_min_redownload_age: TimeStorageType | None = DEFAULT_DAILY_UPDATE_TIME,
     daily_downloaded_time_file_path: str = DEFAULT_DAILY_DOWNLOADED_TIME_FILE_PATH,
     daily_data_file_path: str = DEFAULT_DAILY_FILE_PATH,
-    daily_url: str = DEFAULT_DAILY_URL
+    daily_url: str = DEFAULT_DAILY_URL,
+    cache_file_path: str | None = DEFAULT_CACHE_FILE_PATH
   ) -> list[UT1TAIOffsetEntry]:
-  return parse_ut1_offsets(
+  return parse_ut1_offsets_cached(
     eop_historic_get_file(
       min_redownload_age = historic_min_redownload_age,
       downloaded_time_file_path = historic_downloaded_time_file_path,
@@ -208,5 +326,6 @@ def get_ut1_offsets(
       downloaded_time_file_path = daily_downloaded_time_file_path,
       data_file_path = daily_data_file_path,
       url = daily_url
-    )
+    ),
+    cache_file_path = cache_file_path
   )
@@ -11,6 +11,8 @@ from py_time_lib.tests.calendars.test_calendar_symmetry import TestCalendarSymme
 from py_time_lib.tests.time_classes.test_time_classes import TestTimeClasses
 from py_time_lib.tests.test_fixed_prec import TestFixedPrec
 from py_time_lib.tests.test_lib_funcs import TestLibFuncs
+from py_time_lib.tests.test_piecewise_chebyshev import TestPiecewiseChebyshev
+from py_time_lib.tests.test_update_timezone import TestUpdateTimezone
 
 update_time_databases()
 